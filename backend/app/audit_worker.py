@@ -0,0 +1,106 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from .database import AsyncSessionLocal
+from .models import ReadingAudit
+from .predictor import audit_vitals_ai
+
+load_dotenv()
+
+# "async": commit readings right away and run the LLM check in the background.
+# "sync": await the full audit before the reading is stored (previous behaviour).
+AUDIT_MODE = os.getenv("AUDIT_MODE", "async").lower()
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", "2"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "1000"))
+AUDIT_SHUTDOWN_GRACE_SECONDS = float(os.getenv("AUDIT_SHUTDOWN_GRACE_SECONDS", "5.0"))
+
+class AuditWorkerPool:
+    """
+    Bounded queue of readings waiting for the LLM plausibility check, drained by a
+    fixed number of worker tasks. Each verdict is stored as a ReadingAudit row.
+    submit() never blocks the write path: when the queue is full it returns False.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 1000):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=AUDIT_SHUTDOWN_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            pass  # Unfinished readings keep reporting PENDING
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, reading_id: int, vitals: dict) -> bool:
+        if not self.running:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((reading_id, vitals))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.submitted += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            reading_id, vitals = await self._queue.get()
+            try:
+                verdict = await audit_vitals_ai(vitals)
+                async with AsyncSessionLocal() as db:
+                    db.add(ReadingAudit(
+                        reading_id=reading_id,
+                        status=verdict["status"],
+                        reason=verdict["reason"],
+                        source="AI",
+                        audited_at=datetime.utcnow()
+                    ))
+                    await db.commit()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Background Audit Error (reading {reading_id}): {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "mode": AUDIT_MODE,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+audit_pool = AuditWorkerPool(workers=AUDIT_WORKERS, queue_size=AUDIT_QUEUE_SIZE)
@@ -0,0 +1,435 @@
+"""
+Per-patient baselines handed to calculate_risk as historical_average.
+
+Strategies (chosen per request):
+- lifetime:   mean of every reading, from the patient_baselines aggregate table
+              (count, sum and Welford M2, merged in the insert's transaction)
+- last_n:     mean of the last BASELINE_WINDOW_READINGS readings
+- last_hours: mean of the readings from the last BASELINE_WINDOW_HOURS hours
+- ewma:       time-decayed mean with a BASELINE_EWMA_HALF_LIFE_HOURS half-life
+
+The windowed and EWMA strategies are kept in memory per patient and updated
+as readings arrive, so every strategy is a constant-time read.
+
+Backfill the lifetime aggregates for existing data with:
+
+    python -m app.baselines backfill
+"""
+import argparse
+import asyncio
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from sqlalchemy import select, func, cast, Float, DateTime, literal, exists, true, case, and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import upsert
+from .conditional import bump_data_versions
+from .models import Patient, PatientReading, PatientBaseline
+
+load_dotenv()
+
+VITALS = ("heart_rate", "temperature", "oxygen_saturation")
+
+BASELINE_STRATEGIES = ("lifetime", "last_n", "last_hours", "ewma")
+BASELINE_WINDOW_READINGS = int(os.getenv("BASELINE_WINDOW_READINGS", "50"))
+BASELINE_WINDOW_HOURS = float(os.getenv("BASELINE_WINDOW_HOURS", "24"))
+BASELINE_EWMA_HALF_LIFE_HOURS = float(os.getenv("BASELINE_EWMA_HALF_LIFE_HOURS", "6"))
+# How far back to replay readings when warming the EWMA, in half-lives (weight left: 2^-8 ~ 0.4%)
+EWMA_WARMUP_HALF_LIVES = 8
+# Patients per history-seeding query (bounds the IN list)
+MERGE_CHUNK_PATIENTS = 1000
+
+def summarize(readings: Iterable) -> dict:
+    """Count, sums and M2 (sum of squared deviations) of a group of readings, via Welford"""
+    count = 0
+    means = {vital: 0.0 for vital in VITALS}
+    summary = {f"{vital}_m2": 0.0 for vital in VITALS}
+    for reading in readings:
+        count += 1
+        for vital in VITALS:
+            value = float(getattr(reading, vital))
+            delta = value - means[vital]
+            means[vital] += delta / count
+            summary[f"{vital}_m2"] += delta * (value - means[vital])
+    summary["reading_count"] = count
+    for vital in VITALS:
+        summary[f"{vital}_sum"] = means[vital] * count
+    return summary
+
+def _upsert(dialect_name: str):
+    return upsert(PatientBaseline.__table__, dialect_name)
+
+async def merge_readings(db: AsyncSession, patient_id: int, readings: List):
+    """Fold one patient's new readings into their running baseline (see merge_reading_groups)"""
+    await merge_reading_groups(db, {patient_id: readings})
+
+async def merge_reading_groups(db: AsyncSession, readings_by_patient: Dict[int, List]):
+    """
+    Fold new readings into each patient's running baseline.
+    All patients' deltas go through one INSERT ... ON CONFLICT DO UPDATE that
+    SQLAlchemy sends as multi-row VALUES pages (insertmanyvalues, driven by the
+    RETURNING), combining the stored and new aggregates with Chan's parallel
+    variance formula, so concurrent writers can't lose each other's updates.
+    Call it inside the insert's transaction, after the readings have ids.
+    """
+    summaries = []
+    now = datetime.utcnow()
+    for patient_id, readings in readings_by_patient.items():
+        summary = summarize(readings)
+        if summary["reading_count"]:
+            summaries.append({"patient_id": patient_id, "updated_at": now, **summary})
+    if not summaries:
+        return
+
+    dialect_name = db.bind.dialect.name
+    first_new_id = min(reading.id for readings in readings_by_patient.values() for reading in readings)
+    for start in range(0, len(summaries), MERGE_CHUNK_PATIENTS):
+        await _seed_from_history(
+            db, [summary["patient_id"] for summary in summaries[start:start + MERGE_CHUNK_PATIENTS]], first_new_id
+        )
+
+    await db.execute(_merge_statement(dialect_name), summaries)
+
+def _merge_statement(dialect_name: str):
+    stmt = _upsert(dialect_name)
+    table = PatientBaseline.__table__.c
+    new = stmt.excluded
+    total = table.reading_count + new.reading_count
+
+    updates = {
+        "reading_count": total,
+        "updated_at": new.updated_at
+    }
+    for vital in VITALS:
+        sum_column, m2_column = f"{vital}_sum", f"{vital}_m2"
+        delta = new[sum_column] / new.reading_count - table[sum_column] / table.reading_count
+        updates[sum_column] = table[sum_column] + new[sum_column]
+        updates[m2_column] = (
+            table[m2_column] + new[m2_column]
+            + delta * delta * table.reading_count * new.reading_count / total
+        )
+
+    return stmt.on_conflict_do_update(index_elements=["patient_id"], set_=updates).returning(table.patient_id)
+
+def _aggregate_columns(dialect_name: str):
+    """patient_baselines columns and the matching GROUP BY patient_id aggregates over patient_readings"""
+    greatest = func.greatest if dialect_name == "postgresql" else func.max
+    columns = [PatientBaseline.patient_id, PatientBaseline.reading_count, PatientBaseline.updated_at]
+    aggregates = [
+        PatientReading.patient_id,
+        func.count(PatientReading.id),
+        literal(datetime.utcnow())
+    ]
+    for vital in VITALS:
+        value = cast(getattr(PatientReading, vital), Float)
+        total = func.sum(value)
+        columns += [getattr(PatientBaseline, f"{vital}_sum"), getattr(PatientBaseline, f"{vital}_m2")]
+        # M2 = sum(x^2) - sum(x)^2 / n, clamped against rounding noise
+        aggregates += [total, greatest(func.sum(value * value) - total * total / func.count(PatientReading.id), 0.0)]
+    return columns, aggregates
+
+async def _seed_from_history(db: AsyncSession, patient_ids: List[int], before_reading_id: int):
+    """
+    Create the aggregate row for patients that don't have one yet (readings
+    stored before the upgrade, never backfilled) from their readings older than
+    before_reading_id, so the merge that follows adds to the full history
+    instead of starting over. Patients with a row are skipped by the NOT EXISTS,
+    so the history is only scanned once per patient.
+    """
+    dialect_name = db.bind.dialect.name
+    columns, aggregates = _aggregate_columns(dialect_name)
+    history = (
+        select(*aggregates)
+        .where(
+            PatientReading.patient_id.in_(patient_ids),
+            PatientReading.id < before_reading_id,
+            ~exists().where(PatientBaseline.patient_id == PatientReading.patient_id)
+        )
+        .group_by(PatientReading.patient_id)
+    )
+    # A concurrent writer may seed the same patient first; its row already covers this history
+    await db.execute(_upsert(dialect_name).from_select(columns, history).on_conflict_do_nothing())
+
+def _as_historical_average(reading_count, heart_rate_sum, temperature_sum, oxygen_saturation_sum) -> Optional[dict]:
+    if not reading_count:
+        return None
+    avg_heart_rate = heart_rate_sum / reading_count
+    if not avg_heart_rate:
+        return None
+    avg_temperature = temperature_sum / reading_count
+    avg_oxygen_saturation = oxygen_saturation_sum / reading_count
+    return {
+        "avg_heart_rate": float(avg_heart_rate),
+        "avg_temperature": float(avg_temperature) if avg_temperature else None,
+        "avg_oxygen_saturation": float(avg_oxygen_saturation) if avg_oxygen_saturation else None
+    }
+
+async def get_historical_averages(db: AsyncSession, patient_ids: List[int]) -> Dict[int, dict]:
+    """
+    Lifetime baseline averages for many patients from the aggregate table.
+    Patients without an aggregate row yet (data from before the backfill, with
+    no reading since) fall back to AVG.
+    """
+    result = await db.execute(
+        select(
+            PatientBaseline.patient_id,
+            PatientBaseline.reading_count,
+            PatientBaseline.heart_rate_sum,
+            PatientBaseline.temperature_sum,
+            PatientBaseline.oxygen_saturation_sum
+        )
+        .where(PatientBaseline.patient_id.in_(patient_ids))
+    )
+    averages = {}
+    seen = set()
+    for row in result.all():
+        seen.add(row.patient_id)
+        average = _as_historical_average(
+            row.reading_count, row.heart_rate_sum, row.temperature_sum, row.oxygen_saturation_sum
+        )
+        if average:
+            averages[row.patient_id] = average
+
+    missing = [patient_id for patient_id in patient_ids if patient_id not in seen]
+    if missing:
+        result = await db.execute(
+            select(
+                PatientReading.patient_id,
+                func.count(PatientReading.id),
+                func.sum(PatientReading.heart_rate),
+                func.sum(PatientReading.temperature),
+                func.sum(PatientReading.oxygen_saturation)
+            )
+            .where(PatientReading.patient_id.in_(missing))
+            .group_by(PatientReading.patient_id)
+        )
+        for patient_id, *aggregates in result.all():
+            average = _as_historical_average(*aggregates)
+            if average:
+                averages[patient_id] = average
+
+    return averages
+
+async def get_historical_average(db: AsyncSession, patient_id: int) -> Optional[dict]:
+    """Lifetime baseline averages for one patient, or None without readings"""
+    averages = await get_historical_averages(db, [patient_id])
+    return averages.get(patient_id)
+
+class _RunningMean:
+    """Sum-based mean over a deque of readings that supports O(1) push and pop"""
+
+    def __init__(self, maxlen: Optional[int] = None):
+        self.readings = deque()
+        self.maxlen = maxlen
+        self.sums = [0.0] * len(VITALS)
+
+    def push(self, recorded_at: datetime, values: tuple):
+        self.readings.append((recorded_at, values))
+        self.sums = [total + value for total, value in zip(self.sums, values)]
+        if self.maxlen is not None and len(self.readings) > self.maxlen:
+            self.pop()
+
+    def pop(self):
+        _, values = self.readings.popleft()
+        self.sums = [total - value for total, value in zip(self.sums, values)]
+
+    def evict_before(self, cutoff: datetime):
+        while self.readings and self.readings[0][0] < cutoff:
+            self.pop()
+
+    def means(self) -> Optional[tuple]:
+        if not self.readings:
+            return None
+        return tuple(total / len(self.readings) for total in self.sums)
+
+class _PatientWindows:
+    """Everything the non-lifetime strategies need for one patient"""
+
+    def __init__(self, window_readings: int):
+        self.last_n = _RunningMean(maxlen=window_readings)
+        self.last_hours = _RunningMean()
+        self.ewma: Optional[list] = None
+        self.ewma_at: Optional[datetime] = None
+        self.last_reading_id: Optional[int] = None
+        self.last_recorded_at: Optional[datetime] = None
+
+class RollingBaselines:
+    """
+    In-process last_n / last_hours / ewma baselines.
+    A patient's state is loaded from the database on first use (bounded queries)
+    and then updated by observe() as this process stores readings. If the latest
+    reading id a caller sees doesn't match, the state is reloaded, so readings
+    written elsewhere (another process, the importer) are never missed.
+    """
+
+    def __init__(self, window_readings: int, window_hours: float, half_life_hours: float):
+        self.window_readings = window_readings
+        self.window = timedelta(hours=window_hours)
+        self.half_life_hours = half_life_hours
+        self._patients: Dict[int, _PatientWindows] = {}
+
+    def _apply(self, state: _PatientWindows, reading_id: int, recorded_at: datetime, values: tuple):
+        state.last_n.push(recorded_at, values)
+        state.last_hours.push(recorded_at, values)
+        state.last_hours.evict_before(recorded_at - self.window)
+
+        if state.ewma is None:
+            state.ewma = list(values)
+        else:
+            elapsed_hours = max((recorded_at - state.ewma_at).total_seconds() / 3600, 0.0)
+            alpha = 1 - 0.5 ** (elapsed_hours / self.half_life_hours)
+            state.ewma = [mean + alpha * (value - mean) for mean, value in zip(state.ewma, values)]
+        state.ewma_at = recorded_at
+        state.last_reading_id = reading_id
+        state.last_recorded_at = recorded_at
+
+    def observe(self, patient_id: int, reading):
+        """Feed a stored reading into a loaded patient's windows"""
+        state = self._patients.get(patient_id)
+        if state is None:
+            return  # Loaded lazily on first read
+        if state.last_recorded_at and reading.recorded_at < state.last_recorded_at:
+            # Back-dated reading: cheaper to reload than to re-sort the windows
+            del self._patients[patient_id]
+            return
+        values = tuple(float(getattr(reading, vital)) for vital in VITALS)
+        self._apply(state, reading.id, reading.recorded_at, values)
+
+    async def _load_many(self, db: AsyncSession, patient_ids: List[int]) -> Dict[int, _PatientWindows]:
+        """
+        Load the windows for many patients in one query: each patient's last
+        window_readings readings plus everything inside the time window and
+        EWMA warm-up. The per-patient lower bound on recorded_at (the older of
+        the window_readings-th newest reading and the cutoff) comes from an
+        index seek, so the reads follow the windows, not the patient's history.
+        """
+        warmup = max(self.window, timedelta(hours=self.half_life_hours * EWMA_WARMUP_HALF_LIVES))
+        cutoff = datetime.utcnow() - warmup
+
+        older = aliased(PatientReading)
+        nth_newest = (
+            select(older.recorded_at)
+            .where(older.patient_id == Patient.id)
+            .order_by(older.recorded_at.desc(), older.id.desc())
+            .offset(self.window_readings - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        bounds = select(Patient.id.label("patient_id"), nth_newest.label("nth_newest")).where(Patient.id.in_(patient_ids)).subquery()
+        since = case(
+            # Fewer than window_readings readings: all of them
+            (bounds.c.nth_newest.is_(None), literal(datetime.min, DateTime)),
+            (bounds.c.nth_newest < cutoff, bounds.c.nth_newest),
+            else_=literal(cutoff, DateTime)
+        )
+        result = await db.execute(
+            select(
+                PatientReading.patient_id,
+                PatientReading.id,
+                PatientReading.recorded_at,
+                PatientReading.heart_rate,
+                PatientReading.temperature,
+                PatientReading.oxygen_saturation
+            )
+            .join(bounds, and_(PatientReading.patient_id == bounds.c.patient_id, PatientReading.recorded_at >= since))
+            .order_by(PatientReading.patient_id, PatientReading.recorded_at, PatientReading.id)
+        )
+
+        states = {patient_id: _PatientWindows(self.window_readings) for patient_id in patient_ids}
+        for row in result.all():
+            values = (float(row.heart_rate), float(row.temperature), float(row.oxygen_saturation))
+            self._apply(states[row.patient_id], row.id, row.recorded_at, values)
+        self._patients.update(states)
+        return states
+
+    async def get(self, db: AsyncSession, patient_id: int, strategy: str, latest_reading_id: Optional[int]) -> Optional[dict]:
+        return (await self.get_many(db, {patient_id: latest_reading_id}, strategy))[patient_id]
+
+    async def get_many(self, db: AsyncSession, latest_reading_ids: Dict[int, Optional[int]], strategy: str) -> Dict[int, Optional[dict]]:
+        """Baselines for many patients; every missing or stale patient is loaded in the same query"""
+        stale = [
+            patient_id for patient_id, latest_reading_id in latest_reading_ids.items()
+            if patient_id not in self._patients or self._patients[patient_id].last_reading_id != latest_reading_id
+        ]
+        if stale:
+            await self._load_many(db, stale)
+        return {patient_id: self._means(self._patients[patient_id], strategy) for patient_id in latest_reading_ids}
+
+    def _means(self, state: _PatientWindows, strategy: str) -> Optional[dict]:
+        if strategy == "last_n":
+            means = state.last_n.means()
+        elif strategy == "last_hours":
+            state.last_hours.evict_before(datetime.utcnow() - self.window)
+            means = state.last_hours.means()
+        elif strategy == "ewma":
+            means = tuple(state.ewma) if state.ewma is not None else None
+        else:
+            raise ValueError(f"Unknown baseline strategy: {strategy}")
+
+        if means is None:
+            return None
+        return _as_historical_average(1, *means)
+
+rolling_baselines = RollingBaselines(
+    BASELINE_WINDOW_READINGS,
+    BASELINE_WINDOW_HOURS,
+    BASELINE_EWMA_HALF_LIFE_HOURS
+)
+
+async def get_baseline(db: AsyncSession, patient_id: int, strategy: str = "lifetime", latest_reading_id: Optional[int] = None) -> Optional[dict]:
+    """Baseline for one patient using the requested strategy"""
+    if strategy == "lifetime":
+        return await get_historical_average(db, patient_id)
+    return await rolling_baselines.get(db, patient_id, strategy, latest_reading_id)
+
+async def get_baselines(db: AsyncSession, latest_reading_ids: Dict[int, Optional[int]], strategy: str = "lifetime") -> Dict[int, Optional[dict]]:
+    """Baselines for many patients (patient id -> latest reading id) with set-based loading"""
+    if strategy == "lifetime":
+        averages = await get_historical_averages(db, list(latest_reading_ids))
+        return {patient_id: averages.get(patient_id) for patient_id in latest_reading_ids}
+    return await rolling_baselines.get_many(db, latest_reading_ids, strategy)
+
+async def backfill(db: AsyncSession) -> int:
+    """
+    Recompute every aggregate row from patient_readings with one
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE. Rows are overwritten in place
+    rather than deleted and reinserted, so writers merging into them meanwhile
+    never hit a missing row or a duplicate key.
+    """
+    dialect_name = db.bind.dialect.name
+    columns, aggregates = _aggregate_columns(dialect_name)
+    # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT
+    stmt = _upsert(dialect_name).from_select(
+        columns,
+        select(*aggregates).where(true()).group_by(PatientReading.patient_id)
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["patient_id"],
+        set_={column.key: stmt.excluded[column.key] for column in columns[1:]}
+    ))
+    # Patient summaries show the aggregates
+    await bump_data_versions(db, generation=True)
+    await db.commit()
+
+    result = await db.execute(select(func.count()).select_from(PatientBaseline))
+    return result.scalar()
+
+async def _main(args):
+    from .database import AsyncSessionLocal, create_tables
+
+    await create_tables()
+    async with AsyncSessionLocal() as db:
+        if args.command == "backfill":
+            rebuilt = await backfill(db)
+            print(f"Rebuilt baselines for {rebuilt} patients")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain per-patient baseline aggregates")
+    parser.add_argument("command", choices=["backfill"])
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import select, func
+
+from .database import AsyncSessionLocal
+from .models import Patient, PatientReading, Prediction
+from . import metrics, predictor
+from .predictor import calculate_risk, calculate_risks_rule_based
+from .baselines import get_baselines
+from .conditional import bump_data_versions, changes
+
+# Upper bound on concurrent inference calls for one batch request
+BATCH_CONCURRENCY = int(os.getenv("PREDICTION_BATCH_CONCURRENCY", "8"))
+
+async def fetch_latest_readings(db, patient_ids: List[int]) -> dict:
+    """Latest reading per patient for all ids in one windowed query"""
+    ranked = (
+        select(
+            PatientReading,
+            func.row_number().over(
+                partition_by=PatientReading.patient_id,
+                order_by=(PatientReading.recorded_at.desc(), PatientReading.id.desc())
+            ).label("rn")
+        )
+        .where(PatientReading.patient_id.in_(patient_ids))
+        .subquery()
+    )
+    result = await db.execute(select(ranked).where(ranked.c.rn == 1))
+    return {row.patient_id: row for row in result.all()}
+
+def _line(payload: dict) -> str:
+    return json.dumps(payload, default=str) + "\n"
+
+async def stream_batch_predictions(patient_ids: List[int], baseline: str = "lifetime"):
+    """
+    Generate predictions for many patients and yield NDJSON lines as each one finishes.
+
+    Lines are {"patient_id", "status": "ok", "prediction"} or {"patient_id", "status": "error", "detail"}.
+    All Prediction rows are written in one transaction at the end, and a final
+    {"status": "complete", "prediction_ids"} line maps patient ids to the stored rows.
+    """
+    patient_ids = list(dict.fromkeys(patient_ids))
+
+    async with AsyncSessionLocal() as db:
+        try:
+            known_result = await db.execute(select(Patient.id).where(Patient.id.in_(patient_ids)))
+            known_ids = set(known_result.scalars().all())
+            latest_readings = await fetch_latest_readings(db, patient_ids)
+            averages = await get_baselines(
+                db, {patient_id: reading.id for patient_id, reading in latest_readings.items()}, baseline
+            )
+        except Exception as e:
+            yield _line({"status": "error", "detail": f"Error loading batch: {str(e)}"})
+            return
+
+        # Without an inference key every prediction is rule-based: score them all in one vectorized pass
+        offline = {}
+        if not predictor.HF_API_KEY:
+            scorable = [patient_id for patient_id in latest_readings if patient_id in known_ids]
+            offline = dict(zip(scorable, calculate_risks_rule_based([
+                {
+                    "heart_rate": latest_readings[patient_id].heart_rate,
+                    "blood_pressure": latest_readings[patient_id].blood_pressure,
+                    "temperature": latest_readings[patient_id].temperature,
+                    "oxygen_saturation": latest_readings[patient_id].oxygen_saturation,
+                    "historical_average": averages.get(patient_id),
+                    "systolic_bp": latest_readings[patient_id].systolic_bp
+                }
+                for patient_id in scorable
+            ])))
+            if scorable:
+                metrics.risk_rule_fallbacks.inc(len(scorable), reason="no_api_key")
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def predict(patient_id: int) -> dict:
+            if patient_id not in known_ids:
+                return {"patient_id": patient_id, "status": "error", "detail": "Patient not found"}
+            reading = latest_readings.get(patient_id)
+            if reading is None:
+                return {"patient_id": patient_id, "status": "error", "detail": "No vital signs data available for this patient"}
+            if patient_id in offline:
+                return {"patient_id": patient_id, "status": "ok", "prediction": offline[patient_id]}
+
+            try:
+                async with semaphore:
+                    prediction_data = await calculate_risk(
+                        heart_rate=reading.heart_rate,
+                        blood_pressure=reading.blood_pressure,
+                        temperature=reading.temperature,
+                        oxygen_saturation=reading.oxygen_saturation,
+                        historical_average=averages.get(patient_id),
+                        systolic_bp=reading.systolic_bp
+                    )
+            except Exception as e:
+                # One failed patient must not end the stream for the rest
+                return {"patient_id": patient_id, "status": "error", "detail": f"Error generating prediction: {str(e)}"}
+            return {"patient_id": patient_id, "status": "ok", "prediction": prediction_data}
+
+        predictions = []
+        tasks = [asyncio.ensure_future(predict(patient_id)) for patient_id in patient_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                if item["status"] == "ok":
+                    prediction_data = item["prediction"]
+                    predictions.append(Prediction(
+                        patient_id=item["patient_id"],
+                        risk_score=prediction_data["risk_score"],
+                        risk_level=prediction_data["risk_level"],
+                        recommendation=prediction_data["recommendation"],
+                        created_at=datetime.utcnow()
+                    ))
+                yield _line(item)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Single transaction for every prediction in the batch
+        try:
+            db.add_all(predictions)
+            await bump_data_versions(db, [prediction.patient_id for prediction in predictions], triage=False)
+            await db.commit()
+            for prediction in predictions:
+                changes.bump(prediction.patient_id, triage=False)
+        except Exception as e:
+            await db.rollback()
+            yield _line({"status": "error", "detail": f"Error saving predictions: {str(e)}"})
+            return
+
+        yield _line({
+            "status": "complete",
+            "saved": len(predictions),
+            "prediction_ids": {prediction.patient_id: prediction.id for prediction in predictions}
+        })
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Set
+
+class MicroBatcher:
+    """
+    Collects submitted items for up to `window` seconds (or until `max_batch`
+    items are waiting) and hands them to `handler` as one list.
+
+    The handler returns one result per item, in order. A result that is an
+    Exception is raised to that item's caller only; if the handler itself
+    raises, every caller in the batch gets the error, and if the flush is
+    cancelled every caller gets a RuntimeError.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]], window: float, max_batch: int):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[tuple] = []
+        self._timer = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[tuple]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+        except Exception as exc:
+            results = [exc] * len(batch)
+        except BaseException:
+            # Flush task cancelled (e.g. at shutdown): fail the callers instead of leaving them waiting
+            self._resolve(batch, [RuntimeError("micro-batch cancelled")] * len(batch))
+            raise
+
+        self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch: List[tuple], results: List[Any]):
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller went away
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": round(self.window * 1000, 1),
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
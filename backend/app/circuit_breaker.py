@@ -0,0 +1,109 @@
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    CLOSED: calls go through; errors and calls slower than slow_call_threshold
+    count as failures, and failure_threshold in a row opens the circuit.
+    OPEN: calls are rejected immediately until reset_timeout has passed.
+    HALF_OPEN: up to half_open_max_calls probes go through; one success closes
+    the circuit, one failure opens it again.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_threshold: float = 5.0,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock=time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Monitoring counters
+        self.total_successes = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        self.total_rejected += 1
+        return False
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_threshold:
+            self.record_failure()
+            return
+        self.total_successes += 1
+        self._consecutive_failures = 0
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._half_open_in_flight = 0
+
+    def record_failure(self):
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was cancelled before it finished"""
+        if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._half_open_in_flight = 0
+        self.times_opened += 1
+
+    def snapshot(self) -> dict:
+        state = self.state
+        retry_in = None
+        if state == self.OPEN:
+            retry_in = round(max(self.reset_timeout - (self._clock() - self._opened_at), 0.0), 3)
+        return {
+            "name": self.name,
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "slow_call_threshold": self.slow_call_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_in": retry_in,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "times_opened": self.times_opened
+        }
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import upsert
+from .fastjson import dumps
+from .models import DataVersion
+
+load_dotenv()
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+# How long a data version read from the database is trusted before it is read again
+DATA_VERSION_TTL_SECONDS = float(os.getenv("DATA_VERSION_TTL_SECONDS", "1"))
+
+GLOBAL_SCOPE = "global"
+# Bumped by bulk rewrites (migrations, baseline backfill); part of every scope's version
+GENERATION_SCOPE = "generation"
+
+def _scope_key(scope) -> str:
+    """data_versions.scope for a patient id, GLOBAL_SCOPE or GENERATION_SCOPE"""
+    return scope if isinstance(scope, str) else f"patient:{scope}"
+
+async def bump_data_versions(db: AsyncSession, patient_ids: Iterable[int] = (), triage: bool = True, generation: bool = False):
+    """
+    Bump the data_versions rows of the patients' scopes (plus the global one when
+    cross-patient views are affected, or the generation for bulk rewrites) inside
+    the caller's transaction, so the change commits or rolls back with the data.
+    Any process can write; every process sees the new versions.
+    """
+    scopes = sorted({_scope_key(patient_id) for patient_id in patient_ids})
+    if triage and scopes:
+        scopes.append(GLOBAL_SCOPE)
+    if generation:
+        scopes.append(GENERATION_SCOPE)
+    if not scopes:
+        return
+
+    stmt = upsert(DataVersion.__table__, db.bind.dialect.name)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": DataVersion.__table__.c.version + 1}
+    )
+    # Sorted, so concurrent writers lock the rows in the same order
+    await db.execute(stmt, [{"scope": scope, "version": 1} for scope in scopes])
+
+class ChangeTracker:
+    """
+    Versions of the cached scopes: one per patient, a global one for views across
+    patients (triage) and a generation that bulk rewrites bump. They live in the
+    data_versions table and writers bump them in their own transaction (see
+    bump_data_versions), so writes by any process, including other workers and
+    the importer, change them.
+
+    Versions read from the database are reused for ttl seconds, so a conditional
+    GET usually answers without a query. bump() runs after this process commits
+    a write: it forgets the scope's version and drops its cached bodies, so local
+    writes show up at once and writes elsewhere within the ttl. The epoch is new
+    on every start, so ETags from a previous process never match.
+    """
+
+    def __init__(self, ttl: float = DATA_VERSION_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._versions: "OrderedDict[Any, Tuple[str, float]]" = OrderedDict()
+        self._listeners = []
+
+        self.reads = 0
+
+    def on_change(self, listener: Callable[[Optional[Any]], None]):
+        """listener(scope) runs on every bump; scope None means everything changed"""
+        self._listeners.append(listener)
+
+    async def version(self, db: AsyncSession, scope) -> str:
+        """'<generation>.<scope version>', from the database at most once per ttl"""
+        cached = self._versions.get(scope)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+
+        result = await db.execute(
+            select(DataVersion.scope, DataVersion.version)
+            .where(DataVersion.scope.in_([GENERATION_SCOPE, _scope_key(scope)]))
+        )
+        versions = dict(result.all())
+        self.reads += 1
+        version = f"{versions.get(GENERATION_SCOPE, 0)}.{versions.get(_scope_key(scope), 0)}"
+
+        self._versions[scope] = (version, now)
+        self._versions.move_to_end(scope)
+        while len(self._versions) > self.max_entries:
+            self._versions.popitem(last=False)
+        return version
+
+    def bump(self, patient_id: int, triage: bool = True):
+        """This process committed a change to a patient; triage=False when cross-patient views are unaffected"""
+        self._versions.pop(patient_id, None)
+        self._notify(patient_id)
+        if triage:
+            self._versions.pop(GLOBAL_SCOPE, None)
+            self._notify(GLOBAL_SCOPE)
+
+    def bump_all(self):
+        """This process committed a bulk change; every scope is read again"""
+        self._versions.clear()
+        self._notify(None)
+
+    def _notify(self, scope):
+        for listener in self._listeners:
+            listener(scope)
+
+    def etag(self, key: str, version: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return f'"{self.epoch}.{version}.{digest}"'
+
+    def stats(self) -> dict:
+        return {
+            "versions": len(self._versions),
+            "ttl_seconds": self.ttl,
+            "reads": self.reads
+        }
+
+class ResponseCache:
+    """LRU of serialized response bodies, grouped by scope so a write can drop its scope"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._scopes: Dict[Any, Set[str]] = defaultdict(set)
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != etag:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, scope, key: str, etag: str, body: bytes):
+        self._entries[key] = (etag, body, scope)
+        self._entries.move_to_end(key)
+        self._scopes[scope].add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, (_, _, old_scope) = self._entries.popitem(last=False)
+            self._scopes[old_scope].discard(old_key)
+
+    def invalidate(self, scope):
+        if scope is None:
+            self._entries.clear()
+            self._scopes.clear()
+            return
+        for key in self._scopes.pop(scope, ()):
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
+
+changes = ChangeTracker()
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+changes.on_change(response_cache.invalidate)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+async def conditional_response(
+    request: Request,
+    db: Optional[AsyncSession],
+    scope,
+    response_model,
+    build: Callable[[], Awaitable[Any]],
+    version: Optional[str] = None
+) -> Response:
+    """
+    Serve a GET from its version: 304 if the client's ETag is current, the cached
+    body if this process already rendered it, otherwise build and cache it.
+    scope is a patient id, or GLOBAL_SCOPE for cross-patient views; its version
+    comes from the database at most once per DATA_VERSION_TTL_SECONDS, unless
+    the caller passes the version of an in-memory source. With response_model None, build returns plain data for the fast read path and
+    it is encoded with orjson instead of pydantic.
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    if version is None:
+        version = await changes.version(db, scope)
+    etag = changes.etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, etag)
+    if body is None:
+        content = await build()
+        if response_model is None:
+            body = dumps(content)
+        else:
+            adapter = _adapters.get(response_model)
+            if adapter is None:
+                adapter = _adapters[response_model] = TypeAdapter(response_model)
+            body = adapter.dump_json(content)
+        response_cache.set(scope, key, etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
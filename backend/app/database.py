@@ -1,22 +1,140 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
 import os
 from dotenv import load_dotenv
 
+from .metrics import instrument_engine
+
 load_dotenv()
 
 # Database URL - defaults to SQLite for local development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./healthcare.db")
 
+# Engine profile: auto picks sqlite or postgres from the URL; plain keeps driver defaults
+DB_PROFILE = os.getenv("DB_PROFILE", "auto")
+
+# sqlite profile
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+# A small fixed pool: writers queue for a connection in-process instead of spinning on the file lock
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "5"))
+
+# postgres profile: connections are budgeted across uvicorn/gunicorn workers
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "40"))
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))  # 0 behind pgbouncer
+
+# Backends with INSERT ... ON CONFLICT, which the baseline aggregates rely on
+SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+
 class Base(DeclarativeBase):
     pass
 
+def _resolve_profile(url) -> str:
+    backend = "postgres" if url.get_backend_name() == "postgresql" else url.get_backend_name()
+    profile = backend if DB_PROFILE == "auto" else DB_PROFILE
+    if profile not in ("sqlite", "postgres", "plain"):
+        raise ValueError(f"Unknown DB_PROFILE '{DB_PROFILE}' (expected auto, sqlite, postgres or plain)")
+    if profile != "plain" and profile != backend:
+        raise ValueError(f"DB_PROFILE '{profile}' doesn't match the {backend} DATABASE_URL")
+    return profile
+
+def _engine_options(url, profile: str) -> tuple:
+    """(url, create_async_engine keyword arguments, settings to report) for a profile"""
+    if profile == "sqlite":
+        settings = {
+            "journal_mode": SQLITE_JOURNAL_MODE,
+            "synchronous": SQLITE_SYNCHRONOUS,
+            "cache_size_kb": SQLITE_CACHE_SIZE_KB,
+            "mmap_size_mb": SQLITE_MMAP_SIZE_MB,
+            "busy_timeout_ms": SQLITE_BUSY_TIMEOUT_MS,
+            "pool_size": SQLITE_POOL_SIZE
+        }
+        # The driver-level timeout is the busy timeout for sqlite3.connect. aiosqlite
+        # defaults to NullPool (a new connection and thread per session) for files.
+        options = {
+            "connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": SQLITE_POOL_SIZE,
+            "max_overflow": 0
+        }
+        return url, options, settings
+    
+    if profile == "postgres":
+        per_worker = max(DB_MAX_CONNECTIONS // max(WEB_CONCURRENCY, 1), 2)
+        pool_size = int(DB_POOL_SIZE) if DB_POOL_SIZE else min(10, max(per_worker // 2, 1))
+        max_overflow = int(DB_MAX_OVERFLOW) if DB_MAX_OVERFLOW else max(per_worker - pool_size, 0)
+        options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True
+        }
+        settings = {
+            "workers": WEB_CONCURRENCY,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_pre_ping": True,
+            "pool_recycle": DB_POOL_RECYCLE
+        }
+        if url.get_driver_name() == "asyncpg":
+            # SQLAlchemy's prepared statement cache and asyncpg's own
+            url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+            options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+            settings["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+        return url, options, settings
+    
+    return url, {}, {}
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+_url = make_url(DATABASE_URL)
+ENGINE_PROFILE = _resolve_profile(_url)
+_url, _options, ENGINE_SETTINGS = _engine_options(_url, ENGINE_PROFILE)
+
 # Create async engine
 engine = create_async_engine(
-    DATABASE_URL,
+    _url,
     echo=True if os.getenv("DEBUG") == "true" else False,
+    **_options
 )
 
+if ENGINE_PROFILE == "sqlite":
+    event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+# Statement counts and timings for GET /metrics
+instrument_engine(engine)
+
+async def describe_engine() -> str:
+    """One line with the profile and the settings the database actually reports"""
+    settings = dict(ENGINE_SETTINGS)
+    if ENGINE_PROFILE == "sqlite":
+        async with engine.connect() as conn:
+            settings["journal_mode"] = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            settings["synchronous"] = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            settings["busy_timeout_ms"] = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+    details = " ".join(f"{key}={value}" for key, value in settings.items())
+    return f"profile={ENGINE_PROFILE} backend={_url.get_backend_name()} {details}".strip()
+
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
     engine, 
@@ -24,6 +142,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+def upsert(table, dialect_name: str):
+    """INSERT ... ON CONFLICT builder for one of SUPPORTED_DIALECTS (checked by create_tables)"""
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
 async def get_db():
     """Dependency to get database session"""
     async with AsyncSessionLocal() as session:
@@ -32,7 +156,33 @@ async def get_db():
         finally:
             await session.close()
 
+def _add_missing_columns(sync_conn):
+    # create_all never alters existing tables; nullable columns added later are appended here
+    existing_tables = set(inspect(sync_conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspect(sync_conn).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            print(f"Added column {table.name}.{column.name}")
+
+def _create_missing_indexes(sync_conn):
+    # create_all skips tables that already exist, so indexes added later need their own pass
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 async def create_tables():
     """Create all tables"""
+    if engine.dialect.name not in SUPPORTED_DIALECTS:
+        raise RuntimeError(
+            f"Unsupported database backend '{engine.dialect.name}' (expected one of {', '.join(SUPPORTED_DIALECTS)})"
+        )
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
\ No newline at end of file
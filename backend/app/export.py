@@ -0,0 +1,210 @@
+"""
+Columnar export of readings and predictions for analytics.
+
+    GET /api/v1/export/readings?format=parquet&patient_id=3&from=2024-01-01T00:00:00
+    python -m app.export readings -o readings.parquet --from 2024-01-01
+
+Rows are read through a server-side cursor (AsyncSession.stream with
+yield_per) and written one Arrow record batch at a time, so memory stays flat
+however many rows match. Two formats:
+- arrow:   Arrow IPC stream (pyarrow.ipc.open_stream, polars.read_ipc_stream)
+- parquet: Parquet with one row group per batch, zstd compressed
+
+pyarrow is imported on first use, so the API starts without it and only the
+export endpoints fail if it is missing.
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from .models import PatientReading, Prediction
+
+load_dotenv()
+
+# Rows per Arrow record batch (and per Parquet row group)
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "10000"))
+
+EXPORT_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+EXPORT_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+# Columns written for each export, and the column the time range applies to
+EXPORTS = {
+    "readings": (
+        (
+            PatientReading.id,
+            PatientReading.patient_id,
+            PatientReading.recorded_at,
+            PatientReading.blood_pressure,
+            PatientReading.systolic_bp,
+            PatientReading.diastolic_bp,
+            PatientReading.heart_rate,
+            PatientReading.temperature,
+            PatientReading.oxygen_saturation
+        ),
+        PatientReading.recorded_at
+    ),
+    "predictions": (
+        (
+            Prediction.id,
+            Prediction.patient_id,
+            Prediction.created_at,
+            Prediction.risk_score,
+            Prediction.risk_level,
+            Prediction.recommendation
+        ),
+        Prediction.created_at
+    )
+}
+
+class ExportUnavailable(RuntimeError):
+    """pyarrow isn't installed"""
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ExportUnavailable("Export needs pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _arrow_type(pa, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pa.timestamp("us")
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    return pa.string()
+
+def export_schema(kind: str):
+    pa = require_pyarrow()
+    columns, _ = EXPORTS[kind]
+    return pa.schema([(column.key, _arrow_type(pa, column)) for column in columns])
+
+def export_query(kind: str, patient_ids: Optional[List[int]] = None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Rows in patient order, then time order; start is inclusive, end exclusive"""
+    columns, time_column = EXPORTS[kind]
+    table = time_column.class_
+    query = select(*columns)
+    if patient_ids:
+        query = query.where(table.patient_id.in_(patient_ids))
+    if start is not None:
+        query = query.where(time_column >= start)
+    if end is not None:
+        query = query.where(time_column < end)
+    return query.order_by(table.patient_id, time_column, table.id)
+
+class _ChunkSink(io.RawIOBase):
+    """File-like target for the Arrow writers; drain() hands over what was written so far"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _open_writer(pa, file_format: str, sink, schema):
+    if file_format == "parquet":
+        return pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+async def stream_export(
+    kind: str,
+    file_format: str = "arrow",
+    patient_ids: Optional[List[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_rows: int = EXPORT_BATCH_ROWS
+) -> AsyncIterator[bytes]:
+    """Yield the export file in pieces, one piece per record batch"""
+    from .database import AsyncSessionLocal
+
+    pa = require_pyarrow()
+    schema = export_schema(kind)
+    sink = _ChunkSink()
+    writer = _open_writer(pa, file_format, sink, schema)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            export_query(kind, patient_ids, start, end).execution_options(yield_per=batch_rows)
+        )
+        async for rows in result.partitions():
+            columns = zip(*rows)
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+
+    # Footer (Parquet) or end-of-stream marker (Arrow); an empty export is still a valid file
+    writer.close()
+    yield sink.drain()
+
+def detect_format(path: str) -> str:
+    return "parquet" if path.lower().endswith(".parquet") else "arrow"
+
+async def _main(args):
+    from .database import create_tables
+
+    await create_tables()
+    file_format = args.format or detect_format(args.output)
+    started = time.monotonic()
+    written = 0
+    try:
+        with open(args.output, "wb") as handle:
+            async for data in stream_export(
+                args.kind,
+                file_format,
+                patient_ids=args.patient_id,
+                start=args.start,
+                end=args.end,
+                batch_rows=args.batch_rows
+            ):
+                handle.write(data)
+                written += len(data)
+    except ExportUnavailable as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {written} bytes of {file_format} to {args.output} in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export readings or predictions as Arrow IPC or Parquet")
+    parser.add_argument("kind", choices=sorted(EXPORTS))
+    parser.add_argument("-o", "--output", required=True, help="Output file; .parquet selects Parquet, anything else Arrow IPC")
+    parser.add_argument("--format", choices=sorted(EXPORT_MEDIA_TYPES), help="Overrides the output extension")
+    parser.add_argument("--patient-id", type=int, action="append", help="Repeat for several patients (default: all)")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, help="Inclusive lower bound, ISO 8601")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, help="Exclusive upper bound, ISO 8601")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS, help="Rows per record batch")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+Fast read path for the large GET endpoints (patient detail, patient list, triage).
+
+These endpoints select plain column tuples instead of ORM entities and encode
+them straight to JSON with orjson. The rows come from our own tables and were
+validated on the way in, so they aren't run through pydantic again. Column
+order follows the response schemas, so the JSON is the same as the pydantic
+path produces; the endpoints keep their response_model for the OpenAPI docs.
+"""
+from typing import Any, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import null
+
+from .models import Patient, PatientReading, Prediction
+
+# Same field order as schemas.Patient, schemas.PatientReading and schemas.Prediction
+PATIENT_COLUMNS = (
+    Patient.name,
+    Patient.age,
+    Patient.medical_record_number,
+    Patient.id,
+    Patient.created_at
+)
+READING_COLUMNS = (
+    PatientReading.blood_pressure,
+    PatientReading.heart_rate,
+    PatientReading.temperature,
+    PatientReading.oxygen_saturation,
+    PatientReading.id,
+    PatientReading.patient_id,
+    PatientReading.recorded_at,
+    PatientReading.systolic_bp,
+    PatientReading.diastolic_bp
+)
+PREDICTION_COLUMNS = (
+    Prediction.risk_score,
+    Prediction.risk_level,
+    Prediction.recommendation,
+    # Not stored; the schema always returns it as null
+    null().label("baseline_analysis"),
+    Prediction.id,
+    Prediction.patient_id,
+    Prediction.created_at
+)
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+def as_dicts(rows: Iterable[Sequence], columns: Sequence) -> List[dict]:
+    """Column tuples as dicts keyed by column name"""
+    names = tuple(column.key for column in columns)
+    return [dict(zip(names, row)) for row in rows]
+
+def as_dict(row: Optional[Sequence], columns: Sequence) -> Optional[dict]:
+    if row is None:
+        return None
+    return dict(zip((column.key for column in columns), row))
+
+def _default(value: Any):
+    # Flat models built with model_construct, such as TriageScore
+    if isinstance(value, BaseModel):
+        return dict(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes flat pydantic models and writes UTC as Z, like pydantic"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
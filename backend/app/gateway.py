@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+load_dotenv()
+
+# Connection pool tuning for the inference endpoint
+HF_MAX_CONNECTIONS = int(os.getenv("HF_MAX_CONNECTIONS", "20"))
+HF_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HF_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HF_KEEPALIVE_EXPIRY = float(os.getenv("HF_KEEPALIVE_EXPIRY", "30.0"))
+HF_CONNECT_TIMEOUT = float(os.getenv("HF_CONNECT_TIMEOUT", "3.0"))
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "10.0"))
+
+# Circuit breaker around the inference endpoint
+HF_BREAKER_FAILURE_THRESHOLD = int(os.getenv("HF_BREAKER_FAILURE_THRESHOLD", "5"))
+HF_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("HF_BREAKER_SLOW_CALL_SECONDS", "5.0"))
+HF_BREAKER_RESET_SECONDS = float(os.getenv("HF_BREAKER_RESET_SECONDS", "30.0"))
+HF_BREAKER_HALF_OPEN_CALLS = int(os.getenv("HF_BREAKER_HALF_OPEN_CALLS", "1"))
+
+class InferenceGateway:
+    """
+    Owns one pooled httpx.AsyncClient for the lifetime of the app, so LLM calls
+    reuse keep-alive connections instead of paying a TCP/TLS handshake each time.
+    Started and closed from the FastAPI lifespan; used lazily outside of it (scripts, tests).
+
+    Every call goes through a circuit breaker: while the endpoint is failing or
+    slow, post() raises CircuitOpenError immediately so callers can fall back to
+    the rule-based path without waiting for a timeout.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(
+            "huggingface",
+            failure_threshold=HF_BREAKER_FAILURE_THRESHOLD,
+            slow_call_threshold=HF_BREAKER_SLOW_CALL_SECONDS,
+            reset_timeout=HF_BREAKER_RESET_SECONDS,
+            half_open_max_calls=HF_BREAKER_HALF_OPEN_CALLS
+        )
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HF_MAX_CONNECTIONS,
+                max_keepalive_connections=HF_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HF_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(HF_TIMEOUT, connect=HF_CONNECT_TIMEOUT)
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    async def post(self, url: str, payload: dict, headers: dict = None, timeout: float = None) -> httpx.Response:
+        """POST a JSON payload over the shared pool; timeout overrides the read timeout for this call"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+
+        request_timeout = httpx.Timeout(timeout, connect=HF_CONNECT_TIMEOUT) if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        started = time.monotonic()
+        try:
+            response = await self.client.post(url, headers=headers, json=payload, timeout=request_timeout)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        # Rate limiting and server errors mean the endpoint is unhealthy; 4xx client errors don't
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(time.monotonic() - started)
+        return response
+
+gateway = InferenceGateway()
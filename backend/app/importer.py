@@ -0,0 +1,274 @@
+"""
+Streaming import of historical vitals from CSV or NDJSON.
+
+    python -m app.importer readings.csv
+    python -m app.importer ward7.ndjson.gz --chunk-size 5000 --resume
+
+Each record needs the patient's MRN (medical_record_number or mrn), a
+recorded_at timestamp and the four vitals (blood_pressure, heart_rate,
+temperature, oxygen_saturation). Files are read lazily through a generator
+pipeline, so memory stays flat however large the input is:
+
+    read -> validate -> resolve MRN -> chunk -> insert + checkpoint + commit
+
+Each chunk advances a checkpoint row (import_checkpoints, keyed by the input
+file) in the same transaction as its readings, so a crash can't leave
+records committed but not checkpointed, and --resume skips exactly the
+records already stored. After the last chunk the lifetime baseline
+aggregates are rebuilt.
+
+A running API needs no restart: each chunk bumps the data versions of its
+patients, which ETags and cached responses follow, the triage index applies
+(or, after a large import, rebuilds from) new readings in its background
+sync, and rolling baselines reload on the next request that sees a newer
+reading.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from pydantic import AliasChoices, Field, ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Patient, ImportCheckpoint, split_blood_pressure
+from .schemas import MetricsBase
+from .ingest import insert_readings, rule_verdict, first_error
+from .baselines import backfill
+from .conditional import bump_data_versions
+
+IMPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+
+class ImportRecord(MetricsBase):
+    medical_record_number: str = Field(
+        ..., min_length=1, max_length=50,
+        validation_alias=AliasChoices("medical_record_number", "mrn")
+    )
+    recorded_at: datetime
+
+def detect_format(path: str) -> str:
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError(f"Can't tell the format of {path}; pass --format csv|ndjson")
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, "r", newline="", encoding="utf-8")
+
+def read_records(path: str, file_format: str) -> Iterator[dict]:
+    """Yield raw records one at a time; NDJSON lines that aren't objects yield an error marker"""
+    with _open_text(path) as handle:
+        if file_format == "csv":
+            for record in csv.DictReader(handle):
+                yield {key: value for key, value in record.items() if value != ""}
+            return
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = {"__error__": f"Invalid JSON: {e.msg}"}
+            yield record if isinstance(record, dict) else {"__error__": "Expected a JSON object"}
+
+def validate_records(records: Iterable[dict], start: int = 1) -> Iterator[Tuple[int, Optional[ImportRecord], Optional[str]]]:
+    """(record number, parsed record or None, error or None), numbered from start"""
+    for number, raw in enumerate(records, start=start):
+        if "__error__" in raw:
+            yield number, None, raw["__error__"]
+            continue
+        try:
+            yield number, ImportRecord.model_validate(raw), None
+        except ValidationError as e:
+            yield number, None, first_error(e)
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class PatientLookup:
+    """MRN -> patient id, resolving only MRNs it hasn't seen before (one IN query per chunk)"""
+
+    def __init__(self):
+        self._ids: Dict[str, Optional[int]] = {}
+
+    async def resolve(self, db: AsyncSession, mrns: Iterable[str]) -> Dict[str, Optional[int]]:
+        unseen = {mrn for mrn in mrns if mrn not in self._ids}
+        if unseen:
+            result = await db.execute(
+                select(Patient.medical_record_number, Patient.id)
+                .where(Patient.medical_record_number.in_(unseen))
+            )
+            found = dict(result.all())
+            for mrn in unseen:
+                self._ids[mrn] = found.get(mrn)
+        return self._ids
+
+class Checkpoint:
+    """How many input records are committed, keyed to the input file's path and size"""
+
+    def __init__(self, source: str):
+        self.source = os.path.abspath(source)
+        self.size = os.path.getsize(source)
+
+    async def load(self, db: AsyncSession) -> Optional[ImportCheckpoint]:
+        state = await db.get(ImportCheckpoint, self.source)
+        if state is not None and state.size != self.size:
+            raise ValueError(f"The checkpoint for {self.source} was taken when the file had a different size")
+        return state
+
+    async def save(self, db: AsyncSession, records_done: int, stats: dict):
+        """Stage the checkpoint in the current transaction; it commits with the chunk"""
+        await db.merge(ImportCheckpoint(
+            source=self.source,
+            size=self.size,
+            records_done=records_done,
+            imported=stats["imported"],
+            invalid=stats["invalid"],
+            unknown_patient=stats["unknown_patient"],
+            updated_at=datetime.utcnow()
+        ))
+
+    async def clear(self, db: AsyncSession):
+        state = await db.get(ImportCheckpoint, self.source)
+        if state is not None:
+            await db.delete(state)
+        await db.commit()
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+async def import_readings(
+    db: AsyncSession,
+    path: str,
+    file_format: str = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    resume: bool = False,
+    restart: bool = False
+) -> dict:
+    """
+    Stream readings from path into patient_readings in chunk_size transactions.
+    A checkpoint left by an interrupted run must be resumed, or discarded with
+    restart (records it covers are then imported again).
+    Returns counts of imported and skipped records.
+    """
+    file_format = file_format or detect_format(path)
+    checkpoint = Checkpoint(path)
+    if restart:
+        await checkpoint.clear(db)
+    state = await checkpoint.load(db)
+    if state is not None and not resume:
+        raise ValueError(f"An interrupted import of {path} was checkpointed; pass --resume or --restart")
+
+    lookup = PatientLookup()
+    stats = {"imported": 0, "invalid": 0, "unknown_patient": 0}
+    skip = 0
+    if resume and state is not None:
+        skip = state.records_done
+        stats = {"imported": state.imported, "invalid": state.invalid, "unknown_patient": state.unknown_patient}
+        _log(f"Resuming after record {skip}")
+    records_done = skip
+    started = time.monotonic()
+
+    # Skipped records are still read, but not validated
+    pipeline = validate_records(islice(read_records(path, file_format), skip, None), start=skip + 1)
+    for chunk in chunked(pipeline, chunk_size):
+        parsed = [record for _, record, _ in chunk if record is not None]
+        patient_ids = await lookup.resolve(db, {record.medical_record_number for record in parsed})
+
+        rows = []
+        for number, record, error in chunk:
+            if record is not None and patient_ids[record.medical_record_number] is None:
+                error = f"Unknown patient MRN {record.medical_record_number}"
+                stats["unknown_patient"] += 1
+            elif record is None:
+                stats["invalid"] += 1
+            if error is not None:
+                if stats["invalid"] + stats["unknown_patient"] <= MAX_REPORTED_ERRORS:
+                    _log(f"Record {number}: {error}")
+                continue
+            systolic_bp, diastolic_bp = split_blood_pressure(record.blood_pressure)
+            rows.append({
+                "patient_id": patient_ids[record.medical_record_number],
+                "blood_pressure": record.blood_pressure,
+                "systolic_bp": systolic_bp,
+                "diastolic_bp": diastolic_bp,
+                "heart_rate": record.heart_rate,
+                "temperature": record.temperature,
+                "oxygen_saturation": record.oxygen_saturation,
+                "recorded_at": record.recorded_at
+            })
+
+        if rows:
+            await insert_readings(db, rows, [rule_verdict(row) for row in rows], datetime.utcnow())
+            # Running API processes see the chunk as soon as it commits
+            await bump_data_versions(db, {row["patient_id"] for row in rows})
+        stats["imported"] += len(rows)
+        records_done = chunk[-1][0]
+        await checkpoint.save(db, records_done, stats)
+        await db.commit()
+
+        elapsed = time.monotonic() - started
+        rate = (records_done - skip) / elapsed if elapsed > 0 else 0.0
+        _log(
+            f"{records_done} records read, {stats['imported']} imported, "
+            f"{stats['invalid'] + stats['unknown_patient']} skipped ({rate:.0f} records/s)"
+        )
+
+    _log("Rebuilding baseline aggregates...")
+    stats["baselines_rebuilt"] = await backfill(db)
+    await checkpoint.clear(db)
+
+    stats["records"] = records_done
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    return stats
+
+async def _main(args):
+    from .database import AsyncSessionLocal, create_tables
+
+    await create_tables()
+    async with AsyncSessionLocal() as db:
+        try:
+            stats = await import_readings(
+                db,
+                args.path,
+                file_format=args.format,
+                chunk_size=args.chunk_size,
+                resume=args.resume,
+                restart=args.restart
+            )
+        except ValueError as e:
+            _log(f"Error: {e}")
+            sys.exit(1)
+    print(json.dumps(stats))
+    _log("Done. Running API processes pick up the imported readings on their next requests.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import historical vitals from CSV or NDJSON")
+    parser.add_argument("path", help="CSV or NDJSON file, optionally gzipped")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Records per transaction")
+    resume_or_restart = parser.add_mutually_exclusive_group()
+    resume_or_restart.add_argument("--resume", action="store_true", help="Skip records already committed by an interrupted run")
+    resume_or_restart.add_argument("--restart", action="store_true", help="Discard the checkpoint of an interrupted run and import from the start")
+    asyncio.run(_main(parser.parse_args()))
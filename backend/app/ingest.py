@@ -0,0 +1,158 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Patient, PatientReading, ReadingAudit, split_blood_pressure
+from .schemas import BulkMetricsItem, BulkMetricsResult, BulkMetricsResponse
+from .predictor import audit_vitals_rules
+from .baselines import merge_reading_groups, rolling_baselines
+from .triage import triage_index
+from .conditional import bump_data_versions, changes
+from .metrics import record_audit
+
+BULK_MAX_READINGS = 10000
+
+class BulkPayloadError(ValueError):
+    """The request body isn't a JSON array or NDJSON stream of readings"""
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Decode a JSON array, or one JSON object per line for application/x-ndjson"""
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise BulkPayloadError(f"Invalid JSON: {str(e)}")
+
+    if not isinstance(items, list):
+        raise BulkPayloadError("Expected a JSON array of readings")
+    if len(items) > BULK_MAX_READINGS:
+        raise BulkPayloadError(f"At most {BULK_MAX_READINGS} readings per request")
+    return items
+
+def rule_verdict(vitals: dict) -> dict:
+    """Rule-based audit verdict for a reading that skips the LLM audit"""
+    return audit_vitals_rules(vitals) or {
+        "status": "VALID",
+        "reason": "Bulk ingest - basic validation passed"
+    }
+
+async def insert_readings(db: AsyncSession, rows: List[dict], verdicts: List[dict], audited_at: datetime) -> List[int]:
+    """
+    executemany insert of readings and their audit rows, without committing.
+    Returns the new reading ids in the same order as rows.
+    """
+    if db.bind.dialect.name == "sqlite":
+        # SQLite has no insert sentinel, so sort_by_parameter_order would send one
+        # INSERT per row. Under the write lock each new rowid is one above the
+        # largest, so the ids of the multi-row pages sorted ascending follow rows.
+        inserted = await db.execute(insert(PatientReading).returning(PatientReading.id), rows)
+        reading_ids = sorted(inserted.scalars().all())
+    else:
+        inserted = await db.execute(
+            insert(PatientReading).returning(PatientReading.id, sort_by_parameter_order=True),
+            rows
+        )
+        reading_ids = inserted.scalars().all()
+
+    await db.execute(insert(ReadingAudit), [
+        {
+            "reading_id": reading_id,
+            "status": verdict["status"],
+            "reason": verdict["reason"],
+            "source": "RULES",
+            "audited_at": audited_at
+        }
+        for reading_id, verdict in zip(reading_ids, verdicts)
+    ])
+    return reading_ids
+
+def first_error(error: ValidationError) -> str:
+    detail = error.errors()[0]
+    location = ".".join(str(part) for part in detail["loc"])
+    return f"{location}: {detail['msg']}" if location else detail["msg"]
+
+async def ingest_readings(db: AsyncSession, items: list) -> BulkMetricsResponse:
+    """
+    Validate, audit (rules only) and insert a batch of readings for many patients.
+    Patient ids are checked with one query, readings and audit verdicts are inserted
+    with executemany, and everything commits in one transaction. Invalid rows are
+    rejected individually and never fail the batch.
+    """
+    results: List[BulkMetricsResult] = [None] * len(items)
+    valid = []
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, BulkMetricsItem.model_validate(raw)))
+        except ValidationError as e:
+            results[index] = BulkMetricsResult(index=index, status="rejected", error=first_error(e))
+
+    patient_ids = {item.patient_id for _, item in valid}
+    names = {}
+    if patient_ids:
+        known = await db.execute(select(Patient.id, Patient.name).where(Patient.id.in_(patient_ids)))
+        names = dict(known.all())
+
+    now = datetime.utcnow()
+    rows, accepted = [], []
+    for index, item in valid:
+        if item.patient_id not in names:
+            results[index] = BulkMetricsResult(index=index, status="rejected", error="Patient not found")
+            continue
+        systolic_bp, diastolic_bp = split_blood_pressure(item.blood_pressure)
+        row = {
+            "patient_id": item.patient_id,
+            "blood_pressure": item.blood_pressure,
+            "systolic_bp": systolic_bp,
+            "diastolic_bp": diastolic_bp,
+            "heart_rate": item.heart_rate,
+            "temperature": item.temperature,
+            "oxygen_saturation": item.oxygen_saturation,
+            "recorded_at": item.recorded_at or now
+        }
+        rows.append(row)
+        accepted.append(index)
+
+    verdicts = [rule_verdict(row) for row in rows]
+
+    stored = []
+    if rows:
+        reading_ids = await insert_readings(db, rows, verdicts, now)
+
+        by_patient = defaultdict(list)
+        for reading_id, row in zip(reading_ids, rows):
+            reading = SimpleNamespace(id=reading_id, **row)
+            by_patient[row["patient_id"]].append(reading)
+            stored.append(reading)
+        await merge_reading_groups(db, by_patient)
+        await bump_data_versions(db, by_patient)
+
+        for index, reading_id, verdict in zip(accepted, reading_ids, verdicts):
+            warning = None
+            if verdict["status"] == "SUSPICIOUS":
+                warning = f"Data flagged as suspicious: {verdict['reason']}"
+            results[index] = BulkMetricsResult(index=index, status="created", reading_id=reading_id, warning=warning)
+
+    await db.commit()
+    for verdict in verdicts:
+        record_audit(verdict, "rules")
+
+    # In-memory derived state only changes once the data is durable
+    for reading in sorted(stored, key=lambda reading: reading.recorded_at):
+        triage_index.update(reading.patient_id, names[reading.patient_id], reading)
+        rolling_baselines.observe(reading.patient_id, reading)
+    for patient_id in {reading.patient_id for reading in stored}:
+        changes.bump(patient_id)
+
+    return BulkMetricsResponse(
+        created=len(stored),
+        rejected=len(items) - len(stored),
+        results=results
+    )
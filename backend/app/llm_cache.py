@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import aiosqlite
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "900"))
+# Optional on-disk tier that survives restarts, e.g. ./llm_cache.db
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or None
+
+# Quantization steps applied to prompt inputs before hashing.
+# Readings that round to the same values share a cache entry; set a step to 0 for exact matching.
+LLM_CACHE_HR_STEP = float(os.getenv("LLM_CACHE_HR_STEP", "2"))
+LLM_CACHE_BP_STEP = float(os.getenv("LLM_CACHE_BP_STEP", "2"))
+LLM_CACHE_TEMP_STEP = float(os.getenv("LLM_CACHE_TEMP_STEP", "0.2"))
+LLM_CACHE_SPO2_STEP = float(os.getenv("LLM_CACHE_SPO2_STEP", "1"))
+
+def _quantize(value, step: float):
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if step > 0:
+        value = round(value / step) * step
+    return round(value, 3)
+
+def _quantize_blood_pressure(blood_pressure):
+    try:
+        systolic, diastolic = str(blood_pressure).split('/')
+        return [_quantize(systolic, LLM_CACHE_BP_STEP), _quantize(diastolic, LLM_CACHE_BP_STEP)]
+    except ValueError:
+        return str(blood_pressure)
+
+def cache_key(kind: str, vitals: dict, historical_average: dict = None) -> str:
+    """
+    Content address for an LLM request: a hash of the normalized, quantized inputs
+    that go into the prompt. kind separates prompt templates ("risk", "audit").
+    """
+    normalized = {
+        "kind": kind,
+        "heart_rate": _quantize(vitals.get("heart_rate"), LLM_CACHE_HR_STEP),
+        "blood_pressure": _quantize_blood_pressure(vitals.get("blood_pressure")),
+        "temperature": _quantize(vitals.get("temperature"), LLM_CACHE_TEMP_STEP),
+        "oxygen_saturation": _quantize(vitals.get("oxygen_saturation"), LLM_CACHE_SPO2_STEP),
+        "baseline": None
+    }
+    if historical_average:
+        normalized["baseline"] = {
+            "avg_heart_rate": _quantize(historical_average.get("avg_heart_rate"), LLM_CACHE_HR_STEP),
+            "avg_temperature": _quantize(historical_average.get("avg_temperature"), LLM_CACHE_TEMP_STEP),
+            "avg_oxygen_saturation": _quantize(historical_average.get("avg_oxygen_saturation"), LLM_CACHE_SPO2_STEP)
+        }
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class LLMResponseCache:
+    """
+    Bounded LRU cache with per-entry TTL for parsed LLM responses.
+    With a path, entries are also written to a SQLite file and read back on a memory miss.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 900.0, path: Optional[str] = None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk: Optional[aiosqlite.Connection] = None
+        self._disk_lock = asyncio.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def _disk_connection(self) -> Optional[aiosqlite.Connection]:
+        if self.path is None:
+            return None
+        if self._disk is None:
+            # Concurrent first calls would each open a connection and leak all but one
+            async with self._disk_lock:
+                if self._disk is None:
+                    disk = await aiosqlite.connect(self.path)
+                    await disk.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    await disk.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (self._clock(),))
+                    await disk.commit()
+                    # Published only once the table exists, so no caller sees a half-set-up connection
+                    self._disk = disk
+        return self._disk
+
+    def _remember(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[dict]:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+            del self._entries[key]
+            self.expirations += 1
+
+        disk = await self._disk_connection()
+        if disk is not None:
+            async with disk.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.disk_hits += 1
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict):
+        expires_at = self._clock() + self.ttl
+        self._remember(key, dict(value), expires_at)
+
+        disk = await self._disk_connection()
+        if disk is not None:
+            await disk.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            await disk.commit()
+
+    async def close(self):
+        if self._disk is not None:
+            await self._disk.close()
+            self._disk = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk_tier": self.path is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+llm_cache = LLMResponseCache(
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl=LLM_CACHE_TTL_SECONDS,
+    path=LLM_CACHE_PATH
+)
@@ -1,27 +1,75 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import math
+from typing import List, Optional, Union
 
-from .database import get_db, create_tables
-from .models import Patient, PatientReading, Prediction
+from .database import get_db, create_tables, describe_engine, AsyncSessionLocal
+from .models import Patient, PatientReading, Prediction, ReadingAudit, PatientBaseline
 from .schemas import (
     PatientCreate, Patient as PatientSchema, 
     MetricsCreate, PatientReading as ReadingSchema,
-    Prediction as PredictionSchema, PredictionRequest,
-    PatientWithReadings, PaginatedPatients, APIResponse, TriageScore
+    Prediction as PredictionSchema, PredictionRequest, BatchPredictionRequest,
+    PatientWithReadings, PaginatedPatients, CursorPatients, APIResponse, TriageScore,
+    ReadingsPage, PredictionsPage, PatientSummary, VitalsSeries,
+    ReadingAudit as ReadingAuditSchema, BulkMetricsResponse
 )
-from .predictor import calculate_risk, get_latest_reading_for_prediction, audit_vitals
+from .predictor import (
+    calculate_risk, get_latest_reading_for_prediction, audit_vitals_rules, audit_vitals_ai,
+    risk_batcher, audit_batcher
+)
+from .gateway import gateway
+from .llm_cache import llm_cache
+from .singleflight import SingleFlight
+from .audit_worker import audit_pool, AUDIT_MODE
+from .baselines import merge_readings, get_baseline, rolling_baselines
+from .conditional import conditional_response, bump_data_versions, changes, response_cache, GLOBAL_SCOPE
+from .fastjson import PATIENT_COLUMNS, READING_COLUMNS, PREDICTION_COLUMNS, as_dict, as_dicts, FastJSONResponse
+from .pagination import encode_cursor, decode_cursor, keyset_page, InvalidCursor, patient_total
+from .migrations import run_startup_backfill
+from .series import bucket_series, lttb_series, SERIES_DEFAULT_POINTS, SERIES_MAX_POINTS
+from .ingest import parse_bulk_body, ingest_readings, BulkPayloadError
+from .batch import stream_batch_predictions
+from .export import stream_export, require_pyarrow, ExportUnavailable, EXPORT_MEDIA_TYPES, EXPORT_EXTENSIONS, EXPORT_BATCH_ROWS
+from .metrics import MetricsMiddleware, registry, record_audit, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .triage import fetch_latest_reading_pairs, score_rows, triage_index, rebuild_triage_index, run_triage_sync
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create database tables, warm the triage index and open the inference pool on startup"""
+    await create_tables()
+    print(f"Database engine: {await describe_engine()}")
+    async with AsyncSessionLocal() as db:
+        await rebuild_triage_index(db)
+    # Readings stored by other workers or the importer reach the index from here
+    triage_sync = asyncio.create_task(run_triage_sync())
+    await gateway.start()
+    await audit_pool.start()
+    # Fill typed blood pressure columns for older rows without holding up startup
+    bp_backfill = asyncio.create_task(run_startup_backfill())
+    yield
+    triage_sync.cancel()
+    bp_backfill.cancel()
+    await audit_pool.close()
+    await gateway.close()
+    await llm_cache.close()
 
 # Create FastAPI app
 app = FastAPI(
     title="Healthcare AI Dashboard API",
     description="A FastAPI backend for patient data management and AI-based health predictions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# In-flight prediction requests, keyed by (patient_id, latest reading id, baseline strategy)
+prediction_flights = SingleFlight()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,16 +79,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-async def startup_event():
-    """Create database tables on startup"""
-    await create_tables()
+# Per-route request latency and DB query counters for GET /metrics
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Healthcare AI Dashboard API", "status": "running"}
 
+@app.get("/api/v1/inference/status")
+async def get_inference_status():
+    """Circuit breaker and response cache state for the LLM inference path"""
+    return {
+        "circuit_breaker": gateway.breaker.snapshot(),
+        "cache": llm_cache.stats(),
+        "prediction_single_flight": prediction_flights.stats(),
+        "audit_workers": audit_pool.stats(),
+        "batching": {
+            "risk": risk_batcher.stats(),
+            "audit": audit_batcher.stats()
+        },
+        "response_cache": response_cache.stats(),
+        "data_versions": changes.stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, database, inference and audit metrics"""
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/api/v1/patients", response_model=PatientSchema)
 async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_db)):
     """Create a new patient"""
@@ -66,8 +133,12 @@ async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_
         )
         
         db.add(db_patient)
+        await db.flush()
+        await bump_data_versions(db, [db_patient.id], triage=False)
         await db.commit()
         await db.refresh(db_patient)
+        patient_total.add(1)
+        changes.bump(db_patient.id, triage=False)
         
         return db_patient
         
@@ -77,14 +148,25 @@ async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating patient: {str(e)}")
 
-@app.get("/api/v1/patients", response_model=PaginatedPatients)
+@app.get("/api/v1/patients", response_model=Union[PaginatedPatients, CursorPatients])
 async def list_patients(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass it empty for the first page"),
+    include_total: bool = Query(False, description="Cursor mode only: add a cached approximate total"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List patients with pagination"""
+    """
+    List patients, newest first.
+    
+    Without cursor this is the original page/per_page mode with an exact total.
+    With cursor (empty for the first page) it pages by (created_at, id) keyset,
+    so every page costs the same; follow next_cursor until it is null.
+    """
     try:
+        if cursor is not None:
+            return FastJSONResponse(await _list_patients_after(cursor, per_page, include_total, db))
+        
         # Get total count
         count_result = await db.execute(select(func.count(Patient.id)))
         total = count_result.scalar()
@@ -93,68 +175,273 @@ async def list_patients(
         offset = (page - 1) * per_page
         total_pages = math.ceil(total / per_page)
         
-        # Get patients
+        # Get patients as plain rows; they go straight to JSON
         result = await db.execute(
-            select(Patient)
+            select(*PATIENT_COLUMNS)
             .order_by(Patient.created_at.desc())
             .offset(offset)
             .limit(per_page)
         )
-        patients = result.scalars().all()
-        
-        return PaginatedPatients(
-            patients=patients,
-            total=total,
-            page=page,
-            per_page=per_page,
-            total_pages=total_pages
-        )
         
+        return FastJSONResponse({
+            "patients": as_dicts(result.all(), PATIENT_COLUMNS),
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": total_pages
+        })
+        
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching patients: {str(e)}")
 
+async def _list_patients_after(cursor: str, per_page: int, include_total: bool, db: AsyncSession) -> dict:
+    query = select(*PATIENT_COLUMNS).order_by(Patient.created_at.desc(), Patient.id.desc())
+    if cursor:
+        created_at, patient_id = decode_cursor(cursor)
+        query = query.where(tuple_(Patient.created_at, Patient.id) < tuple_(created_at, patient_id))
+    
+    # One extra row tells us whether there is a next page
+    result = await db.execute(query.limit(per_page + 1))
+    patients = result.all()
+    
+    next_cursor = None
+    if len(patients) > per_page:
+        patients = patients[:per_page]
+        next_cursor = encode_cursor(patients[-1].created_at, patients[-1].id)
+    
+    approximate_total = None
+    if include_total:
+        async def count():
+            return (await db.execute(select(func.count(Patient.id)))).scalar()
+        approximate_total = await patient_total.get(count)
+    
+    return {
+        "patients": as_dicts(patients, PATIENT_COLUMNS),
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "approximate_total": approximate_total
+    }
+
 @app.get("/api/v1/patients/{patient_id}", response_model=PatientWithReadings)
-async def get_patient_details(patient_id: int, db: AsyncSession = Depends(get_db)):
-    """Get patient details with readings and predictions"""
+async def get_patient_details(
+    request: Request,
+    patient_id: int,
+    limit: int = Query(100, ge=1, le=1000, description="Max readings and max predictions returned"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get patient details with their most recent readings and predictions.
+    Both collections are capped at limit and can be narrowed to a from/to time
+    range; page further back through /readings and /predictions with the
+    returned next cursors.
+    """
     try:
-        # Get patient
-        result = await db.execute(select(Patient).where(Patient.id == patient_id))
-        patient = result.scalar_one_or_none()
-        
-        if not patient:
-            raise HTTPException(status_code=404, detail="Patient not found")
+        async def build():
+            # Get patient, readings and predictions as plain rows (no ORM objects, no revalidation)
+            result = await db.execute(select(*PATIENT_COLUMNS).where(Patient.id == patient_id))
+            patient = as_dict(result.one_or_none(), PATIENT_COLUMNS)
+            if patient is None:
+                raise HTTPException(status_code=404, detail="Patient not found")
+        
+            readings, readings_next, _ = await keyset_page(
+                db,
+                select(*READING_COLUMNS).where(PatientReading.patient_id == patient_id),
+                PatientReading.recorded_at, PatientReading.id,
+                limit, start=start, end=end, tuples=True
+            )
         
-        # Get readings
-        readings_result = await db.execute(
-            select(PatientReading)
-            .where(PatientReading.patient_id == patient_id)
-            .order_by(PatientReading.recorded_at.desc())
-        )
-        readings = readings_result.scalars().all()
+            predictions, predictions_next, _ = await keyset_page(
+                db,
+                select(*PREDICTION_COLUMNS).where(Prediction.patient_id == patient_id),
+                Prediction.created_at, Prediction.id,
+                limit, start=start, end=end, tuples=True
+            )
         
-        # Get predictions
-        predictions_result = await db.execute(
-            select(Prediction)
-            .where(Prediction.patient_id == patient_id)
-            .order_by(Prediction.created_at.desc())
-        )
-        predictions = predictions_result.scalars().all()
+            patient.update(
+                readings=as_dicts(readings, READING_COLUMNS),
+                predictions=as_dicts(predictions, PREDICTION_COLUMNS),
+                readings_next_cursor=readings_next,
+                predictions_next_cursor=predictions_next
+            )
+            return patient
         
-        return PatientWithReadings(
-            id=patient.id,
-            name=patient.name,
-            age=patient.age,
-            medical_record_number=patient.medical_record_number,
-            created_at=patient.created_at,
-            readings=readings,
-            predictions=predictions
-        )
+        # Plain data; encoded with orjson instead of PatientWithReadings
+        return await conditional_response(request, db, patient_id, None, build)
         
     except HTTPException:
         raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching patient details: {str(e)}")
 
+async def _get_patient_or_404(db: AsyncSession, patient_id: int) -> Patient:
+    result = await db.execute(select(Patient).where(Patient.id == patient_id))
+    patient = result.scalar_one_or_none()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+@app.get("/api/v1/patients/{patient_id}/summary", response_model=PatientSummary)
+async def get_patient_summary(request: Request, patient_id: int, db: AsyncSession = Depends(get_db)):
+    """Patient header data: counts plus the latest reading and prediction, without any history"""
+    try:
+        async def build():
+            patient = await _get_patient_or_404(db, patient_id)
+        
+            # The baseline aggregate already tracks the reading count
+            baseline = await db.get(PatientBaseline, patient_id)
+            if baseline is not None:
+                reading_count = baseline.reading_count
+            else:
+                reading_count = (await db.execute(
+                    select(func.count(PatientReading.id)).where(PatientReading.patient_id == patient_id)
+                )).scalar()
+        
+            prediction_count = (await db.execute(
+                select(func.count(Prediction.id)).where(Prediction.patient_id == patient_id)
+            )).scalar()
+        
+            first_reading_at = (await db.execute(
+                select(func.min(PatientReading.recorded_at)).where(PatientReading.patient_id == patient_id)
+            )).scalar()
+        
+            latest_reading = (await db.execute(
+                select(PatientReading)
+                .where(PatientReading.patient_id == patient_id)
+                .order_by(PatientReading.recorded_at.desc(), PatientReading.id.desc())
+                .limit(1)
+            )).scalar_one_or_none()
+        
+            latest_prediction = (await db.execute(
+                select(Prediction)
+                .where(Prediction.patient_id == patient_id)
+                .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+                .limit(1)
+            )).scalar_one_or_none()
+        
+            return PatientSummary(
+                id=patient.id,
+                name=patient.name,
+                age=patient.age,
+                medical_record_number=patient.medical_record_number,
+                created_at=patient.created_at,
+                reading_count=reading_count,
+                prediction_count=prediction_count,
+                first_reading_at=first_reading_at,
+                latest_reading=latest_reading,
+                latest_prediction=latest_prediction
+            )
+        
+        return await conditional_response(request, db, patient_id, PatientSummary, build)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching patient summary: {str(e)}")
+
+@app.get("/api/v1/patients/{patient_id}/readings", response_model=ReadingsPage)
+async def list_patient_readings(
+    request: Request,
+    patient_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    before: Optional[str] = Query(None, description="next_cursor from a previous page"),
+    after: Optional[str] = Query(None, description="newest_cursor from a previous page"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on recorded_at"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound on recorded_at"),
+    db: AsyncSession = Depends(get_db)
+):
+    """A page of a patient's readings, newest first"""
+    try:
+        async def build():
+            await _get_patient_or_404(db, patient_id)
+            readings, next_cursor, newest_cursor = await keyset_page(
+                db,
+                select(PatientReading).where(PatientReading.patient_id == patient_id),
+                PatientReading.recorded_at, PatientReading.id,
+                limit, before=before, after=after, start=start, end=end
+            )
+            return ReadingsPage(readings=readings, next_cursor=next_cursor, newest_cursor=newest_cursor)
+        
+        return await conditional_response(request, db, patient_id, ReadingsPage, build)
+        
+    except HTTPException:
+        raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching readings: {str(e)}")
+
+@app.get("/api/v1/patients/{patient_id}/predictions", response_model=PredictionsPage)
+async def list_patient_predictions(
+    request: Request,
+    patient_id: int,
+    limit: int = Query(20, ge=1, le=1000),
+    before: Optional[str] = Query(None, description="next_cursor from a previous page"),
+    after: Optional[str] = Query(None, description="newest_cursor from a previous page"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on created_at"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound on created_at"),
+    db: AsyncSession = Depends(get_db)
+):
+    """A page of a patient's predictions, newest first"""
+    try:
+        async def build():
+            await _get_patient_or_404(db, patient_id)
+            predictions, next_cursor, newest_cursor = await keyset_page(
+                db,
+                select(Prediction).where(Prediction.patient_id == patient_id),
+                Prediction.created_at, Prediction.id,
+                limit, before=before, after=after, start=start, end=end
+            )
+            return PredictionsPage(predictions=predictions, next_cursor=next_cursor, newest_cursor=newest_cursor)
+        
+        return await conditional_response(request, db, patient_id, PredictionsPage, build)
+        
+    except HTTPException:
+        raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching predictions: {str(e)}")
+
+@app.get("/api/v1/patients/{patient_id}/vitals/series", response_model=VitalsSeries)
+async def get_vitals_series(
+    request: Request,
+    patient_id: int,
+    mode: str = Query("lttb", pattern="^(bucket|lttb)$"),
+    points: int = Query(SERIES_DEFAULT_POINTS, ge=12, le=SERIES_MAX_POINTS, description="Upper bound on returned points or buckets"),
+    bucket_seconds: Optional[int] = Query(None, ge=1, description="Bucket mode: requested resolution, widened to fit points"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on recorded_at"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound on recorded_at"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Chart-ready vitals for a patient, bounded by points whatever the history length.
+    bucket: min/avg/max per vital per time bucket. lttb: the readings that best
+    preserve the shape of each vital's line.
+    """
+    try:
+        async def build():
+            await _get_patient_or_404(db, patient_id)
+        
+            if mode == "bucket":
+                series = await bucket_series(db, patient_id, points, bucket_seconds, start, end)
+            else:
+                series = await lttb_series(db, patient_id, points, start, end)
+        
+            return VitalsSeries(patient_id=patient_id, mode=mode, **series)
+        
+        return await conditional_response(request, db, patient_id, VitalsSeries, build)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building vitals series: {str(e)}")
+
 @app.post("/api/v1/patients/{patient_id}/metrics", response_model=APIResponse)
 async def log_metrics(
     patient_id: int, 
@@ -170,13 +457,19 @@ async def log_metrics(
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
         
-        # Audit vitals before saving
-        audit_result = await audit_vitals({
+        vitals = {
             "heart_rate": metrics.heart_rate,
             "blood_pressure": metrics.blood_pressure,
             "temperature": metrics.temperature,
             "oxygen_saturation": metrics.oxygen_saturation
-        })
+        }
+        
+        # Rule checks always run inline; the LLM check only blocks the write in sync mode
+        audit_result = audit_vitals_rules(vitals)
+        audit_source = "RULES"
+        if audit_result is None and AUDIT_MODE == "sync":
+            audit_result = await audit_vitals_ai(vitals)
+            audit_source = "AI"
         
         # Create new reading (save even if suspicious)
         reading = PatientReading(
@@ -189,18 +482,56 @@ async def log_metrics(
         )
         
         db.add(reading)
+        await db.flush()
+        
+        # Keep the running baseline in step with the insert (same transaction)
+        await merge_readings(db, patient_id, [reading])
+        
+        # Store the verdict alongside the reading when we already have one
+        if audit_result is not None:
+            db.add(ReadingAudit(
+                reading_id=reading.id,
+                status=audit_result["status"],
+                reason=audit_result["reason"],
+                source=audit_source,
+                audited_at=datetime.utcnow()
+            ))
+        
+        await bump_data_versions(db, [patient_id])
         await db.commit()
+        if audit_source == "RULES" and audit_result is not None:
+            record_audit(audit_result, "rules")
         await db.refresh(reading)
         
+        triage_index.update(patient_id, patient.name, reading)
+        rolling_baselines.observe(patient_id, reading)
+        changes.bump(patient_id)
+        
+        # Otherwise queue the LLM plausibility check in the background
+        audit_status = audit_result["status"] if audit_result else "PENDING"
+        if audit_result is None and not audit_pool.submit(reading.id, vitals):
+            # Queue full or pool stopped: keep the rule verdict rather than leave the reading pending forever
+            reason = "Audit queue full" if audit_pool.running else "AI audit unavailable"
+            db.add(ReadingAudit(
+                reading_id=reading.id,
+                status="VALID",
+                reason=f"{reason} - basic validation passed",
+                source="RULES",
+                audited_at=datetime.utcnow()
+            ))
+            await db.commit()
+            record_audit({"status": "VALID"}, "rules")
+            audit_status = "VALID"
+        
         # Prepare response with warning if data is suspicious
         warning = None
-        if audit_result["status"] == "SUSPICIOUS":
+        if audit_result and audit_result["status"] == "SUSPICIOUS":
             warning = f"Data flagged as suspicious: {audit_result['reason']}"
         
         return APIResponse(
             status="success",
             message="Vital signs logged successfully",
-            data={"reading_id": reading.id},
+            data={"reading_id": reading.id, "audit_status": audit_status},
             warning=warning
         )
         
@@ -210,6 +541,49 @@ async def log_metrics(
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error logging metrics: {str(e)}")
 
+@app.post("/api/v1/metrics/bulk", response_model=BulkMetricsResponse)
+async def log_metrics_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Log a burst of vital signs for many patients in one transaction.
+    Accepts a JSON array, or NDJSON with Content-Type: application/x-ndjson.
+    Each item is a reading plus patient_id (and optionally recorded_at); rows get
+    the rule-based audit only and a per-row status in the response.
+    """
+    try:
+        items = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+        return await ingest_readings(db, items)
+        
+    except BulkPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error logging metrics: {str(e)}")
+
+@app.get("/api/v1/readings/{reading_id}/audit", response_model=ReadingAuditSchema)
+async def get_reading_audit(reading_id: int, db: AsyncSession = Depends(get_db)):
+    """Get the data quality audit verdict for a reading (PENDING while the background check runs)"""
+    try:
+        result = await db.execute(
+            select(PatientReading.id, ReadingAudit)
+            .outerjoin(ReadingAudit, ReadingAudit.reading_id == PatientReading.id)
+            .where(PatientReading.id == reading_id)
+        )
+        row = result.first()
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Reading not found")
+        
+        audit = row.ReadingAudit
+        if audit is None:
+            return ReadingAuditSchema(reading_id=reading_id, status="PENDING")
+        
+        return audit
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching audit: {str(e)}")
+
 @app.post("/api/v1/predictions", response_model=PredictionSchema)
 async def get_ai_prediction(
     prediction_request: PredictionRequest, 
@@ -230,7 +604,7 @@ async def get_ai_prediction(
         readings_result = await db.execute(
             select(PatientReading)
             .where(PatientReading.patient_id == patient_id)
-            .order_by(PatientReading.recorded_at.desc())
+            .order_by(PatientReading.recorded_at.desc(), PatientReading.id.desc())
             .limit(1)
         )
         latest_reading = readings_result.scalar_one_or_none()
@@ -241,57 +615,49 @@ async def get_ai_prediction(
                 detail="No vital signs data available for this patient"
             )
         
-        # Calculate historical average for personalized baseline
-        avg_result = await db.execute(
-            select(
-                func.avg(PatientReading.heart_rate).label('avg_heart_rate'),
-                func.avg(PatientReading.temperature).label('avg_temperature'),
-                func.avg(PatientReading.oxygen_saturation).label('avg_oxygen_saturation')
+        async def predict_and_save():
+            # Personalized baseline using the requested strategy (O(1), no history scan)
+            historical_average = await get_baseline(db, patient_id, prediction_request.baseline, latest_reading.id)
+        
+            # Calculate risk using AI predictor with baseline
+            prediction_data = await calculate_risk(
+                heart_rate=latest_reading.heart_rate,
+                blood_pressure=latest_reading.blood_pressure,
+                temperature=latest_reading.temperature,
+                oxygen_saturation=latest_reading.oxygen_saturation,
+                historical_average=historical_average,
+                systolic_bp=latest_reading.systolic_bp
             )
-            .where(PatientReading.patient_id == patient_id)
-        )
-        avg_row = avg_result.first()
-        
-        historical_average = None
-        if avg_row and avg_row.avg_heart_rate:
-            historical_average = {
-                "avg_heart_rate": float(avg_row.avg_heart_rate),
-                "avg_temperature": float(avg_row.avg_temperature) if avg_row.avg_temperature else None,
-                "avg_oxygen_saturation": float(avg_row.avg_oxygen_saturation) if avg_row.avg_oxygen_saturation else None
-            }
-        
-        # Calculate risk using AI predictor with baseline
-        prediction_data = await calculate_risk(
-            heart_rate=latest_reading.heart_rate,
-            blood_pressure=latest_reading.blood_pressure,
-            temperature=latest_reading.temperature,
-            oxygen_saturation=latest_reading.oxygen_saturation,
-            historical_average=historical_average
-        )
         
-        # Save prediction to database (without baseline_analysis to avoid migration)
-        prediction = Prediction(
-            patient_id=patient_id,
-            risk_score=prediction_data["risk_score"],
-            risk_level=prediction_data["risk_level"],
-            recommendation=prediction_data["recommendation"],
-            created_at=datetime.utcnow()
-        )
+            # Save prediction to database (without baseline_analysis to avoid migration)
+            prediction = Prediction(
+                patient_id=patient_id,
+                risk_score=prediction_data["risk_score"],
+                risk_level=prediction_data["risk_level"],
+                recommendation=prediction_data["recommendation"],
+                created_at=datetime.utcnow()
+            )
         
-        db.add(prediction)
-        await db.commit()
-        await db.refresh(prediction)
-        
-        # Return prediction with baseline_analysis (not saved to DB)
-        return PredictionSchema(
-            id=prediction.id,
-            patient_id=prediction.patient_id,
-            risk_score=prediction.risk_score,
-            risk_level=prediction.risk_level,
-            recommendation=prediction.recommendation,
-            created_at=prediction.created_at,
-            baseline_analysis=prediction_data.get("baseline_analysis")
-        )
+            db.add(prediction)
+            await bump_data_versions(db, [patient_id], triage=False)
+            await db.commit()
+            await db.refresh(prediction)
+            changes.bump(patient_id, triage=False)
+        
+            # Return prediction with baseline_analysis (not saved to DB)
+            return PredictionSchema(
+                id=prediction.id,
+                patient_id=prediction.patient_id,
+                risk_score=prediction.risk_score,
+                risk_level=prediction.risk_level,
+                recommendation=prediction.recommendation,
+                created_at=prediction.created_at,
+                baseline_analysis=prediction_data.get("baseline_analysis")
+            )
+        
+        # Concurrent requests for the same patient, latest reading and baseline share one prediction
+        flight_key = (patient_id, latest_reading.id, prediction_request.baseline)
+        return await prediction_flights.do(flight_key, predict_and_save)
         
     except HTTPException:
         raise
@@ -299,111 +665,92 @@ async def get_ai_prediction(
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error generating prediction: {str(e)}")
 
+@app.post("/api/v1/predictions/batch")
+async def get_ai_predictions_batch(batch_request: BatchPredictionRequest):
+    """
+    Generate AI predictions for a list of patients (e.g. a whole ward at shift change).
+    Results are streamed as NDJSON lines in completion order; all rows are saved in one transaction.
+    """
+    return StreamingResponse(
+        stream_batch_predictions(batch_request.patient_ids, batch_request.baseline),
+        media_type="application/x-ndjson"
+    )
+
 @app.get("/api/v1/triage", response_model=list[TriageScore])
-async def get_triage_list(db: AsyncSession = Depends(get_db)):
+async def get_triage_list(request: Request, db: AsyncSession = Depends(get_db)):
     """Get prioritized patient list based on urgency scores"""
     try:
-        # Get all patients
-        patients_result = await db.execute(select(Patient))
-        patients = patients_result.scalars().all()
+        async def build():
+            # Latest two readings for every patient in one windowed query
+            rows = await fetch_latest_reading_pairs(db)
         
-        triage_scores = []
+            return score_rows(rows)
         
-        for patient in patients:
-            # Get last 2 readings for this patient
-            readings_result = await db.execute(
-                select(PatientReading)
-                .where(PatientReading.patient_id == patient.id)
-                .order_by(PatientReading.recorded_at.desc())
-                .limit(2)
-            )
-            readings = readings_result.scalars().all()
-            
-            if not readings:
-                continue
-            
-            # Calculate current risk score
-            latest_reading = readings[0]
-            current_risk_score = 0.0
-            
-            # Simple risk calculation
-            if latest_reading.heart_rate > 100 or latest_reading.heart_rate < 60:
-                current_risk_score += 0.3
-            if latest_reading.temperature > 100.4 or latest_reading.temperature < 96.0:
-                current_risk_score += 0.3
-            if latest_reading.oxygen_saturation < 95:
-                current_risk_score += 0.4
-            
-            current_risk_score = min(current_risk_score, 1.0)
-            
-            # Determine risk level
-            if current_risk_score > 0.6:
-                current_risk = "HIGH"
-            elif current_risk_score > 0.3:
-                current_risk = "MEDIUM"
-            else:
-                current_risk = "LOW"
-            
-            # Calculate rate of change (velocity)
-            rate_of_change = 0.0
-            trend = "STABLE"
-            
-            if len(readings) >= 2:
-                older_reading = readings[1]
-                
-                # Calculate HR change
-                hr_change = latest_reading.heart_rate - older_reading.heart_rate
-                temp_change = latest_reading.temperature - older_reading.temperature
-                spo2_change = older_reading.oxygen_saturation - latest_reading.oxygen_saturation  # Decrease is bad
-                
-                # Velocity score based on deterioration
-                if abs(hr_change) > 20:
-                    rate_of_change += 0.3
-                if abs(temp_change) > 1.0:
-                    rate_of_change += 0.2
-                if spo2_change > 3:  # SpO2 dropping
-                    rate_of_change += 0.3
-                
-                # Determine trend
-                if hr_change > 20 or temp_change > 1.0 or spo2_change > 3:
-                    trend = "DETERIORATING"
-                elif hr_change < -20 or temp_change < -1.0 or spo2_change < -3:
-                    trend = "IMPROVING"
-            
-            # Calculate urgency score: Current Risk + Rate of Change
-            urgency_score = current_risk_score + rate_of_change
-            
-            # Build reason
-            reason_parts = []
-            if current_risk == "HIGH":
-                reason_parts.append("High current risk")
-            if trend == "DETERIORATING":
-                reason_parts.append("Vitals deteriorating")
-            elif trend == "IMPROVING":
-                reason_parts.append("Vitals improving")
-            if not reason_parts:
-                reason_parts.append("Stable condition")
-            
-            reason = ", ".join(reason_parts)
-            
-            triage_scores.append(TriageScore(
-                id=patient.id,
-                patient_id=patient.id,
-                name=patient.name,
-                urgency_score=round(urgency_score, 2),
-                reason=reason,
-                current_risk=current_risk,
-                trend=trend
-            ))
+        return await conditional_response(request, db, GLOBAL_SCOPE, None, build)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating triage list: {str(e)}")
+
+@app.get("/api/v1/triage/top", response_model=list[TriageScore])
+async def get_triage_top(
+    request: Request,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the K most urgent patients from the in-memory triage index.
+    Served from memory; readings from other processes arrive through the background sync.
+    """
+    try:
+        if not triage_index.ready:
+            await rebuild_triage_index(db)
         
-        # Sort by urgency score (descending)
-        triage_scores.sort(key=lambda x: x.urgency_score, reverse=True)
+        async def build():
+            return triage_index.top(k)
         
-        return triage_scores
+        # Versioned by the index itself, so neither a 304 nor a rebuild touches the database
+        return await conditional_response(
+            request, None, GLOBAL_SCOPE, None, build, version=f"index.{triage_index.revision}"
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating triage list: {str(e)}")
 
+@app.get("/api/v1/export/readings")
+async def export_readings(
+    format: str = Query("arrow", pattern="^(arrow|parquet)$"),
+    patient_id: Optional[List[int]] = Query(None, description="Repeat for several patients; all patients when omitted"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on recorded_at"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound on recorded_at"),
+    batch_rows: int = Query(EXPORT_BATCH_ROWS, ge=100, le=100000)
+):
+    """Stream vitals readings as Arrow IPC or Parquet for analytics"""
+    return _export_response("readings", format, patient_id, start, end, batch_rows)
+
+@app.get("/api/v1/export/predictions")
+async def export_predictions(
+    format: str = Query("arrow", pattern="^(arrow|parquet)$"),
+    patient_id: Optional[List[int]] = Query(None, description="Repeat for several patients; all patients when omitted"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on created_at"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound on created_at"),
+    batch_rows: int = Query(EXPORT_BATCH_ROWS, ge=100, le=100000)
+):
+    """Stream stored predictions as Arrow IPC or Parquet for analytics"""
+    return _export_response("predictions", format, patient_id, start, end, batch_rows)
+
+def _export_response(kind: str, file_format: str, patient_ids, start, end, batch_rows: int) -> StreamingResponse:
+    try:
+        require_pyarrow()
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # Reads with its own session, since the response outlives the request's
+    return StreamingResponse(
+        stream_export(kind, file_format, patient_ids, start, end, batch_rows),
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{EXPORT_EXTENSIONS[file_format]}"'}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
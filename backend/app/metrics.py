@@ -0,0 +1,217 @@
+"""
+In-process Prometheus metrics, served as text from GET /metrics.
+
+No client library or collector is needed: counters and histograms live in this
+process and are rendered in the Prometheus text exposition format on scrape.
+
+- HTTP:  latency histogram per route template, method and status (MetricsMiddleware)
+- DB:    queries and total query time per request, from SQLAlchemy cursor events;
+         the middleware puts a RequestStats in a contextvar and the events add to it
+- LLM:   call latency by kind and outcome, timeouts and unparseable answers (predictor)
+- Rules: how often calculate_risk fell back to the rule-based score, and why
+- Audit: verdict counts by status and source
+"""
+import contextvars
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Starlette appends "; charset=utf-8" to text/ media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [per-bucket counts (not cumulative), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to answer a request, including the response body",
+    ["method", "route", "status"]
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed while serving one request",
+    ["route"], QUERY_COUNT_BUCKETS
+))
+db_time_per_request = registry.register(Histogram(
+    "db_query_seconds_per_request", "Total time spent in SQL statements while serving one request",
+    ["route"]
+))
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed, inside or outside of requests", ["context"]
+))
+db_query_seconds = registry.register(Counter(
+    "db_query_seconds_total", "Time spent in SQL statements, inside or outside of requests", ["context"]
+))
+llm_request_duration = registry.register(Histogram(
+    "llm_request_duration_seconds", "Inference endpoint calls by prompt kind and outcome",
+    ["kind", "outcome"], LLM_LATENCY_BUCKETS
+))
+llm_timeouts = registry.register(Counter(
+    "llm_timeouts_total", "Inference calls that timed out", ["kind"]
+))
+llm_parse_failures = registry.register(Counter(
+    "llm_parse_failures_total", "Inference answers that weren't the JSON we asked for", ["kind"]
+))
+risk_rule_fallbacks = registry.register(Counter(
+    "risk_rule_based_fallbacks_total", "Risk scores computed by the rule-based fallback instead of the LLM",
+    ["reason"]
+))
+audit_verdicts = registry.register(Counter(
+    "audit_verdicts_total", "Data quality audit verdicts", ["status", "source"]
+))
+
+def record_audit(verdict: Optional[dict], source: str):
+    if verdict is not None:
+        audit_verdicts.inc(status=verdict["status"], source=source)
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+_request_stats: contextvars.ContextVar = contextvars.ContextVar("request_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _request_stats.get()
+    context_label = "request" if stats is not None else "background"
+    db_queries.inc(context=context_label)
+    db_query_seconds.inc(elapsed, context=context_label)
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+def instrument_engine(engine):
+    """Count statements and their time on an (async) engine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request until its last body chunk is sent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _request_stats.reset(token)
+            # The router leaves the matched route in the scope; label by its template, not the raw path
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=status["code"]
+            )
+            db_queries_per_request.observe(stats.queries, route=route)
+            db_time_per_request.observe(stats.query_seconds, route=route)
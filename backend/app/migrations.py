@@ -0,0 +1,133 @@
+"""
+Online data migrations that run in small batches next to live traffic.
+
+Fill the typed systolic_bp / diastolic_bp columns for readings stored before
+they existed (the API also does this in the background on startup):
+
+    python -m app.migrations backfill-bp
+"""
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import select, update, func, cast, Integer, case, null, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import PatientReading
+from .conditional import bump_data_versions, changes
+
+load_dotenv()
+
+BP_BACKFILL_BATCH_SIZE = int(os.getenv("BP_BACKFILL_BATCH_SIZE", "1000"))
+# Pause between batches so the backfill never hogs the database
+BP_BACKFILL_PAUSE_SECONDS = float(os.getenv("BP_BACKFILL_PAUSE_SECONDS", "0.05"))
+
+def well_formed_blood_pressure(dialect_name: str):
+    """SQL test for a "120/80" string, the only form split_blood_pressure parses"""
+    blood_pressure = PatientReading.blood_pressure
+    if dialect_name == "postgresql":
+        return blood_pressure.op("~")(r"^\d+/\d+$")
+    # Digits, one slash, digits: starts with a digit, has one after a slash, and nothing else
+    return and_(
+        blood_pressure.op("GLOB")("[0-9]*/[0-9]*"),
+        ~blood_pressure.op("GLOB")("*[^0-9/]*"),
+        ~blood_pressure.like("%/%/%")
+    )
+
+def systolic_expression(dialect_name: str):
+    """SQL for the systolic part of blood_pressure, for rows without the typed column; NULL if malformed"""
+    blood_pressure = PatientReading.blood_pressure
+    if dialect_name == "postgresql":
+        systolic = cast(func.split_part(blood_pressure, "/", 1), Integer)
+    else:
+        systolic = cast(func.substr(blood_pressure, 1, func.instr(blood_pressure, "/") - 1), Integer)
+    return case((well_formed_blood_pressure(dialect_name), systolic), else_=null())
+
+def diastolic_expression(dialect_name: str):
+    blood_pressure = PatientReading.blood_pressure
+    if dialect_name == "postgresql":
+        diastolic = cast(func.split_part(blood_pressure, "/", 2), Integer)
+    else:
+        diastolic = cast(func.substr(blood_pressure, func.instr(blood_pressure, "/") + 1), Integer)
+    return case((well_formed_blood_pressure(dialect_name), diastolic), else_=null())
+
+async def backfill_blood_pressure(
+    db: AsyncSession,
+    batch_size: int = BP_BACKFILL_BATCH_SIZE,
+    pause: float = BP_BACKFILL_PAUSE_SECONDS
+) -> int:
+    """
+    Parse blood_pressure into the typed columns for rows that don't have them yet,
+    one short transaction per batch of ids. Rows whose blood_pressure isn't
+    "systolic/diastolic" are skipped and keep NULL columns. Safe to interrupt and rerun.
+    Returns the number of rows updated.
+    """
+    dialect_name = db.bind.dialect.name
+    updated = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(PatientReading.id)
+            .where(
+                PatientReading.systolic_bp.is_(None),
+                PatientReading.id > last_id,
+                # Malformed legacy values stay NULL, as split_blood_pressure leaves them
+                well_formed_blood_pressure(dialect_name)
+            )
+            .order_by(PatientReading.id)
+            .limit(batch_size)
+        )
+        ids = result.scalars().all()
+        if not ids:
+            return updated
+
+        await db.execute(
+            update(PatientReading)
+            .where(PatientReading.id.in_(ids))
+            .values(
+                systolic_bp=systolic_expression(dialect_name),
+                diastolic_bp=diastolic_expression(dialect_name)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Rows change without a per-patient bump, so every ETag moves on
+        await bump_data_versions(db, generation=True)
+        await db.commit()
+
+        updated += len(ids)
+        last_id = ids[-1]
+        if pause:
+            await asyncio.sleep(pause)
+
+async def run_startup_backfill():
+    """Background task started from the app lifespan"""
+    from .database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            updated = await backfill_blood_pressure(db)
+        if updated:
+            print(f"Backfilled blood pressure columns for {updated} readings")
+            # Cached responses still carry the old, untyped rows
+            changes.bump_all()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Blood pressure backfill error: {str(e)}")
+
+async def _main(args):
+    from .database import AsyncSessionLocal, create_tables
+
+    await create_tables()
+    async with AsyncSessionLocal() as db:
+        if args.command == "backfill-bp":
+            updated = await backfill_blood_pressure(db, batch_size=args.batch_size, pause=args.pause)
+            print(f"Backfilled blood pressure columns for {updated} readings")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run online data migrations")
+    parser.add_argument("command", choices=["backfill-bp"])
+    parser.add_argument("--batch-size", type=int, default=BP_BACKFILL_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=BP_BACKFILL_PAUSE_SECONDS, help="Seconds to sleep between batches")
+    asyncio.run(_main(parser.parse_args()))
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import relationship, validates
+from typing import Optional, Tuple
 from datetime import datetime
 from .database import Base
 
@@ -15,6 +16,19 @@ class Patient(Base):
     # Relationships
     readings = relationship("PatientReading", back_populates="patient")
     predictions = relationship("Prediction", back_populates="patient")
+    
+    __table_args__ = (
+        # Keyset pagination order for the patient list
+        Index("ix_patients_created_at_id", "created_at", "id"),
+    )
+
+def split_blood_pressure(blood_pressure: str) -> Tuple[Optional[int], Optional[int]]:
+    """(systolic, diastolic) of a "120/80" string, (None, None) if it can't be parsed"""
+    try:
+        systolic, diastolic = blood_pressure.split('/')
+        return int(systolic), int(diastolic)
+    except (ValueError, AttributeError):
+        return None, None
 
 class PatientReading(Base):
     __tablename__ = "patient_readings"
@@ -22,6 +36,9 @@ class PatientReading(Base):
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     blood_pressure = Column(String(20), nullable=False)  # e.g., "120/80"
+    # Typed copies of blood_pressure, set on write (NULL only until older rows are backfilled)
+    systolic_bp = Column(Integer, nullable=True)
+    diastolic_bp = Column(Integer, nullable=True)
     heart_rate = Column(Integer, nullable=False)
     temperature = Column(Float, nullable=False)
     oxygen_saturation = Column(Float, nullable=False)
@@ -29,6 +46,17 @@ class PatientReading(Base):
     
     # Relationships
     patient = relationship("Patient", back_populates="readings")
+    audit = relationship("ReadingAudit", back_populates="reading", uselist=False)
+    
+    __table_args__ = (
+        # Per-patient history, newest first
+        Index("ix_patient_readings_patient_recorded", "patient_id", "recorded_at"),
+    )
+    
+    @validates("blood_pressure")
+    def _fill_typed_blood_pressure(self, key, blood_pressure):
+        self.systolic_bp, self.diastolic_bp = split_blood_pressure(blood_pressure)
+        return blood_pressure
 
 class Prediction(Base):
     __tablename__ = "predictions"
@@ -41,4 +69,53 @@ class Prediction(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
-    patient = relationship("Patient", back_populates="predictions")
\ No newline at end of file
+    patient = relationship("Patient", back_populates="predictions")
+    
+    __table_args__ = (
+        Index("ix_predictions_patient_created", "patient_id", "created_at"),
+    )
+
+class ReadingAudit(Base):
+    __tablename__ = "reading_audits"
+    
+    reading_id = Column(Integer, ForeignKey("patient_readings.id"), primary_key=True)
+    status = Column(String(20), nullable=False)  # VALID, SUSPICIOUS
+    reason = Column(Text, nullable=False)
+    source = Column(String(20), nullable=False)  # RULES, AI
+    audited_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    reading = relationship("PatientReading", back_populates="audit")
+
+class PatientBaseline(Base):
+    """Running per-patient aggregates over every reading (count, sums and Welford M2)"""
+    __tablename__ = "patient_baselines"
+    
+    patient_id = Column(Integer, ForeignKey("patients.id"), primary_key=True)
+    reading_count = Column(Integer, nullable=False, default=0)
+    heart_rate_sum = Column(Float, nullable=False, default=0.0)
+    heart_rate_m2 = Column(Float, nullable=False, default=0.0)
+    temperature_sum = Column(Float, nullable=False, default=0.0)
+    temperature_m2 = Column(Float, nullable=False, default=0.0)
+    oxygen_saturation_sum = Column(Float, nullable=False, default=0.0)
+    oxygen_saturation_m2 = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ImportCheckpoint(Base):
+    """Progress of an interrupted python -m app.importer run, committed with each chunk"""
+    __tablename__ = "import_checkpoints"
+    
+    source = Column(String(1024), primary_key=True)  # Absolute path of the input file
+    size = Column(BigInteger, nullable=False)
+    records_done = Column(Integer, nullable=False, default=0)
+    imported = Column(Integer, nullable=False, default=0)
+    invalid = Column(Integer, nullable=False, default=0)
+    unknown_patient = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DataVersion(Base):
+    """Change counter per cached scope, bumped in the writer's transaction (see conditional.py)"""
+    __tablename__ = "data_versions"
+    
+    scope = Column(String(32), primary_key=True)  # "patient:<id>", "global" or "generation"
+    version = Column(Integer, nullable=False, default=0)
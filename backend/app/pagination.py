@@ -0,0 +1,105 @@
+import base64
+import json
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+load_dotenv()
+
+# How long the approximate patient total is reused before it is recounted
+PATIENT_COUNT_TTL_SECONDS = float(os.getenv("PATIENT_COUNT_TTL_SECONDS", "60"))
+
+class InvalidCursor(ValueError):
+    """The cursor wasn't produced by encode_cursor"""
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    time_column,
+    id_column,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tuples: bool = False
+) -> Tuple[List, Optional[str], Optional[str]]:
+    """
+    One page of query's entities, newest first, keyed on (time_column, id_column).
+    With tuples=True the query selects columns (including both key columns) and
+    the page is its rows instead of entities.
+    before/after are cursors from earlier pages; start is inclusive, end exclusive.
+    Returns (rows, next_cursor, newest_cursor): next_cursor continues to older rows
+    (None when there are none), newest_cursor polls for rows newer than this page.
+    """
+    key = tuple_(time_column, id_column)
+    if start is not None:
+        query = query.where(time_column >= start)
+    if end is not None:
+        query = query.where(time_column < end)
+    if before:
+        query = query.where(key < tuple_(*decode_cursor(before)))
+
+    def fetch(result):
+        return result.all() if tuples else result.scalars().all()
+
+    def cursor_for(row):
+        return encode_cursor(getattr(row, time_column.key), getattr(row, id_column.key))
+
+    if after:
+        # Walk forward from the cursor, then flip back to newest first
+        query = query.where(key > tuple_(*decode_cursor(after)))
+        result = await db.execute(query.order_by(time_column.asc(), id_column.asc()).limit(limit))
+        rows = list(reversed(fetch(result)))
+        return rows, None, cursor_for(rows[0]) if rows else after
+
+    # One extra row tells us whether there is an older page
+    result = await db.execute(query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1))
+    rows = fetch(result)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = cursor_for(rows[-1])
+    return rows, next_cursor, cursor_for(rows[0]) if rows else None
+
+class CachedCount:
+    """
+    A COUNT(*) that is recomputed at most once per ttl seconds.
+    Writers can nudge it with add() so it stays close between refreshes.
+    """
+
+    def __init__(self, ttl: float, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._value: Optional[int] = None
+        self._counted_at = 0.0
+
+    async def get(self, count: Callable[[], Awaitable[int]]) -> int:
+        if self._value is None or self._clock() - self._counted_at >= self.ttl:
+            self._value = await count()
+            self._counted_at = self._clock()
+        return self._value
+
+    def add(self, delta: int):
+        if self._value is not None:
+            self._value += delta
+
+patient_total = CachedCount(PATIENT_COUNT_TTL_SECONDS)
@@ -1,23 +1,33 @@
 import os
 import json
+import time
+import asyncio
 import httpx
-from typing import Dict, Any
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from .gateway import gateway
+from .circuit_breaker import CircuitOpenError
+from .llm_cache import llm_cache, cache_key
+from .batcher import MicroBatcher
+from . import metrics
+
 load_dotenv()
 
 HF_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
-HF_API_URL = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2"
+# Overridable to point at a self-hosted model or the fake server in benchmarks/fake_llm.py
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2")
 
-async def audit_vitals(vitals: dict) -> dict:
+def audit_vitals_rules(vitals: dict) -> Optional[dict]:
     """
-    Audit vital signs for data quality issues.
-    Returns: {"status": "VALID"|"SUSPICIOUS", "reason": str}
+    Rule-based part of the audit. Cheap enough to run inline on every write.
+    Returns a SUSPICIOUS verdict, or None if the rules pass.
     """
     heart_rate = vitals.get("heart_rate")
     temperature = vitals.get("temperature")
     
-    # Rule Check (First): Physiologically impossible values
+    # Physiologically impossible values
     if heart_rate and (heart_rate > 220 or heart_rate < 30):
         return {
             "status": "SUSPICIOUS",
@@ -30,71 +40,161 @@ async def audit_vitals(vitals: dict) -> dict:
             "reason": "Physiologically impossible temperature"
         }
     
+    return None
+
+async def audit_vitals(vitals: dict) -> dict:
+    """
+    Audit vital signs for data quality issues.
+    Returns: {"status": "VALID"|"SUSPICIOUS", "reason": str}
+    """
+    # Rule Check (First): Physiologically impossible values
+    rule_result = audit_vitals_rules(vitals)
+    if rule_result:
+        metrics.record_audit(rule_result, "rules")
+        return rule_result
+    
+    return await audit_vitals_ai(vitals)
+
+async def audit_vitals_ai(vitals: dict) -> dict:
+    """
+    LLM plausibility part of the audit, for vitals that already passed the rules.
+    Returns: {"status": "VALID"|"SUSPICIOUS", "reason": str}
+    """
     # AI Check (Second): Ask LLM if values are plausible
     if HF_API_KEY:
-        try:
-            headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-            
-            prompt = f"""<s>[INST] You are a medical data quality expert. Analyze these vitals for plausibility:
-            
-            - Heart Rate: {vitals.get('heart_rate')} bpm
-            - Blood Pressure: {vitals.get('blood_pressure')} mmHg
-            - Temperature: {vitals.get('temperature')} F
-            - Oxygen Saturation: {vitals.get('oxygen_saturation')} %
-            
-            Are these values plausible for a human patient? Answer with JSON only:
-            {{"plausible": true/false, "reason": "brief explanation"}}
-            [/INST]"""
-            
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 100,
-                    "return_full_text": False,
-                    "temperature": 0.1
-                }
+        key = cache_key("audit", vitals)
+        ai_result = await llm_cache.get(key)
+        
+        if ai_result is None:
+            try:
+                if audit_batcher.enabled:
+                    ai_result = await audit_batcher.submit(vitals)
+                else:
+                    ai_result = await _request_audit(vitals)
+                await llm_cache.set(key, ai_result)
+            except CircuitOpenError:
+                pass  # Endpoint is down; skip straight to offline mode
+            except Exception as e:
+                print(f"AI Audit Error: {str(e)}")
+                # Fall through to offline mode
+        
+        if ai_result and not ai_result["plausible"]:
+            verdict = {
+                "status": "SUSPICIOUS",
+                "reason": f"AI flagged: {ai_result['reason']}"
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(HF_API_URL, headers=headers, json=payload, timeout=10.0)
-                
-            if response.status_code == 200:
-                result = response.json()
-                generated_text = result[0]["generated_text"].strip()
-                
-                # Try to parse JSON response
-                if "```json" in generated_text:
-                    generated_text = generated_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in generated_text:
-                    generated_text = generated_text.split("```")[1].split("```")[0].strip()
-                
-                ai_result = json.loads(generated_text)
-                
-                if not ai_result.get("plausible", True):
-                    return {
-                        "status": "SUSPICIOUS",
-                        "reason": f"AI flagged: {ai_result.get('reason', 'Implausible values')}"
-                    }
-        except Exception as e:
-            print(f"AI Audit Error: {str(e)}")
-            # Fall through to offline mode
+            metrics.record_audit(verdict, "ai")
+            return verdict
     
     # Fallback: Offline mode - assume valid if rules passed
-    return {
+    verdict = {
         "status": "VALID",
         "reason": "Offline mode - basic validation passed"
     }
+    metrics.record_audit(verdict, "ai" if HF_API_KEY and ai_result else "offline")
+    return verdict
 
-async def calculate_risk(heart_rate: int, blood_pressure: str, temperature: float, oxygen_saturation: float, historical_average: dict = None) -> Dict[str, Any]:
+async def calculate_risk(heart_rate: int, blood_pressure: str, temperature: float, oxygen_saturation: float, historical_average: dict = None, systolic_bp: Optional[int] = None) -> Dict[str, Any]:
     """
     Calculate patient risk using Hugging Face LLM with baseline comparison.
+    systolic_bp is the reading's typed column; without it blood_pressure is parsed.
     """
     if not HF_API_KEY:
         # Fallback to rule-based if no key
-        return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average)
+        metrics.risk_rule_fallbacks.inc(reason="no_api_key")
+        return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average, systolic_bp)
+
+    request = {
+        "heart_rate": heart_rate,
+        "blood_pressure": blood_pressure,
+        "temperature": temperature,
+        "oxygen_saturation": oxygen_saturation,
+        "historical_average": historical_average
+    }
+
+    # Identical (after quantization) inputs get the answer we already paid for
+    key = cache_key("risk", request, historical_average)
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        return cached
 
+    try:
+        if risk_batcher.enabled:
+            risk = await risk_batcher.submit(request)
+        else:
+            risk = await _request_risk(request)
+        await llm_cache.set(key, risk)
+        return risk
+        
+    except CircuitOpenError:
+        metrics.risk_rule_fallbacks.inc(reason="circuit_open")
+        return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average, systolic_bp)
+    except Exception as e:
+        print(f"AI Prediction Error: {str(e)}")
+        metrics.risk_rule_fallbacks.inc(reason="error")
+        return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average, systolic_bp)
+
+class InferenceError(Exception):
+    """The inference endpoint answered, but not with a usable completion"""
+
+async def _generate(prompt: str, max_new_tokens: int, kind: str) -> str:
+    """Send one prompt to the model and return the generated text; kind labels the call's metrics"""
     headers = {"Authorization": f"Bearer {HF_API_KEY}"}
     
+    payload = {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": max_new_tokens,
+            "return_full_text": False,
+            "temperature": 0.1
+        }
+    }
+    
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await gateway.post(HF_API_URL, payload, headers=headers)
+        
+        if response.status_code != 200:
+            outcome = "http_error"
+            raise InferenceError(f"HF API Error: {response.text}")
+        
+        result = response.json()
+        generated_text = result[0]["generated_text"].strip()
+        outcome = "ok"
+        return generated_text
+    except CircuitOpenError:
+        outcome = "circuit_open"
+        raise
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        metrics.llm_timeouts.inc(kind=kind)
+        raise
+    finally:
+        metrics.llm_request_duration.observe(time.perf_counter() - started, kind=kind, outcome=outcome)
+
+def _parse_json(generated_text: str):
+    """Strip markdown code fences and parse the model's JSON answer"""
+    json_str = generated_text.strip()
+    if "```json" in json_str:
+        json_str = json_str.split("```json")[1].split("```")[0].strip()
+    elif "```" in json_str:
+        json_str = json_str.split("```")[1].split("```")[0].strip()
+    return json.loads(json_str)
+
+def _audit_prompt(vitals: dict) -> str:
+    return f"""<s>[INST] You are a medical data quality expert. Analyze these vitals for plausibility:
+            
+            - Heart Rate: {vitals.get('heart_rate')} bpm
+            - Blood Pressure: {vitals.get('blood_pressure')} mmHg
+            - Temperature: {vitals.get('temperature')} F
+            - Oxygen Saturation: {vitals.get('oxygen_saturation')} %
+            
+            Are these values plausible for a human patient? Answer with JSON only:
+            {{"plausible": true/false, "reason": "brief explanation"}}
+            [/INST]"""
+
+def _risk_prompt(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average=None) -> str:
     # Build prompt with baseline comparison if available
     baseline_info = ""
     if historical_average:
@@ -107,7 +207,7 @@ async def calculate_risk(heart_rate: int, blood_pressure: str, temperature: floa
     
     Compare current vitals against this baseline. Is this a significant deviation?"""
     
-    prompt = f"""<s>[INST] You are a medical AI assistant. Analyze the following patient vitals and provide a risk assessment.
+    return f"""<s>[INST] You are a medical AI assistant. Analyze the following patient vitals and provide a risk assessment.
     
     Current Vitals:
     - Heart Rate: {heart_rate} bpm
@@ -123,94 +223,261 @@ async def calculate_risk(heart_rate: int, blood_pressure: str, temperature: floa
     
     Do not include any other text. JSON only. [/INST]"""
 
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": 250,
-            "return_full_text": False,
-            "temperature": 0.1
-        }
+def _normalize_audit(parsed: dict) -> dict:
+    return {
+        "plausible": bool(parsed.get("plausible", True)),
+        "reason": parsed.get("reason", "Implausible values")
+    }
+
+def _normalize_risk(prediction: dict) -> dict:
+    # Validate fields
+    return {
+        "risk_score": float(prediction.get("risk_score", 0.5)),
+        "risk_level": prediction.get("risk_level", "MEDIUM").upper(),
+        "recommendation": prediction.get("recommendation", "Consult a doctor."),
+        "baseline_analysis": prediction.get("baseline_analysis", "No baseline comparison available")
     }
 
+def _parse_answer(generated_text: str, normalize, kind: str) -> dict:
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(HF_API_URL, headers=headers, json=payload, timeout=10.0)
-            
-        if response.status_code != 200:
-            print(f"HF API Error: {response.text}")
-            return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation)
-            
-        result = response.json()
-        generated_text = result[0]["generated_text"]
-        
-        # Clean up text to ensure valid JSON
-        json_str = generated_text.strip()
-        if "```json" in json_str:
-            json_str = json_str.split("```json")[1].split("```")[0].strip()
-        elif "```" in json_str:
-            json_str = json_str.split("```")[1].split("```")[0].strip()
-            
-        prediction = json.loads(json_str)
-        
-        # Validate fields
-        return {
-            "risk_score": float(prediction.get("risk_score", 0.5)),
-            "risk_level": prediction.get("risk_level", "MEDIUM").upper(),
-            "recommendation": prediction.get("recommendation", "Consult a doctor."),
-            "baseline_analysis": prediction.get("baseline_analysis", "No baseline comparison available")
-        }
-        
-    except Exception as e:
-        print(f"AI Prediction Error: {str(e)}")
-        return _calculate_risk_rule_based(heart_rate, blood_pressure, temperature, oxygen_saturation, historical_average)
+        return normalize(_parse_json(generated_text))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        metrics.llm_parse_failures.inc(kind=kind)
+        raise
+
+async def _request_audit(vitals: dict) -> dict:
+    return _parse_answer(await _generate(_audit_prompt(vitals), 100, "audit"), _normalize_audit, "audit")
+
+async def _request_risk(request: dict) -> dict:
+    return _parse_answer(await _generate(_risk_prompt(**request), 250, "risk"), _normalize_risk, "risk")
 
-def _calculate_risk_rule_based(heart_rate: int, blood_pressure: str, temperature: float, oxygen_saturation: float, historical_average: dict = None) -> Dict[str, Any]:
+# Micro-batching: requests that arrive within the window share one model call (0 disables it)
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+
+def _vitals_lines(vitals: dict) -> str:
+    return f"""    - Heart Rate: {vitals.get('heart_rate')} bpm
+    - Blood Pressure: {vitals.get('blood_pressure')} mmHg
+    - Temperature: {vitals.get('temperature')} F
+    - Oxygen Saturation: {vitals.get('oxygen_saturation')} %"""
+
+def _batch_audit_prompt(items: list) -> str:
+    patients = "\n\n".join(
+        f"    Patient {number}:\n{_vitals_lines(vitals)}" for number, vitals in enumerate(items, start=1)
+    )
+    return f"""<s>[INST] You are a medical data quality expert. Analyze the vitals of each patient below for plausibility.
+    
+{patients}
+    
+    Are these values plausible for a human patient? Answer with a JSON array only, one object per patient:
+    [{{"id": <patient number>, "plausible": true/false, "reason": "brief explanation"}}]
+    [/INST]"""
+
+def _batch_risk_prompt(items: list) -> str:
+    blocks = []
+    for number, request in enumerate(items, start=1):
+        baseline = request.get("historical_average")
+        if baseline:
+            baseline_line = (
+                f"    - Baseline: average HR {baseline.get('avg_heart_rate', 'N/A')} bpm, "
+                f"average temperature {baseline.get('avg_temperature', 'N/A')} F, "
+                f"average SpO2 {baseline.get('avg_oxygen_saturation', 'N/A')} %"
+            )
+        else:
+            baseline_line = "    - Baseline: none"
+        blocks.append(f"    Patient {number}:\n{_vitals_lines(request)}\n{baseline_line}")
+    patients = "\n\n".join(blocks)
+    
+    return f"""<s>[INST] You are a medical AI assistant. Analyze the vitals of each patient below and provide a risk assessment for each. Where a baseline is given, compare current vitals against it.
+    
+{patients}
+    
+    Return a JSON array with one object per patient, each with exactly these fields:
+    - "id": the patient number above.
+    - "risk_score": a number between 0.0 and 1.0 representing the risk probability.
+    - "risk_level": "LOW", "MEDIUM", or "HIGH".
+    - "recommendation": a brief medical recommendation (max 2 sentences).
+    - "baseline_analysis": a brief comparison to baseline if provided, or "No baseline data" if not.
+    
+    Do not include any other text. JSON only. [/INST]"""
+
+async def _run_batch(items: list, prompt: str, tokens_per_item: int, normalize, single, kind: str) -> list:
     """
-    Fallback rule-based calculation with baseline comparison.
+    Send one packed prompt for several patients and split the JSON array back per patient.
+    Patients missing from (or unparseable in) the answer are retried with their own call.
     """
-    risk_score = 0.0
-    baseline_analysis = "Offline mode - no AI baseline comparison available"
-    
-    try:
-        systolic_bp = int(blood_pressure.split('/')[0])
-    except (ValueError, IndexError):
-        systolic_bp = 120
+    if len(items) == 1:
+        try:
+            return [await single(items[0])]
+        except Exception as e:
+            return [e]
     
-    if heart_rate > 100 or heart_rate < 60: risk_score += 0.3
-    if systolic_bp > 140 or systolic_bp < 90: risk_score += 0.3
-    if temperature > 100.4 or temperature < 96.0: risk_score += 0.2
-    if oxygen_saturation < 95: risk_score += 0.2
+    generated_text = await _generate(prompt, tokens_per_item * len(items), kind)
     
-    # Baseline comparison (rule-based)
-    if historical_average:
-        avg_hr = historical_average.get('avg_heart_rate')
-        if avg_hr:
-            hr_deviation = abs(heart_rate - avg_hr)
-            if hr_deviation > 30:
-                risk_score += 0.2
-                baseline_analysis = f"Offline mode: HR deviation of {hr_deviation:.1f} bpm from personal baseline ({avg_hr:.1f} bpm)"
-            else:
-                baseline_analysis = f"Offline mode: HR within {hr_deviation:.1f} bpm of personal baseline ({avg_hr:.1f} bpm)"
+    answers = {}
+    try:
+        for entry in _parse_json(generated_text):
+            try:
+                answers[int(entry["id"])] = normalize(entry)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+    except Exception as e:
+        print(f"AI Batch Parse Error: {str(e)}")
+        metrics.llm_parse_failures.inc(kind=kind)
     
+    results = [answers.get(number) for number in range(1, len(items) + 1)]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        retried = await asyncio.gather(*[single(items[index]) for index in missing], return_exceptions=True)
+        for index, result in zip(missing, retried):
+            results[index] = result
+    return results
+
+async def _request_audit_batch(items: list) -> list:
+    return await _run_batch(items, _batch_audit_prompt(items), 60, _normalize_audit, _request_audit, "audit_batch")
+
+async def _request_risk_batch(items: list) -> list:
+    return await _run_batch(items, _batch_risk_prompt(items), 200, _normalize_risk, _request_risk, "risk_batch")
+
+audit_batcher = MicroBatcher(_request_audit_batch, LLM_BATCH_WINDOW_MS / 1000, LLM_BATCH_MAX_SIZE)
+risk_batcher = MicroBatcher(_request_risk_batch, LLM_BATCH_WINDOW_MS / 1000, LLM_BATCH_MAX_SIZE)
+
+RECOMMENDATIONS = {
+    "HIGH": "Immediate attention required. Vitals are unstable.",
+    "MEDIUM": "Monitor closely. Some values are abnormal.",
+    "LOW": "Vitals are within normal range."
+}
+
+def parse_systolic(blood_pressure: str) -> int:
+    """Systolic value of a "120/80" string, 120 if it can't be parsed"""
+    try:
+        return int(blood_pressure.split('/')[0])
+    except (ValueError, IndexError, AttributeError):
+        return 120
+
+def score_vitals_batch(
+    heart_rate,
+    systolic_bp,
+    temperature,
+    oxygen_saturation,
+    baseline_heart_rate=None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rule-based risk for many readings at once.
+    Takes equal-length columns and returns (risk_scores, risk_levels) arrays.
+    A NaN baseline heart rate means no baseline for that reading.
+    """
+    heart_rate = np.asarray(heart_rate, dtype=np.float64)
+    systolic_bp = np.asarray(systolic_bp, dtype=np.float64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    oxygen_saturation = np.asarray(oxygen_saturation, dtype=np.float64)
+
+    # Same additions, in the same order, as the scalar rules so floats match exactly
+    risk_score = np.zeros(heart_rate.shape, dtype=np.float64)
+    risk_score += np.where((heart_rate > 100) | (heart_rate < 60), 0.3, 0.0)
+    risk_score += np.where((systolic_bp > 140) | (systolic_bp < 90), 0.3, 0.0)
+    risk_score += np.where((temperature > 100.4) | (temperature < 96.0), 0.2, 0.0)
+    risk_score += np.where(oxygen_saturation < 95, 0.2, 0.0)
+
+    if baseline_heart_rate is not None:
+        baseline_heart_rate = np.asarray(baseline_heart_rate, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            deviated = np.abs(heart_rate - baseline_heart_rate) > 30
+        risk_score += np.where(deviated, 0.2, 0.0)
+
+    risk_score = np.minimum(risk_score, 1.0)
+
+    # Levels use the unrounded score, as the scalar rules always have
+    risk_level = np.where(risk_score > 0.6, "HIGH", np.where(risk_score > 0.3, "MEDIUM", "LOW"))
+
+    return np.round(risk_score, 2), risk_level
+
+def score_vitals(heart_rate, systolic_bp, temperature, oxygen_saturation, baseline_heart_rate=None) -> Tuple[float, str]:
+    """
+    The same rules as score_vitals_batch for a single reading, as (risk_score, risk_level).
+    Plain Python, so one-off scoring skips numpy's per-call array setup.
+    """
+    risk_score = 0.0
+    if heart_rate > 100 or heart_rate < 60:
+        risk_score += 0.3
+    if systolic_bp > 140 or systolic_bp < 90:
+        risk_score += 0.3
+    if temperature > 100.4 or temperature < 96.0:
+        risk_score += 0.2
+    if oxygen_saturation < 95:
+        risk_score += 0.2
+    if baseline_heart_rate and abs(heart_rate - baseline_heart_rate) > 30:
+        risk_score += 0.2
+
     risk_score = min(risk_score, 1.0)
-    
+
     if risk_score > 0.6:
         risk_level = "HIGH"
-        recommendation = "Immediate attention required. Vitals are unstable."
     elif risk_score > 0.3:
         risk_level = "MEDIUM"
-        recommendation = "Monitor closely. Some values are abnormal."
     else:
         risk_level = "LOW"
-        recommendation = "Vitals are within normal range."
-    
+
+    return round(risk_score, 2), risk_level
+
+def _baseline_analysis(heart_rate, avg_hr) -> str:
+    if not avg_hr:
+        return "Offline mode - no AI baseline comparison available"
+    hr_deviation = abs(heart_rate - avg_hr)
+    if hr_deviation > 30:
+        return f"Offline mode: HR deviation of {hr_deviation:.1f} bpm from personal baseline ({avg_hr:.1f} bpm)"
+    return f"Offline mode: HR within {hr_deviation:.1f} bpm of personal baseline ({avg_hr:.1f} bpm)"
+
+def _rule_based_result(risk_score: float, risk_level: str, baseline_analysis: str) -> Dict[str, Any]:
     return {
-        "risk_score": round(risk_score, 2),
+        "risk_score": risk_score,
         "risk_level": risk_level,
-        "recommendation": recommendation,
+        "recommendation": RECOMMENDATIONS[risk_level],
         "baseline_analysis": baseline_analysis
     }
 
+def _calculate_risk_rule_based(heart_rate: int, blood_pressure: str, temperature: float, oxygen_saturation: float, historical_average: dict = None, systolic_bp: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fallback rule-based calculation with baseline comparison, for a single reading.
+    Many readings at once go through calculate_risks_rule_based instead.
+    """
+    avg_hr = historical_average.get('avg_heart_rate') if historical_average else None
+    risk_score, risk_level = score_vitals(
+        heart_rate,
+        systolic_bp if systolic_bp is not None else parse_systolic(blood_pressure),
+        temperature,
+        oxygen_saturation,
+        avg_hr
+    )
+    return _rule_based_result(risk_score, risk_level, _baseline_analysis(heart_rate, avg_hr))
+
+def calculate_risks_rule_based(requests: List[dict]) -> List[Dict[str, Any]]:
+    """
+    Rule-based risk for many readings with one score_vitals_batch call.
+    Each request has calculate_risk's keyword arguments; results match
+    _calculate_risk_rule_based reading for reading.
+    """
+    if not requests:
+        return []
+    avg_hrs = [
+        request["historical_average"].get("avg_heart_rate") if request.get("historical_average") else None
+        for request in requests
+    ]
+    risk_scores, risk_levels = score_vitals_batch(
+        [request["heart_rate"] for request in requests],
+        [
+            request["systolic_bp"] if request.get("systolic_bp") is not None else parse_systolic(request["blood_pressure"])
+            for request in requests
+        ],
+        [request["temperature"] for request in requests],
+        [request["oxygen_saturation"] for request in requests],
+        [avg_hr if avg_hr else np.nan for avg_hr in avg_hrs]
+    )
+    return [
+        _rule_based_result(float(risk_score), str(risk_level), _baseline_analysis(request["heart_rate"], avg_hr))
+        for request, avg_hr, risk_score, risk_level in zip(requests, avg_hrs, risk_scores, risk_levels)
+    ]
+
 async def get_latest_reading_for_prediction(readings: list) -> Dict[str, Any]:
     """
     Get the most recent reading for prediction.
@@ -224,5 +491,6 @@ async def get_latest_reading_for_prediction(readings: list) -> Dict[str, Any]:
         heart_rate=latest_reading.heart_rate,
         blood_pressure=latest_reading.blood_pressure,
         temperature=latest_reading.temperature,
-        oxygen_saturation=latest_reading.oxygen_saturation
+        oxygen_saturation=latest_reading.oxygen_saturation,
+        systolic_bp=latest_reading.systolic_bp
     )
\ No newline at end of file
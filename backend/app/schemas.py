@@ -28,10 +28,38 @@ class MetricsBase(BaseModel):
 class MetricsCreate(MetricsBase):
     pass
 
+class BulkMetricsItem(MetricsBase):
+    patient_id: int
+    recorded_at: Optional[datetime] = None  # Defaults to the time of upload
+
+class BulkMetricsResult(BaseModel):
+    index: int
+    status: str  # created, rejected
+    reading_id: Optional[int] = None
+    warning: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkMetricsResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[BulkMetricsResult]
+
 class PatientReading(MetricsBase):
     id: int
     patient_id: int
     recorded_at: datetime
+    systolic_bp: Optional[int] = None
+    diastolic_bp: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+class ReadingAudit(BaseModel):
+    reading_id: int
+    status: str = Field(..., pattern=r'^(VALID|SUSPICIOUS|PENDING)$')
+    reason: Optional[str] = None
+    source: Optional[str] = None
+    audited_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -51,13 +79,71 @@ class Prediction(PredictionBase):
     class Config:
         from_attributes = True
 
+BASELINE_PATTERN = r'^(lifetime|last_n|last_hours|ewma)$'
+
 class PredictionRequest(BaseModel):
     patient_id: int
+    baseline: str = Field("lifetime", pattern=BASELINE_PATTERN)
+
+class BatchPredictionRequest(BaseModel):
+    patient_ids: List[int] = Field(..., min_length=1, max_length=500)
+    baseline: str = Field("lifetime", pattern=BASELINE_PATTERN)
 
 # Response schemas
 class PatientWithReadings(Patient):
     readings: List[PatientReading] = []
     predictions: List[Prediction] = []
+    # Pass as before= to /readings or /predictions for older rows; None when there are none
+    readings_next_cursor: Optional[str] = None
+    predictions_next_cursor: Optional[str] = None
+
+class ReadingsPage(BaseModel):
+    readings: List[PatientReading]
+    next_cursor: Optional[str] = None  # before= for the next, older page
+    newest_cursor: Optional[str] = None  # after= to poll for newer rows
+
+class PredictionsPage(BaseModel):
+    predictions: List[Prediction]
+    next_cursor: Optional[str] = None
+    newest_cursor: Optional[str] = None
+
+class PatientSummary(Patient):
+    reading_count: int
+    prediction_count: int
+    first_reading_at: Optional[datetime] = None
+    latest_reading: Optional[PatientReading] = None
+    latest_prediction: Optional[Prediction] = None
+
+class VitalsBucket(BaseModel):
+    recorded_at: datetime  # Bucket start
+    count: int
+    heart_rate_min: int
+    heart_rate_avg: float
+    heart_rate_max: int
+    temperature_min: float
+    temperature_avg: float
+    temperature_max: float
+    oxygen_saturation_min: float
+    oxygen_saturation_avg: float
+    oxygen_saturation_max: float
+    systolic_bp_min: int
+    systolic_bp_avg: float
+    systolic_bp_max: int
+
+class VitalsPoint(BaseModel):
+    recorded_at: datetime
+    heart_rate: int
+    temperature: float
+    oxygen_saturation: float
+    systolic_bp: int
+
+class VitalsSeries(BaseModel):
+    patient_id: int
+    mode: str  # bucket, lttb
+    source_points: int  # Readings in the range before aggregation
+    bucket_seconds: Optional[int] = None  # Effective bucket width in bucket mode
+    buckets: List[VitalsBucket] = []
+    readings: List[VitalsPoint] = []
 
 class PaginatedPatients(BaseModel):
     patients: List[Patient]
@@ -66,6 +152,12 @@ class PaginatedPatients(BaseModel):
     per_page: int
     total_pages: int
 
+class CursorPatients(BaseModel):
+    patients: List[Patient]
+    per_page: int
+    next_cursor: Optional[str] = None  # None on the last page
+    approximate_total: Optional[int] = None  # Only with include_total=true
+
 class TriageScore(BaseModel):
     id: int
     patient_id: int
@@ -0,0 +1,176 @@
+"""
+Chart-sized vitals series for one patient.
+
+Two modes, both bounded by a target point count whatever the history length:
+- bucket: min/avg/max per vital over fixed time buckets, aggregated in SQL
+- lttb:   Largest-Triangle-Three-Buckets downsample of the raw readings,
+          which keeps the peaks and dips a chart needs to look right
+"""
+import math
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, func, cast, Integer, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import PatientReading
+from .predictor import parse_systolic
+from .migrations import systolic_expression
+
+SERIES_DEFAULT_POINTS = 500
+SERIES_MAX_POINTS = 5000
+
+def _epoch_seconds(column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.extract("epoch", column)
+    return cast(func.strftime("%s", column), Integer)
+
+def _systolic(dialect_name: str):
+    # Rows written before the typed column existed are parsed until the backfill reaches them
+    return func.coalesce(PatientReading.systolic_bp, systolic_expression(dialect_name))
+
+def _in_range(query, patient_id: int, start: Optional[datetime], end: Optional[datetime]):
+    query = query.where(PatientReading.patient_id == patient_id)
+    if start is not None:
+        query = query.where(PatientReading.recorded_at >= start)
+    if end is not None:
+        query = query.where(PatientReading.recorded_at < end)
+    return query
+
+async def _time_span(db: AsyncSession, patient_id: int, start, end) -> Tuple[Optional[datetime], Optional[datetime], int]:
+    result = await db.execute(_in_range(
+        select(func.min(PatientReading.recorded_at), func.max(PatientReading.recorded_at), func.count(PatientReading.id)),
+        patient_id, start, end
+    ))
+    return tuple(result.one())
+
+async def bucket_series(
+    db: AsyncSession,
+    patient_id: int,
+    points: int = SERIES_DEFAULT_POINTS,
+    bucket_seconds: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> dict:
+    """
+    min/avg/max of every vital per time bucket. The bucket is widened if the
+    requested one would produce more than points buckets over the range.
+    """
+    first, last, count = await _time_span(db, patient_id, start, end)
+    if not count:
+        return {"bucket_seconds": bucket_seconds, "source_points": 0, "buckets": []}
+
+    span = ((end or last) - (start or first)).total_seconds()
+    bucket_seconds = max(bucket_seconds or 1, math.ceil(span / points) if span > 0 else 1, 1)
+
+    dialect_name = db.bind.dialect.name
+    epoch = _epoch_seconds(PatientReading.recorded_at, dialect_name)
+    # extract(epoch) is fractional on PostgreSQL; SQLite's integer division already floors
+    buckets_since_epoch = func.floor(epoch / bucket_seconds) if dialect_name == "postgresql" else epoch // bucket_seconds
+    bucket = (buckets_since_epoch * bucket_seconds).label("bucket")
+
+    values = {
+        "heart_rate": PatientReading.heart_rate,
+        "temperature": PatientReading.temperature,
+        "oxygen_saturation": PatientReading.oxygen_saturation,
+        "systolic_bp": _systolic(dialect_name)
+    }
+    columns = [bucket, func.count(PatientReading.id)]
+    for value in values.values():
+        columns += [func.min(value), func.avg(cast(value, Float)), func.max(value)]
+
+    result = await db.execute(
+        _in_range(select(*columns), patient_id, start, end).group_by(bucket).order_by(bucket)
+    )
+
+    buckets = []
+    for row in result.all():
+        entry = {"recorded_at": datetime.utcfromtimestamp(int(row[0])), "count": row[1]}
+        for i, vital in enumerate(values):
+            low, mean, high = row[2 + i * 3: 5 + i * 3]
+            entry[f"{vital}_min"] = low
+            entry[f"{vital}_avg"] = round(float(mean), 2)
+            entry[f"{vital}_max"] = high
+        buckets.append(entry)
+
+    return {"bucket_seconds": bucket_seconds, "source_points": count, "buckets": buckets}
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps: always the first
+    and last point, plus from each interior bucket the point that forms the
+    largest triangle with the previous pick and the next bucket's average.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    every = (n - 2) / (threshold - 2)
+
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        next_x = x[next_lo:next_hi].mean()
+        next_y = y[next_lo:next_hi].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(area.argmax())
+        picked[i + 1] = previous
+
+    return picked
+
+async def lttb_series(
+    db: AsyncSession,
+    patient_id: int,
+    points: int = SERIES_DEFAULT_POINTS,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> dict:
+    """
+    Raw readings downsampled to at most points rows. Each vital gets an equal
+    share of the budget and rows picked for any vital are returned with all values.
+    """
+    result = await db.execute(_in_range(
+        select(
+            PatientReading.recorded_at,
+            PatientReading.heart_rate,
+            PatientReading.temperature,
+            PatientReading.oxygen_saturation,
+            PatientReading.systolic_bp,
+            PatientReading.blood_pressure
+        ),
+        patient_id, start, end
+    ).order_by(PatientReading.recorded_at, PatientReading.id))
+    rows = result.all()
+    if not rows:
+        return {"source_points": 0, "readings": []}
+
+    times = [row[0] for row in rows]
+    x = np.array([moment.timestamp() for moment in times], dtype=np.float64)
+    series = {
+        "heart_rate": np.array([row[1] for row in rows], dtype=np.float64),
+        "temperature": np.array([row[2] for row in rows], dtype=np.float64),
+        "oxygen_saturation": np.array([row[3] for row in rows], dtype=np.float64),
+        "systolic_bp": np.array([row[4] if row[4] is not None else parse_systolic(row[5]) for row in rows], dtype=np.float64)
+    }
+
+    share = max(points // len(series), 3)
+    keep = np.unique(np.concatenate([lttb_indices(x, y, share) for y in series.values()]))
+
+    readings = []
+    for index in keep.tolist():
+        readings.append({
+            "recorded_at": times[index],
+            "heart_rate": rows[index][1],
+            "temperature": rows[index][2],
+            "oxygen_saturation": rows[index][3],
+            "systolic_bp": int(series["systolic_bp"][index])
+        })
+    return {"source_points": len(rows), "readings": readings}
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, callers that arrive while it is in flight wait for and share its
+    result (or exception). If the first caller is cancelled, the others get a
+    RuntimeError. Nothing is cached once the call has finished.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shield so one impatient follower can't cancel the result for everyone else
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Followers weren't cancelled themselves, so give them an error they can handle
+            future.set_exception(RuntimeError("leader cancelled"))
+            future.exception()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight(),
+            "executed": self.executed,
+            "shared": self.shared
+        }
@@ -0,0 +1,330 @@
+import asyncio
+import heapq
+import os
+from collections import namedtuple
+from itertools import groupby
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import Patient, PatientReading, DataVersion
+from .schemas import TriageScore
+from .conditional import GLOBAL_SCOPE
+
+load_dotenv()
+
+# Seconds between background syncs of readings stored by other processes
+TRIAGE_SYNC_INTERVAL_SECONDS = float(os.getenv("TRIAGE_SYNC_INTERVAL_SECONDS", "2"))
+# Ids below the watermark that every sync reads again: on Postgres a lower id can commit after a higher one
+TRIAGE_SYNC_LAG_READINGS = int(os.getenv("TRIAGE_SYNC_LAG_READINGS", "1000"))
+# A bigger backlog is rebuilt from the latest pairs instead of replayed
+TRIAGE_SYNC_MAX_READINGS = 5000
+
+async def fetch_latest_reading_pairs(db: AsyncSession, patient_ids: Optional[List[int]] = None):
+    """
+    Fetch the latest two readings for every patient in a single windowed query.
+    Rows come back ordered by patient id, newest reading first.
+    """
+    ranked = (
+        select(
+            PatientReading.patient_id,
+            PatientReading.id,
+            PatientReading.heart_rate,
+            PatientReading.temperature,
+            PatientReading.oxygen_saturation,
+            PatientReading.recorded_at,
+            func.row_number().over(
+                partition_by=PatientReading.patient_id,
+                order_by=(PatientReading.recorded_at.desc(), PatientReading.id.desc())
+            ).label("rn")
+        )
+    )
+    if patient_ids is not None:
+        ranked = ranked.where(PatientReading.patient_id.in_(patient_ids))
+    ranked = ranked.subquery()
+
+    result = await db.execute(
+        select(
+            Patient.id,
+            Patient.name,
+            ranked.c.id.label("reading_id"),
+            ranked.c.heart_rate,
+            ranked.c.temperature,
+            ranked.c.oxygen_saturation,
+            ranked.c.recorded_at
+        )
+        .join(ranked, ranked.c.patient_id == Patient.id)
+        .where(ranked.c.rn <= 2)
+        .order_by(Patient.id, ranked.c.rn)
+    )
+    return result.all()
+
+def score_patient(patient_id: int, name: str, latest, older=None) -> TriageScore:
+    """
+    Score one patient from their latest reading and (optionally) the one before it.
+    Urgency = Current Risk + Rate of Change.
+    """
+    current_risk_score = 0.0
+
+    # Simple risk calculation
+    if latest.heart_rate > 100 or latest.heart_rate < 60:
+        current_risk_score += 0.3
+    if latest.temperature > 100.4 or latest.temperature < 96.0:
+        current_risk_score += 0.3
+    if latest.oxygen_saturation < 95:
+        current_risk_score += 0.4
+
+    current_risk_score = min(current_risk_score, 1.0)
+
+    # Determine risk level
+    if current_risk_score > 0.6:
+        current_risk = "HIGH"
+    elif current_risk_score > 0.3:
+        current_risk = "MEDIUM"
+    else:
+        current_risk = "LOW"
+
+    # Calculate rate of change (velocity)
+    rate_of_change = 0.0
+    trend = "STABLE"
+
+    if older is not None:
+        hr_change = latest.heart_rate - older.heart_rate
+        temp_change = latest.temperature - older.temperature
+        spo2_change = older.oxygen_saturation - latest.oxygen_saturation  # Decrease is bad
+
+        # Velocity score based on deterioration
+        if abs(hr_change) > 20:
+            rate_of_change += 0.3
+        if abs(temp_change) > 1.0:
+            rate_of_change += 0.2
+        if spo2_change > 3:  # SpO2 dropping
+            rate_of_change += 0.3
+
+        # Determine trend
+        if hr_change > 20 or temp_change > 1.0 or spo2_change > 3:
+            trend = "DETERIORATING"
+        elif hr_change < -20 or temp_change < -1.0 or spo2_change < -3:
+            trend = "IMPROVING"
+
+    urgency_score = current_risk_score + rate_of_change
+
+    # Build reason
+    reason_parts = []
+    if current_risk == "HIGH":
+        reason_parts.append("High current risk")
+    if trend == "DETERIORATING":
+        reason_parts.append("Vitals deteriorating")
+    elif trend == "IMPROVING":
+        reason_parts.append("Vitals improving")
+    if not reason_parts:
+        reason_parts.append("Stable condition")
+
+    # Every field is computed here, so skip validation
+    return TriageScore.model_construct(
+        id=patient_id,
+        patient_id=patient_id,
+        name=name,
+        urgency_score=round(urgency_score, 2),
+        reason=", ".join(reason_parts),
+        current_risk=current_risk,
+        trend=trend
+    )
+
+def score_rows(rows) -> List[TriageScore]:
+    """
+    Score the rows from fetch_latest_reading_pairs in one pass.
+    Patients without readings never appear in the rows, so they are skipped.
+    """
+    triage_scores = []
+    for patient_id, group in groupby(rows, key=lambda row: row.id):
+        readings = list(group)
+        older = readings[1] if len(readings) >= 2 else None
+        triage_scores.append(score_patient(patient_id, readings[0].name, readings[0], older))
+
+    # Sort by urgency score (descending); stable, so ties keep patient id order
+    triage_scores.sort(key=lambda x: x.urgency_score, reverse=True)
+    return triage_scores
+
+# Just the fields scoring needs, so the index never holds on to ORM objects
+VitalsSnapshot = namedtuple("VitalsSnapshot", "id heart_rate temperature oxygen_saturation recorded_at")
+
+def _snapshot(reading_id: int, reading) -> VitalsSnapshot:
+    return VitalsSnapshot(
+        reading_id,
+        reading.heart_rate,
+        reading.temperature,
+        reading.oxygen_saturation,
+        reading.recorded_at
+    )
+
+class TriageIndex:
+    """
+    In-process triage ranking that is updated as readings arrive instead of
+    being recomputed from the database on every request.
+
+    Patients are kept in a heap of (-urgency, patient_id, version), the same
+    order GET /api/v1/triage returns. An update pushes a new entry in
+    O(log n) and leaves the patient's old entry in place; entries whose
+    version is no longer current are dropped when they reach the top, and the
+    heap is compacted once stale entries outnumber live ones. Top-K pops K live
+    entries and pushes them back, O((K + stale) log n).
+
+    The index lives in this process only. It is rebuilt from the database on
+    startup and fed by the write endpoints of this process; readings stored by
+    other processes are applied by sync_triage_index, which runs in the
+    background. Updates are idempotent per reading id, so a reading seen both
+    ways (or twice by overlapping syncs) counts once. revision moves on every
+    change and versions GET /api/v1/triage/top.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._versions: Dict[int, int] = {}
+        self._scores: Dict[int, TriageScore] = {}
+        self._names: Dict[int, str] = {}
+        self._recent: Dict[int, List[VitalsSnapshot]] = {}
+        self.synced_reading_id = 0
+        self.synced_version = None
+        self.revision = 0
+        self.ready = False
+
+    def __len__(self):
+        return len(self._scores)
+
+    def rebuild(self, rows, synced_reading_id: int = 0, synced_version: Optional[int] = None):
+        """
+        Replace the index contents with rows from fetch_latest_reading_pairs.
+        synced_reading_id and synced_version are the newest reading id and the
+        global data version read before the rows were.
+        """
+        self._heap = []
+        self._versions = {}
+        self._scores = {}
+        self._names = {}
+        self._recent = {}
+        for patient_id, group in groupby(rows, key=lambda row: row.id):
+            readings = list(group)
+            self._names[patient_id] = readings[0].name
+            self._recent[patient_id] = [_snapshot(r.reading_id, r) for r in readings[:2]]
+            self._rescore(patient_id)
+        self.synced_reading_id = synced_reading_id
+        self.synced_version = synced_version
+        self.revision += 1
+        self.ready = True
+
+    def update(self, patient_id: int, name: str, reading):
+        """Account for a newly stored reading; older-than-known readings are placed by recorded_at"""
+        self._names[patient_id] = name
+        snapshot = _snapshot(reading.id, reading)
+        recent = self._recent.setdefault(patient_id, [])
+        if any(known.id == snapshot.id for known in recent):
+            return
+        position = 0
+        while position < len(recent) and recent[position].recorded_at > snapshot.recorded_at:
+            position += 1
+        if position >= 2:
+            return
+        recent.insert(position, snapshot)
+        del recent[2:]
+        self._rescore(patient_id)
+
+    def top(self, k: int) -> List[TriageScore]:
+        live = []
+        while self._heap and len(live) < k:
+            entry = heapq.heappop(self._heap)
+            if self._versions.get(entry[1]) == entry[2]:
+                live.append(entry)
+        for entry in live:
+            heapq.heappush(self._heap, entry)
+        return [self._scores[patient_id] for _, patient_id, _ in live]
+
+    def _rescore(self, patient_id: int):
+        recent = self._recent[patient_id]
+        older = recent[1] if len(recent) >= 2 else None
+        score = score_patient(patient_id, self._names[patient_id], recent[0], older)
+
+        version = self._versions.get(patient_id, 0) + 1
+        self._versions[patient_id] = version
+        self._scores[patient_id] = score
+        self.revision += 1
+        heapq.heappush(self._heap, (-score.urgency_score, patient_id, version))
+        if len(self._heap) > 2 * len(self._scores) + 64:
+            self._compact()
+
+    def _compact(self):
+        """Drop superseded entries; O(n), at most once per n updates"""
+        self._heap = [entry for entry in self._heap if self._versions[entry[1]] == entry[2]]
+        heapq.heapify(self._heap)
+
+triage_index = TriageIndex()
+
+async def _global_version(db: AsyncSession) -> int:
+    result = await db.execute(select(DataVersion.version).where(DataVersion.scope == GLOBAL_SCOPE))
+    return result.scalar() or 0
+
+async def rebuild_triage_index(db: AsyncSession):
+    """Load the latest reading pairs and rebuild the shared index"""
+    # Read the watermarks first; rows stored meanwhile are applied again by the next sync
+    synced_version = await _global_version(db)
+    synced_reading_id = (await db.execute(select(func.max(PatientReading.id)))).scalar() or 0
+    rows = await fetch_latest_reading_pairs(db)
+    triage_index.rebuild(rows, synced_reading_id, synced_version)
+
+async def sync_triage_index(db: AsyncSession):
+    """
+    Apply readings stored since the last sync, whichever process wrote them.
+    Nothing is read unless the global data version moved. The last
+    TRIAGE_SYNC_LAG_READINGS ids below the watermark are read again, so a
+    reading whose id was allocated before a higher one but committed after it
+    is still applied. A backlog larger than TRIAGE_SYNC_MAX_READINGS (e.g.
+    after an import) is cheaper to rebuild from the latest pairs than to replay.
+    """
+    if not triage_index.ready:
+        await rebuild_triage_index(db)
+        return
+
+    synced_version = await _global_version(db)
+    if synced_version == triage_index.synced_version:
+        return
+
+    result = await db.execute(
+        select(
+            PatientReading.patient_id,
+            Patient.name,
+            PatientReading.id,
+            PatientReading.heart_rate,
+            PatientReading.temperature,
+            PatientReading.oxygen_saturation,
+            PatientReading.recorded_at
+        )
+        .join(Patient, Patient.id == PatientReading.patient_id)
+        .where(PatientReading.id > triage_index.synced_reading_id - TRIAGE_SYNC_LAG_READINGS)
+        .order_by(PatientReading.id)
+        .limit(TRIAGE_SYNC_LAG_READINGS + TRIAGE_SYNC_MAX_READINGS + 1)
+    )
+    rows = result.all()
+    if len(rows) > TRIAGE_SYNC_LAG_READINGS + TRIAGE_SYNC_MAX_READINGS:
+        await rebuild_triage_index(db)
+        return
+
+    for row in rows:
+        triage_index.update(row.patient_id, row.name, row)
+    if rows:
+        triage_index.synced_reading_id = max(triage_index.synced_reading_id, rows[-1].id)
+    triage_index.synced_version = synced_version
+
+async def run_triage_sync(interval: float = TRIAGE_SYNC_INTERVAL_SECONDS):
+    """Background task started from the app lifespan: sync the index every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await sync_triage_index(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Triage sync error: {str(e)}")
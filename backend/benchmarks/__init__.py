@@ -0,0 +1 @@
+# Performance benchmarks; run from the backend directory, e.g. python -m benchmarks.serialization
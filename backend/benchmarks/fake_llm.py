@@ -0,0 +1,251 @@
+"""
+Local stand-in for the Hugging Face inference endpoint, with latency and failure injection.
+
+    python -m benchmarks.fake_llm --port 8765 --latency-ms 800 --error-rate 0.05 --malformed-rate 0.02
+    HF_API_URL=http://127.0.0.1:8765/models/fake HUGGINGFACE_API_KEY=fake uvicorn app.main:app
+
+It accepts the same request as HF_API_URL ({"inputs": prompt, "parameters":
+{"max_new_tokens": ...}}) on any /models/... path and answers like the real
+API ([{"generated_text": "..."}]). Single and packed batch prompts for both
+the audit and the risk assessment are recognised. Answers are built from the
+vitals in the prompt with the app's own rules, so they are plausible.
+
+Each request draws one outcome from a seeded generator:
+- error:       503 "model is currently loading", as HF returns while scaling
+- timeout:     the answer is held for --timeout-seconds (longer than HF_TIMEOUT)
+- malformed:   200 with text that isn't valid JSON (truncated or prose)
+- ok:          200 with the JSON answer after a sampled latency
+Requests beyond --max-concurrency get 429 straight away.
+
+Latency is latency_ms scaled by the chosen distribution, plus ms_per_token
+for every requested max_new_tokens, so packed batch prompts cost more.
+GET /stats reports counts per outcome and the peak number in flight.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.predictor import audit_vitals_rules, _calculate_risk_rule_based
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+class FakeInferenceConfig:
+    def __init__(
+        self,
+        latency: str = "lognormal",
+        latency_ms: float = 600.0,
+        latency_spread: float = 0.5,
+        ms_per_token: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0,
+        malformed_rate: float = 0.0,
+        max_concurrency: int = 0,
+        seed: Optional[int] = None
+    ):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        if error_rate + timeout_rate + malformed_rate > 1:
+            raise ValueError("error, timeout and malformed rates add up to more than 1")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.ms_per_token = ms_per_token
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.malformed_rate = malformed_rate
+        self.max_concurrency = max_concurrency
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+def sample_latency(config: FakeInferenceConfig, rng: random.Random, max_new_tokens: int) -> float:
+    """Seconds to wait before answering"""
+    base = config.latency_ms
+    if config.latency == "uniform":
+        base *= rng.uniform(1 - config.latency_spread, 1 + config.latency_spread)
+    elif config.latency == "normal":
+        base = rng.gauss(base, base * config.latency_spread)
+    elif config.latency == "lognormal":
+        # latency_ms is the median; the spread sets how long the tail is
+        base *= rng.lognormvariate(0, config.latency_spread)
+    return max(0.0, base + config.ms_per_token * max_new_tokens) / 1000
+
+_VITALS = {
+    "heart_rate": (re.compile(r"Heart Rate: (\d+)"), int),
+    "temperature": (re.compile(r"Temperature: ([\d.]+)"), float),
+    "oxygen_saturation": (re.compile(r"Oxygen Saturation: ([\d.]+)"), float)
+}
+_BLOOD_PRESSURE = re.compile(r"Blood Pressure: (\d+/\d+)")
+# Single prompts spell the baseline out; packed prompts put it on one line
+_BASELINE_HEART_RATE = re.compile(r"(?:Average Heart Rate:|average HR) ([\d.]+)")
+_PATIENT_BLOCK = re.compile(r"Patient (\d+):")
+
+def parse_prompt(prompt: str) -> Tuple[str, List[Tuple[Optional[int], dict, Optional[dict]]]]:
+    """("audit" or "risk", [(patient number or None, vitals, baseline or None)])"""
+    kind = "audit" if "data quality" in prompt else "risk"
+    parts = _PATIENT_BLOCK.split(prompt)
+    if len(parts) > 1:
+        blocks = [(int(parts[i]), parts[i + 1]) for i in range(1, len(parts) - 1, 2)]
+    else:
+        blocks = [(None, prompt)]
+
+    patients = []
+    for number, block in blocks:
+        vitals = {}
+        for name, (pattern, convert) in _VITALS.items():
+            match = pattern.search(block)
+            vitals[name] = convert(match.group(1)) if match else None
+        match = _BLOOD_PRESSURE.search(block)
+        vitals["blood_pressure"] = match.group(1) if match else "120/80"
+        match = _BASELINE_HEART_RATE.search(block)
+        baseline = {"avg_heart_rate": float(match.group(1))} if match else None
+        patients.append((number, vitals, baseline))
+    return kind, patients
+
+def answer(kind: str, vitals: dict, baseline: Optional[dict]) -> dict:
+    if kind == "audit":
+        verdict = audit_vitals_rules(vitals)
+        return {
+            "plausible": verdict is None,
+            "reason": verdict["reason"] if verdict else "Values are within physiological ranges"
+        }
+    risk = _calculate_risk_rule_based(
+        vitals["heart_rate"] or 75, vitals["blood_pressure"], vitals["temperature"] or 98.6,
+        vitals["oxygen_saturation"] or 98.0, baseline
+    )
+    analysis = risk["baseline_analysis"]
+    risk["baseline_analysis"] = "No baseline data" if baseline is None else analysis.replace("Offline mode: ", "")
+    return risk
+
+def generated_text(prompt: str) -> str:
+    kind, patients = parse_prompt(prompt)
+    if patients[0][0] is None:
+        _, vitals, baseline = patients[0]
+        return json.dumps(answer(kind, vitals, baseline))
+    return json.dumps([{"id": number, **answer(kind, vitals, baseline)} for number, vitals, baseline in patients])
+
+def _malformed(text: str, rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return text[:max(1, len(text) // 2)]
+    return "I'm sorry, but I can't provide a medical assessment without more context."
+
+def create_app(config: FakeInferenceConfig) -> FastAPI:
+    app = FastAPI(title="Fake inference endpoint")
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "in_flight": 0, "peak_in_flight": 0, "batch_prompts": 0,
+             "ok": 0, "error": 0, "timeout": 0, "malformed": 0, "rate_limited": 0}
+
+    @app.post("/models/{model:path}")
+    async def generate(model: str, request: Request):
+        stats["requests"] += 1
+        if config.max_concurrency and stats["in_flight"] >= config.max_concurrency:
+            stats["rate_limited"] += 1
+            return JSONResponse({"error": "Rate limit reached. Please retry later."}, status_code=429)
+
+        payload = await request.json()
+        prompt = payload.get("inputs", "")
+        max_new_tokens = int(payload.get("parameters", {}).get("max_new_tokens", 250))
+        if _PATIENT_BLOCK.search(prompt):
+            stats["batch_prompts"] += 1
+
+        draw = rng.random()
+        delay = sample_latency(config, rng, max_new_tokens)
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            if draw < config.error_rate:
+                stats["error"] += 1
+                await asyncio.sleep(delay / 10)
+                return JSONResponse(
+                    {"error": f"Model {model} is currently loading", "estimated_time": 20.0},
+                    status_code=503
+                )
+            if draw < config.error_rate + config.timeout_rate:
+                stats["timeout"] += 1
+                await asyncio.sleep(config.timeout_seconds)
+                return JSONResponse({"error": "Model took too long to respond"}, status_code=504)
+
+            await asyncio.sleep(delay)
+            text = generated_text(prompt)
+            if draw < config.error_rate + config.timeout_rate + config.malformed_rate:
+                stats["malformed"] += 1
+                text = _malformed(text, rng)
+            else:
+                stats["ok"] += 1
+            return [{"generated_text": text}]
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "config": config.as_dict()}
+
+    app.state.stats = stats
+    return app
+
+def add_arguments(parser: argparse.ArgumentParser, prefix: str = ""):
+    """Fake server options, optionally prefixed (benchmarks.run uses --llm-...)"""
+    parser.add_argument(f"--{prefix}latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument(f"--{prefix}latency-ms", type=float, default=600.0, help="Median (lognormal) or mean latency")
+    parser.add_argument(f"--{prefix}latency-spread", type=float, default=0.5, help="Relative spread of the distribution")
+    parser.add_argument(f"--{prefix}ms-per-token", type=float, default=0.0, help="Extra latency per requested max_new_tokens")
+    parser.add_argument(f"--{prefix}error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument(f"--{prefix}timeout-rate", type=float, default=0.0, help="Share of requests held for --timeout-seconds")
+    parser.add_argument(f"--{prefix}timeout-seconds", type=float, default=30.0)
+    parser.add_argument(f"--{prefix}malformed-rate", type=float, default=0.0, help="Share of answers that aren't valid JSON")
+    parser.add_argument(f"--{prefix}max-concurrency", type=int, default=0, help="Answer 429 above this many in flight (0: no limit)")
+
+def config_from_args(args, prefix: str = "", seed: Optional[int] = None) -> FakeInferenceConfig:
+    option = lambda name: getattr(args, f"{prefix}{name}".replace("-", "_"))
+    return FakeInferenceConfig(
+        latency=option("latency"),
+        latency_ms=option("latency_ms"),
+        latency_spread=option("latency_spread"),
+        ms_per_token=option("ms_per_token"),
+        error_rate=option("error_rate"),
+        timeout_rate=option("timeout_rate"),
+        timeout_seconds=option("timeout_seconds"),
+        malformed_rate=option("malformed_rate"),
+        max_concurrency=option("max_concurrency"),
+        seed=seed
+    )
+
+async def serve(config: FakeInferenceConfig, host: str = "127.0.0.1", port: int = 0):
+    """Start the fake server on the running loop; returns (server, task, base URL)"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(config), host=host, port=port, log_level="warning", timeout_graceful_shutdown=1
+    ))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # Raises why it couldn't start
+        await asyncio.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://{host}:{bound_port}"
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Hugging Face inference endpoint with failure injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, help="Seed for latencies and outcomes")
+    add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        config = config_from_args(args, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"HF_API_URL=http://{args.host}:{args.port}/models/fake")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
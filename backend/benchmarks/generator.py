@@ -0,0 +1,145 @@
+"""
+Seeded synthetic hospital data: N patients x M readings.
+
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db python -m benchmarks.generator --patients 500 --readings 200
+
+The same seed always produces the same rows. Each patient gets their own
+resting vitals (drawn around adult population norms) plus per-reading noise.
+About DETERIORATION_RATE of patients go through a deterioration episode:
+heart rate and temperature climb, SpO2 and systolic pressure fall, then
+recover. Some episodes are still under way at the last reading, so triage has
+patients currently getting worse.
+
+Readings go through the importer's insert path (with rule-based audits), and
+lifetime baselines are rebuilt at the end, as after a real import.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import insert
+
+from app.models import Patient, split_blood_pressure
+from app.ingest import insert_readings, rule_verdict
+from app.baselines import backfill
+
+DEFAULT_SEED = 42
+DETERIORATION_RATE = 0.15
+READING_INTERVAL = timedelta(minutes=15)
+SERIES_START = datetime(2024, 1, 1)
+INSERT_CHUNK_SIZE = 5000
+
+_FIRST_NAMES = ["Ana", "Ben", "Chloe", "David", "Elif", "Farah", "George", "Hana", "Ivan", "Julia",
+                "Kenji", "Lena", "Marco", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tariq"]
+_LAST_NAMES = ["Alvarez", "Brown", "Chen", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ito", "Jones",
+               "Kowalski", "Lopez", "Mensah", "Novak", "Okafor", "Patel", "Rossi", "Singh", "Tanaka", "Weber"]
+
+def _clip(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+def generate_patients(rng: random.Random, count: int, seed: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+            "age": int(_clip(rng.gauss(58, 18), 18, 99)),
+            "medical_record_number": f"SYN-{seed}-{i:06d}",
+            "created_at": SERIES_START + timedelta(seconds=i)
+        }
+        for i in range(1, count + 1)
+    ]
+
+def _episode(rng: random.Random, count: int):
+    """(start, peak, end) reading indexes of a deterioration episode, or None"""
+    if count < 8 or rng.random() >= DETERIORATION_RATE:
+        return None
+    length = rng.randint(max(4, count // 10), max(5, count // 3))
+    # A third of episodes are still developing at the last reading
+    if rng.random() < 1 / 3:
+        start = count - length // 2
+        return start, count - 1, start + length
+    start = rng.randint(0, count - length)
+    return start, start + length // 2, start + length
+
+def _severity(index: int, episode) -> float:
+    """0 outside the episode, ramping to 1 at its peak and back down"""
+    if episode is None:
+        return 0.0
+    start, peak, end = episode
+    if index < start or index >= end:
+        return 0.0
+    if index <= peak:
+        return (index - start + 1) / (peak - start + 1)
+    return (end - index) / (end - peak)
+
+def generate_readings(rng: random.Random, patient_id: int, count: int) -> Iterator[dict]:
+    heart_rate = rng.gauss(74, 9)
+    temperature = rng.gauss(98.2, 0.35)
+    oxygen_saturation = _clip(rng.gauss(97.5, 1.0), 94.0, 99.5)
+    systolic = rng.gauss(122, 13)
+    diastolic = systolic * 0.65 + rng.gauss(0, 4)
+    episode = _episode(rng, count)
+
+    for n in range(count):
+        severity = _severity(n, episode)
+        systolic_now = int(_clip(rng.gauss(systolic - 22 * severity, 6), 70, 200))
+        diastolic_now = int(_clip(rng.gauss(diastolic - 12 * severity, 4), 40, systolic_now - 10))
+        blood_pressure = f"{systolic_now}/{diastolic_now}"
+        systolic_bp, diastolic_bp = split_blood_pressure(blood_pressure)
+        yield {
+            "patient_id": patient_id,
+            "blood_pressure": blood_pressure,
+            "systolic_bp": systolic_bp,
+            "diastolic_bp": diastolic_bp,
+            "heart_rate": int(_clip(rng.gauss(heart_rate + 38 * severity, 4), 35, 190)),
+            "temperature": round(_clip(rng.gauss(temperature + 3.2 * severity, 0.2), 95.0, 106.0), 1),
+            "oxygen_saturation": round(_clip(rng.gauss(oxygen_saturation - 9 * severity, 0.6), 75.0, 100.0), 1),
+            "recorded_at": SERIES_START + READING_INTERVAL * n
+        }
+
+async def generate(db, patients: int, readings: int, seed: int = DEFAULT_SEED) -> dict:
+    """Insert the synthetic data set into an empty database; returns row counts"""
+    rng = random.Random(seed)
+    patient_rows = generate_patients(rng, patients, seed)
+    await db.execute(insert(Patient), patient_rows)
+
+    chunk = []
+    total = 0
+    audited_at = SERIES_START + READING_INTERVAL * readings
+    for patient in patient_rows:
+        for row in generate_readings(rng, patient["id"], readings):
+            chunk.append(row)
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                await insert_readings(db, chunk, [rule_verdict(r) for r in chunk], audited_at)
+                total += len(chunk)
+                chunk = []
+    if chunk:
+        await insert_readings(db, chunk, [rule_verdict(r) for r in chunk], audited_at)
+        total += len(chunk)
+    await db.commit()
+
+    baselines = await backfill(db)
+    return {"seed": seed, "patients": len(patient_rows), "readings": total, "baselines": baselines}
+
+async def _main(args):
+    from app.database import AsyncSessionLocal, create_tables
+
+    await create_tables()
+    started = time.monotonic()
+    async with AsyncSessionLocal() as db:
+        stats = await generate(db, args.patients, args.readings, args.seed)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    print(json.dumps(stats))
+    print("Running API processes pick up the generated data at their next triage sync; no restart needed.", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with seeded synthetic patients and vitals")
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=100, help="Readings per patient")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,226 @@
+"""
+End-to-end benchmark of every API endpoint against a seeded SQLite database.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --patients 1000 --readings 200 --requests 500 --concurrency 16
+    python -m benchmarks.run --workload patient_detail --workload triage --compare results/before.json
+
+Fully offline: the database is a fresh SQLite file generated by
+benchmarks.generator, and requests go through an in-process ASGI client (no
+sockets), with the app's lifespan running as it does under uvicorn. Latencies
+therefore include the client and event loop, not the network.
+
+By default the Hugging Face key is blanked, so predictions and audits take the
+rule-based path. With --llm fake they go to benchmarks.fake_llm instead,
+started on a local port, so the inference path (timeouts, fallbacks, breaker,
+batching) is measured too:
+
+    python -m benchmarks.run --llm fake --llm-latency-ms 400 --llm-error-rate 0.05 --llm-timeout-rate 0.02
+
+Every workload runs --requests requests (scaled by its share) at
+--concurrency. The JSON report has p50/p95/p99 latency, throughput and status
+codes per endpoint, plus the run settings, so two reports can be compared
+with --compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Offline, throwaway environment before anything imports the app
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='healthcare-bench-')}/bench.db"
+os.environ["HUGGINGFACE_API_KEY"] = ""
+os.environ["LLM_CACHE_PATH"] = ""
+
+import httpx
+
+from app.database import AsyncSessionLocal, create_tables
+from app.main import app
+from app import predictor
+from benchmarks.generator import generate, DEFAULT_SEED
+from benchmarks.workloads import select_workloads
+from benchmarks import fake_llm
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def latency_summary(latencies_ms: list) -> dict:
+    if not latencies_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    if len(latencies_ms) == 1:
+        cuts = latencies_ms * 99
+    else:
+        cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "max_ms": round(max(latencies_ms), 3)
+    }
+
+async def run_workload(client: httpx.AsyncClient, workload, requests: int, concurrency: int, rng: random.Random, patient_ids) -> dict:
+    # Build every request up front so the random stream doesn't depend on completion order
+    planned = [workload.build(rng, patient_ids) for _ in range(requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    status_codes = {}
+    errors = 0
+
+    async def send(spec: dict):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(workload.method, **spec)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+        status_codes[status] = status_codes.get(status, 0) + 1
+        if not status.startswith("2"):
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(spec) for spec in planned))
+    wall = time.perf_counter() - started
+
+    return {
+        "method": workload.method,
+        "path": planned[0]["url"].split("?")[0] if planned else None,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_codes": status_codes,
+        **latency_summary(latencies),
+        "throughput_rps": round(requests / wall, 2) if wall > 0 else None,
+        "wall_seconds": round(wall, 3)
+    }
+
+async def run(args) -> dict:
+    workloads = select_workloads(args.workload)
+    llm_config = fake_llm.config_from_args(args, "llm_", seed=args.seed) if args.llm == "fake" else None
+    await create_tables()
+    started = time.monotonic()
+    async with AsyncSessionLocal() as db:
+        seeded = await generate(db, args.patients, args.readings, args.seed)
+    seed_seconds = round(time.monotonic() - started, 2)
+    print(f"Seeded {seeded['patients']} patients, {seeded['readings']} readings in {seed_seconds}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "sqlite",
+            "llm": args.llm,
+            "llm_config": llm_config.as_dict() if llm_config else None,
+            "seed": args.seed,
+            "patients": args.patients,
+            "readings_per_patient": args.readings,
+            "requests": args.requests,
+            "concurrency": args.concurrency
+        },
+        "setup": {"seed_seconds": seed_seconds, **seeded},
+        "endpoints": {}
+    }
+
+    patient_ids = list(range(1, args.patients + 1))
+    llm_server = None
+    if llm_config:
+        llm_server, llm_task, llm_url = await fake_llm.serve(llm_config)
+        # predictor read both at import; point the loaded module at the fake server
+        predictor.HF_API_KEY = "fake"
+        predictor.HF_API_URL = f"{llm_url}/models/fake"
+        print(f"Fake inference endpoint at {predictor.HF_API_URL}", file=sys.stderr)
+
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport doesn't send lifespan events, so run the app's lifespan around the client
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+            for workload in workloads:
+                requests = max(1, int(args.requests * workload.share))
+                # Seeded per workload, so a --workload subset sends the same requests as a full run
+                rng = random.Random(f"{args.seed}:{workload.name}")
+                result = await run_workload(client, workload, requests, args.concurrency, rng, patient_ids)
+                report["endpoints"][workload.name] = result
+                print(
+                    f"{workload.name:22} p50 {result['p50_ms']:9.2f}  p95 {result['p95_ms']:9.2f}  "
+                    f"p99 {result['p99_ms']:9.2f} ms  {result['throughput_rps']:8.1f} req/s  errors {result['errors']}",
+                    file=sys.stderr
+                )
+            # Breaker, cache and batcher counters for the whole run
+            report["inference"] = (await client.get("/api/v1/inference/status")).json()
+
+    if llm_server is not None:
+        report["llm_server"] = {key: value for key, value in llm_server.config.app.state.stats.items() if key != "in_flight"}
+        llm_server.should_exit = True
+        await llm_task
+    return report
+
+def compare_reports(before: dict, after: dict) -> list:
+    """Per endpoint p50/p95/p99 and throughput change from before to after, as printable lines"""
+    lines = [f"{'endpoint':22} {'p50':>18} {'p95':>18} {'p99':>18} {'req/s':>18}"]
+    for name, new in after["endpoints"].items():
+        old = before["endpoints"].get(name)
+        if old is None:
+            lines.append(f"{name:22} (not in the earlier report)")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if not old.get(key) or new.get(key) is None:
+                cells.append(f"{'-':>18}")
+                continue
+            change = (new[key] - old[key]) / old[key] * 100
+            cells.append(f"{new[key]:>9.2f} ({change:+6.1f}%)")
+        lines.append(f"{name:22} " + " ".join(cells))
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint offline against seeded SQLite data")
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=100, help="Readings per patient")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per workload (before its share)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workload", action="append", help="Run only these workloads (repeatable)")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier report to compare this run with")
+    parser.add_argument("--llm", choices=["offline", "fake"], default="offline", help="Rule-based fallback, or the fake inference server")
+    fake_llm.add_arguments(parser, prefix="llm-")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run(args))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Report written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            print("\n".join(compare_reports(json.load(handle), report)))
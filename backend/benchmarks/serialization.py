@@ -0,0 +1,185 @@
+"""
+Compare the fast read path (column tuples + orjson) with the pydantic path it
+replaced, for patient detail, patient list and triage.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --patients 5000 --readings 20000 --iterations 50
+
+Runs against a throwaway SQLite file. The fast path is timed through the real
+endpoint functions (with the response cache cleared before every call, so each
+call renders); the pydantic path loads ORM entities and validates them into the
+response schemas, as the endpoints did before. Both bodies are checked to be
+the same JSON before anything is timed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before anything imports app.database
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='healthcare-bench-')}/bench.db"
+os.environ.pop("HUGGINGFACE_API_KEY", None)
+
+from fastapi import Request
+from pydantic import TypeAdapter
+from sqlalchemy import select, func, insert
+
+from app.database import AsyncSessionLocal, create_tables
+from app.models import Patient, PatientReading, Prediction
+from app.schemas import PatientWithReadings, PaginatedPatients, TriageScore
+from app.conditional import response_cache
+from app.pagination import encode_cursor
+from app.main import get_patient_details, list_patients, get_triage_list
+from app.triage import fetch_latest_reading_pairs, score_rows
+
+def _request(path: str, query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+async def seed(patients: int, readings: int, predictions: int):
+    """Every patient gets two readings (for triage); patient 1 gets the long history"""
+    started = datetime(2024, 1, 1)
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Patient), [
+            {"id": i, "name": f"Patient {i}", "age": 20 + i % 70, "medical_record_number": f"BENCH-{i:06d}",
+             "created_at": started + timedelta(seconds=i)}
+            for i in range(1, patients + 1)
+        ])
+        rows = [
+            {"patient_id": i, "blood_pressure": "120/80", "systolic_bp": 120, "diastolic_bp": 80,
+             "heart_rate": 60 + (i * 7 + n * 13) % 60, "temperature": 97.0 + (i % 40) / 10,
+             "oxygen_saturation": 90.0 + (i + n) % 10, "recorded_at": started + timedelta(hours=n)}
+            for i in range(2, patients + 1) for n in range(2)
+        ]
+        rows += [
+            {"patient_id": 1, "blood_pressure": f"{110 + n % 40}/{70 + n % 20}", "systolic_bp": 110 + n % 40,
+             "diastolic_bp": 70 + n % 20, "heart_rate": 55 + n % 70, "temperature": 97.0 + (n % 35) / 10,
+             "oxygen_saturation": 88.0 + (n % 12) + 0.5, "recorded_at": started + timedelta(minutes=5 * n)}
+            for n in range(readings)
+        ]
+        await db.execute(insert(PatientReading), rows)
+        await db.execute(insert(Prediction), [
+            {"patient_id": 1, "risk_score": round((n % 100) / 100, 2), "risk_level": ("LOW", "MEDIUM", "HIGH")[n % 3],
+             "recommendation": "Continue routine monitoring.", "created_at": started + timedelta(hours=n)}
+            for n in range(predictions)
+        ])
+        await db.commit()
+
+# The pydantic path: ORM entities validated into the response schemas
+
+_detail_adapter = TypeAdapter(PatientWithReadings)
+_list_adapter = TypeAdapter(PaginatedPatients)
+_triage_adapter = TypeAdapter(list[TriageScore])
+
+async def pydantic_detail(db, patient_id: int, limit: int) -> bytes:
+    patient = (await db.execute(select(Patient).where(Patient.id == patient_id))).scalar_one()
+    readings = (await db.execute(
+        select(PatientReading).where(PatientReading.patient_id == patient_id)
+        .order_by(PatientReading.recorded_at.desc(), PatientReading.id.desc()).limit(limit + 1)
+    )).scalars().all()
+    predictions = (await db.execute(
+        select(Prediction).where(Prediction.patient_id == patient_id)
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit + 1)
+    )).scalars().all()
+    readings_next = encode_cursor(readings[limit - 1].recorded_at, readings[limit - 1].id) if len(readings) > limit else None
+    predictions_next = encode_cursor(predictions[limit - 1].created_at, predictions[limit - 1].id) if len(predictions) > limit else None
+    return _detail_adapter.dump_json(PatientWithReadings(
+        id=patient.id,
+        name=patient.name,
+        age=patient.age,
+        medical_record_number=patient.medical_record_number,
+        created_at=patient.created_at,
+        readings=readings[:limit],
+        predictions=predictions[:limit],
+        readings_next_cursor=readings_next,
+        predictions_next_cursor=predictions_next
+    ))
+
+async def pydantic_list(db, page: int, per_page: int) -> bytes:
+    total = (await db.execute(select(func.count(Patient.id)))).scalar()
+    patients = (await db.execute(
+        select(Patient).order_by(Patient.created_at.desc()).offset((page - 1) * per_page).limit(per_page)
+    )).scalars().all()
+    return _list_adapter.dump_json(PaginatedPatients(
+        patients=patients, total=total, page=page, per_page=per_page, total_pages=-(-total // per_page)
+    ))
+
+async def pydantic_triage(db) -> bytes:
+    scores = score_rows(await fetch_latest_reading_pairs(db))
+    # score_patient used to validate every TriageScore it built
+    return _triage_adapter.dump_json([TriageScore(**dict(score)) for score in scores])
+
+async def _timed(call, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        response_cache.invalidate(None)
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def _summary(timings: list) -> dict:
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3)
+    }
+
+async def run(args) -> dict:
+    await create_tables()
+    await seed(args.patients, args.readings, args.predictions)
+
+    report = {"patients": args.patients, "readings": args.readings, "limit": args.limit, "endpoints": {}}
+    async with AsyncSessionLocal() as db:
+        cases = {
+            "patient_detail": (
+                lambda: get_patient_details(_request("/api/v1/patients/1", f"limit={args.limit}"), 1, args.limit, None, None, db),
+                lambda: pydantic_detail(db, 1, args.limit)
+            ),
+            "patient_list": (
+                lambda: list_patients(page=2, per_page=100, cursor=None, include_total=False, db=db),
+                lambda: pydantic_list(db, 2, 100)
+            ),
+            "triage": (
+                lambda: get_triage_list(_request("/api/v1/triage"), db),
+                lambda: pydantic_triage(db)
+            )
+        }
+
+        for name, (fast, slow) in cases.items():
+            response_cache.invalidate(None)
+            fast_body, slow_body = (await fast()).body, await slow()
+            if json.loads(fast_body) != json.loads(slow_body):
+                raise SystemExit(f"{name}: fast and pydantic paths returned different JSON")
+
+            # Warm up both paths before timing
+            await _timed(fast, 3)
+            await _timed(slow, 3)
+            fast_stats = _summary(await _timed(fast, args.iterations))
+            slow_stats = _summary(await _timed(slow, args.iterations))
+            report["endpoints"][name] = {
+                "bytes": len(fast_body),
+                "fast": fast_stats,
+                "pydantic": slow_stats,
+                "speedup_p50": round(slow_stats["p50_ms"] / fast_stats["p50_ms"], 2)
+            }
+            print(
+                f"{name:15} fast p50 {fast_stats['p50_ms']:8.2f} ms   pydantic p50 {slow_stats['p50_ms']:8.2f} ms   "
+                f"x{report['endpoints'][name]['speedup_p50']}",
+                file=sys.stderr
+            )
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fast read path against the pydantic path")
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--readings", type=int, default=5000, help="Readings in the long-history patient")
+    parser.add_argument("--predictions", type=int, default=1000, help="Predictions for the long-history patient")
+    parser.add_argument("--limit", type=int, default=1000, help="Readings and predictions per detail response")
+    parser.add_argument("--iterations", type=int, default=30)
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
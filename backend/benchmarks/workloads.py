@@ -0,0 +1,99 @@
+"""
+Scripted request mixes, one per endpoint.
+
+Each workload builds one request at a time from a seeded random generator, so
+runs with the same seed send the same requests. share scales the run's request
+count for workloads that are much heavier than one ordinary request.
+"""
+import json
+import random
+from collections import namedtuple
+from typing import List
+
+Workload = namedtuple("Workload", ["name", "method", "share", "build"])
+
+def _vitals(rng: random.Random) -> dict:
+    systolic = rng.randint(100, 150)
+    return {
+        "blood_pressure": f"{systolic}/{rng.randint(60, min(systolic - 20, 100))}",
+        "heart_rate": rng.randint(55, 130),
+        "temperature": round(rng.uniform(97.0, 102.0), 1),
+        "oxygen_saturation": round(rng.uniform(88.0, 99.5), 1)
+    }
+
+def _patient(rng: random.Random, patient_ids: List[int]) -> int:
+    return rng.choice(patient_ids)
+
+def _new_patient(rng: random.Random) -> dict:
+    # Record numbers only need to be unique within a run; every run seeds a fresh database
+    return {
+        "name": f"Bench Patient {rng.randint(1, 10**6)}",
+        "age": rng.randint(18, 95),
+        "medical_record_number": f"BENCH-{rng.getrandbits(48):012x}"
+    }
+
+def _reading_id(rng: random.Random, patient_ids: List[int]) -> int:
+    # The generator stores at least one reading per patient, so ids up to the patient count always exist
+    return rng.randint(1, len(patient_ids))
+
+def _bulk_body(rng: random.Random, patient_ids: List[int]) -> bytes:
+    lines = [json.dumps({"patient_id": _patient(rng, patient_ids), **_vitals(rng)}) for _ in range(100)]
+    return "\n".join(lines).encode()
+
+def _ward_body(rng: random.Random, patient_ids: List[int]) -> bytes:
+    """One reading for every patient, as a monitoring gateway pushes each interval"""
+    lines = [json.dumps({"patient_id": patient_id, **_vitals(rng)}) for patient_id in patient_ids]
+    return "\n".join(lines).encode()
+
+# Reads first, then writes (which invalidate cached responses), then triage again on the changed data
+WORKLOADS = [
+    Workload("triage", "GET", 0.25, lambda rng, ids: {"url": "/api/v1/triage"}),
+    Workload("triage_top", "GET", 1.0, lambda rng, ids: {"url": "/api/v1/triage/top?k=10"}),
+    Workload("patient_list", "GET", 1.0, lambda rng, ids: {
+        "url": f"/api/v1/patients?page={rng.randint(1, max(1, len(ids) // 20))}&per_page=20"
+    }),
+    Workload("patient_list_cursor", "GET", 1.0, lambda rng, ids: {"url": "/api/v1/patients?cursor=&per_page=50"}),
+    Workload("patient_detail", "GET", 1.0, lambda rng, ids: {"url": f"/api/v1/patients/{_patient(rng, ids)}"}),
+    Workload("patient_summary", "GET", 1.0, lambda rng, ids: {"url": f"/api/v1/patients/{_patient(rng, ids)}/summary"}),
+    Workload("patient_readings", "GET", 1.0, lambda rng, ids: {
+        "url": f"/api/v1/patients/{_patient(rng, ids)}/readings?limit=100"
+    }),
+    Workload("vitals_series", "GET", 1.0, lambda rng, ids: {
+        "url": f"/api/v1/patients/{_patient(rng, ids)}/vitals/series?points=400&mode={rng.choice(['bucket', 'lttb'])}"
+    }),
+    Workload("reading_audit", "GET", 1.0, lambda rng, ids: {"url": f"/api/v1/readings/{_reading_id(rng, ids)}/audit"}),
+    Workload("export_readings", "GET", 0.25, lambda rng, ids: {
+        "url": f"/api/v1/export/readings?format={rng.choice(['arrow', 'parquet'])}&patient_id={_patient(rng, ids)}"
+    }),
+    Workload("create_patient", "POST", 1.0, lambda rng, ids: {"url": "/api/v1/patients", "json": _new_patient(rng)}),
+    Workload("log_metrics", "POST", 1.0, lambda rng, ids: {
+        "url": f"/api/v1/patients/{_patient(rng, ids)}/metrics", "json": _vitals(rng)
+    }),
+    Workload("bulk_metrics", "POST", 0.1, lambda rng, ids: {
+        "url": "/api/v1/metrics/bulk", "content": _bulk_body(rng, ids),
+        "headers": {"Content-Type": "application/x-ndjson"}
+    }),
+    Workload("bulk_metrics_ward", "POST", 0.05, lambda rng, ids: {
+        "url": "/api/v1/metrics/bulk", "content": _ward_body(rng, ids),
+        "headers": {"Content-Type": "application/x-ndjson"}
+    }),
+    Workload("prediction", "POST", 1.0, lambda rng, ids: {
+        "url": "/api/v1/predictions",
+        "json": {"patient_id": _patient(rng, ids), "baseline": rng.choice(["lifetime", "last_n", "ewma"])}
+    }),
+    Workload("batch_predictions", "POST", 0.1, lambda rng, ids: {
+        "url": "/api/v1/predictions/batch", "json": {"patient_ids": rng.sample(ids, min(20, len(ids)))}
+    }),
+    # Whole-table export of everything the prediction workloads just stored
+    Workload("export_predictions", "GET", 0.05, lambda rng, ids: {"url": "/api/v1/export/predictions?format=arrow"}),
+    Workload("triage_after_writes", "GET", 0.25, lambda rng, ids: {"url": "/api/v1/triage"})
+]
+
+def select_workloads(names: List[str] = None) -> List[Workload]:
+    if not names:
+        return WORKLOADS
+    known = {workload.name: workload for workload in WORKLOADS}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown workload(s): {', '.join(unknown)}; choose from {', '.join(known)}")
+    return [known[name] for name in names]
@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_db_dir = tempfile.mkdtemp(prefix="healthcare-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ.pop("HUGGINGFACE_API_KEY", None)
+
+import pytest_asyncio
+
+from app.database import Base, engine, AsyncSessionLocal
+from app.conditional import changes
+
+@pytest_asyncio.fixture
+async def db():
+    """Fresh schema per test, with no data versions or responses cached from the last one"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    changes.bump_all()
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,138 @@
+import asyncio
+import httpx
+import pytest
+
+from app import main, audit_worker
+from app.audit_worker import AuditWorkerPool
+from app.models import Patient
+
+NORMAL_VITALS = {"blood_pressure": "120/80", "heart_rate": 72, "temperature": 98.6, "oxygen_saturation": 98.0}
+
+@pytest.fixture
+def gated_audit(monkeypatch):
+    """Replace the LLM audit with one that waits for the test to release it"""
+    gate = asyncio.Event()
+    seen = []
+
+    async def audit_vitals_ai(vitals):
+        seen.append(vitals)
+        await gate.wait()
+        return {"status": "SUSPICIOUS", "reason": "AI flagged: implausible for this patient"}
+
+    monkeypatch.setattr(audit_worker, "audit_vitals_ai", audit_vitals_ai)
+    monkeypatch.setattr(main, "AUDIT_MODE", "async")
+    return gate, seen
+
+async def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+async def _patient(db):
+    db.add(Patient(id=1, name="Audited", age=40, medical_record_number="AW1"))
+    await db.commit()
+
+@pytest.mark.asyncio
+async def test_pending_audit_becomes_ai_verdict(db, gated_audit, monkeypatch):
+    gate, seen = gated_audit
+    await _patient(db)
+    pool = AuditWorkerPool(workers=1, queue_size=10)
+    monkeypatch.setattr(main, "audit_pool", pool)
+    await pool.start()
+
+    try:
+        async with await _client() as client:
+            logged = (await client.post("/api/v1/patients/1/metrics", json=NORMAL_VITALS)).json()
+            assert logged["data"]["audit_status"] == "PENDING"
+            reading_id = logged["data"]["reading_id"]
+
+            pending = (await client.get(f"/api/v1/readings/{reading_id}/audit")).json()
+            assert pending == {"reading_id": reading_id, "status": "PENDING", "reason": None, "source": None, "audited_at": None}
+
+            gate.set()
+            await pool._queue.join()
+
+            audit = (await client.get(f"/api/v1/readings/{reading_id}/audit")).json()
+            assert audit["status"] == "SUSPICIOUS"
+            assert audit["source"] == "AI"
+            assert audit["reason"] == "AI flagged: implausible for this patient"
+            assert audit["audited_at"] is not None
+    finally:
+        gate.set()
+        await pool.close()
+
+    assert seen == [NORMAL_VITALS]
+    assert pool.stats()["submitted"] == 1
+    assert pool.stats()["completed"] == 1
+
+@pytest.mark.asyncio
+async def test_full_queue_falls_back_to_rules_verdict(db, gated_audit, monkeypatch):
+    gate, _ = gated_audit
+    await _patient(db)
+    # One reading held by the worker, one waiting in the queue, the rest rejected
+    pool = AuditWorkerPool(workers=1, queue_size=1)
+    monkeypatch.setattr(main, "audit_pool", pool)
+    await pool.start()
+
+    try:
+        async with await _client() as client:
+            logged = []
+            for _ in range(4):
+                response = await client.post("/api/v1/patients/1/metrics", json=NORMAL_VITALS)
+                logged.append(response.json()["data"])
+
+            statuses = [entry["audit_status"] for entry in logged]
+            assert statuses[-1] == "VALID"
+            assert pool.rejected == statuses.count("VALID") >= 2
+
+            rejected_id = logged[-1]["reading_id"]
+            audit = (await client.get(f"/api/v1/readings/{rejected_id}/audit")).json()
+            assert audit["status"] == "VALID"
+            assert audit["source"] == "RULES"
+            assert audit["reason"] == "Audit queue full - basic validation passed"
+    finally:
+        gate.set()
+        await pool.close()
+
+    assert pool.completed == pool.submitted == 4 - pool.rejected
+
+@pytest.mark.asyncio
+async def test_stopped_pool_records_audit_unavailable(db, gated_audit, monkeypatch):
+    await _patient(db)
+    # Never started, as when the app runs without its lifespan or after shutdown
+    pool = AuditWorkerPool(workers=1, queue_size=10)
+    monkeypatch.setattr(main, "audit_pool", pool)
+
+    async with await _client() as client:
+        logged = (await client.post("/api/v1/patients/1/metrics", json=NORMAL_VITALS)).json()
+        audit = (await client.get(f"/api/v1/readings/{logged['data']['reading_id']}/audit")).json()
+
+    assert logged["data"]["audit_status"] == "VALID"
+    assert audit["source"] == "RULES"
+    assert audit["reason"] == "AI audit unavailable - basic validation passed"
+
+@pytest.mark.asyncio
+async def test_rule_violations_never_reach_the_queue(db, gated_audit, monkeypatch):
+    _, seen = gated_audit
+    await _patient(db)
+    pool = AuditWorkerPool(workers=1, queue_size=10)
+    monkeypatch.setattr(main, "audit_pool", pool)
+    await pool.start()
+
+    try:
+        async with await _client() as client:
+            logged = (await client.post("/api/v1/patients/1/metrics", json={**NORMAL_VITALS, "heart_rate": 300})).json()
+            audit = (await client.get(f"/api/v1/readings/{logged['data']['reading_id']}/audit")).json()
+            missing = await client.get("/api/v1/readings/999/audit")
+    finally:
+        await pool.close()
+
+    assert logged["data"]["audit_status"] == "SUSPICIOUS"
+    assert audit["source"] == "RULES"
+    assert audit["reason"] == "Physiologically impossible heart rate"
+    assert missing.status_code == 404
+    assert seen == [] and pool.submitted == 0
+
+@pytest.mark.asyncio
+async def test_submit_before_start_is_rejected():
+    pool = AuditWorkerPool(workers=1, queue_size=1)
+    assert pool.submit(1, NORMAL_VITALS) is False
+    assert pool.stats()["rejected"] == 1
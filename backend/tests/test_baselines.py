@@ -0,0 +1,191 @@
+import statistics
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.baselines import merge_readings, get_historical_average, backfill, RollingBaselines
+from app.models import Patient, PatientReading, PatientBaseline
+
+HEART_RATES = [62, 75, 71, 90, 58, 120, 66]
+
+def _readings(patient_id):
+    start = datetime(2024, 1, 1)
+    return [
+        PatientReading(
+            patient_id=patient_id,
+            blood_pressure="120/80",
+            heart_rate=hr,
+            temperature=98.0 + i * 0.3,
+            oxygen_saturation=99.0 - i,
+            recorded_at=start + timedelta(minutes=i)
+        )
+        for i, hr in enumerate(HEART_RATES)
+    ]
+
+def _variance(baseline, vital):
+    return getattr(baseline, f"{vital}_m2") / (baseline.reading_count - 1)
+
+@pytest.mark.asyncio
+async def test_incremental_and_batched_merges_match_full_history(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="B1"))
+    readings = _readings(1)
+    db.add_all(readings)
+    await db.flush()
+
+    # One reading at a time, then the rest as a batch
+    for reading in readings[:3]:
+        await merge_readings(db, 1, [reading])
+    await merge_readings(db, 1, readings[3:])
+    await db.commit()
+
+    baseline = (await db.execute(select(PatientBaseline))).scalar_one()
+    assert baseline.reading_count == len(HEART_RATES)
+    assert _variance(baseline, "heart_rate") == pytest.approx(statistics.variance(HEART_RATES))
+
+    average = await get_historical_average(db, 1)
+    assert average["avg_heart_rate"] == pytest.approx(statistics.mean(HEART_RATES))
+    assert average["avg_oxygen_saturation"] == pytest.approx(96.0)
+
+@pytest.mark.asyncio
+async def test_backfill_and_fallback_for_patients_without_aggregates(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="B1"))
+    db.add_all(_readings(1))
+    await db.commit()
+
+    # No aggregate row yet: falls back to AVG over readings
+    before = await get_historical_average(db, 1)
+    assert before["avg_heart_rate"] == pytest.approx(statistics.mean(HEART_RATES))
+
+    assert await backfill(db) == 1
+    baseline = (await db.execute(select(PatientBaseline))).scalar_one()
+    assert _variance(baseline, "heart_rate") == pytest.approx(statistics.variance(HEART_RATES))
+    assert await get_historical_average(db, 1) == pytest.approx(before)
+    assert await get_historical_average(db, 2) is None
+
+@pytest.mark.asyncio
+async def test_backfill_overwrites_existing_rows_in_place(db):
+    db.add_all([
+        Patient(id=1, name="A", age=40, medical_record_number="B1"),
+        Patient(id=2, name="B", age=50, medical_record_number="B2"),
+    ])
+    db.add_all(_readings(1) + _readings(2))
+    # Patient 1's row is out of date (e.g. readings imported without a merge)
+    db.add(PatientBaseline(patient_id=1, reading_count=1, heart_rate_sum=999.0))
+    await db.commit()
+
+    assert await backfill(db) == 2
+    db.expire_all()
+    rows = (await db.execute(select(PatientBaseline).order_by(PatientBaseline.patient_id))).scalars().all()
+    assert [row.reading_count for row in rows] == [len(HEART_RATES)] * 2
+    assert rows[0].heart_rate_sum == pytest.approx(sum(HEART_RATES))
+    assert _variance(rows[0], "heart_rate") == pytest.approx(statistics.variance(HEART_RATES))
+
+@pytest.mark.asyncio
+async def test_rolling_strategies_update_incrementally_and_reload_when_stale(db):
+    now = datetime.utcnow()
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="B1"))
+    db.add_all([
+        PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=hr, temperature=98.6,
+                       oxygen_saturation=98.0, recorded_at=now - timedelta(hours=hours_ago))
+        for hr, hours_ago in [(50, 30), (60, 3), (70, 2), (80, 1)]
+    ])
+    await db.commit()
+    latest_id = (await db.execute(select(PatientReading.id).order_by(PatientReading.recorded_at.desc()))).scalars().first()
+
+    baselines = RollingBaselines(window_readings=2, window_hours=24, half_life_hours=1)
+    assert (await baselines.get(db, 1, "last_n", latest_id))["avg_heart_rate"] == 75
+    assert (await baselines.get(db, 1, "last_hours", latest_id))["avg_heart_rate"] == 70
+    ewma = (await baselines.get(db, 1, "ewma", latest_id))["avg_heart_rate"]
+    assert 70 < ewma < 80
+
+    # A reading stored by this process updates the windows without a reload
+    reading = PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=100, temperature=98.6,
+                             oxygen_saturation=98.0, recorded_at=now)
+    db.add(reading)
+    await db.commit()
+    baselines.observe(1, reading)
+    assert (await baselines.get(db, 1, "last_n", reading.id))["avg_heart_rate"] == 90
+    assert (await baselines.get(db, 1, "last_hours", reading.id))["avg_heart_rate"] == 77.5
+
+    # A reading written elsewhere is picked up because the latest id no longer matches
+    other = PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=40, temperature=98.6,
+                           oxygen_saturation=98.0, recorded_at=now + timedelta(seconds=1))
+    db.add(other)
+    await db.commit()
+    assert (await baselines.get(db, 1, "last_n", other.id))["avg_heart_rate"] == 70
+
+@pytest.mark.asyncio
+async def test_first_merge_seeds_aggregate_from_existing_history(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="B1"))
+    # Readings stored before the aggregate table existed, never backfilled
+    db.add_all([
+        PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=60, temperature=98.0,
+                       oxygen_saturation=98.0, recorded_at=datetime(2024, 1, 1, hour))
+        for hour in range(4)
+    ])
+    await db.commit()
+
+    reading = PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=140, temperature=100.0,
+                             oxygen_saturation=93.0, recorded_at=datetime(2024, 1, 1, 5))
+    db.add(reading)
+    await db.flush()
+    await merge_readings(db, 1, [reading])
+    await db.commit()
+
+    baseline = (await db.execute(select(PatientBaseline))).scalar_one()
+    assert baseline.reading_count == 5
+    assert _variance(baseline, "heart_rate") == pytest.approx(statistics.variance([60, 60, 60, 60, 140]))
+    average = await get_historical_average(db, 1)
+    assert average["avg_heart_rate"] == pytest.approx(76.0)
+    assert average["avg_temperature"] == pytest.approx(98.4)
+
+    # Later merges add to the seeded row without rescanning the history
+    second = PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=76, temperature=98.4,
+                            oxygen_saturation=97.0, recorded_at=datetime(2024, 1, 1, 6))
+    db.add(second)
+    await db.flush()
+    await merge_readings(db, 1, [second])
+    await db.commit()
+    await db.refresh(baseline)
+    assert baseline.reading_count == 6
+    assert (await get_historical_average(db, 1))["avg_heart_rate"] == pytest.approx(76.0)
+
+@pytest.mark.asyncio
+async def test_window_load_reads_only_the_windows_not_the_history(db):
+    now = datetime.utcnow()
+    db.add_all([
+        Patient(id=1, name="Long stay", age=40, medical_record_number="B1"),
+        Patient(id=2, name="New", age=50, medical_record_number="B2"),
+    ])
+    # A year of daily readings, then three inside the last hour
+    db.add_all([
+        PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=60 + day % 30, temperature=98.6,
+                       oxygen_saturation=98.0, recorded_at=now - timedelta(days=day))
+        for day in range(1, 366)
+    ] + [
+        PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=hr, temperature=98.6,
+                       oxygen_saturation=98.0, recorded_at=now - timedelta(minutes=minutes))
+        for hr, minutes in [(100, 30), (110, 20), (120, 10)]
+    ] + [
+        PatientReading(patient_id=2, blood_pressure="120/80", heart_rate=70, temperature=98.6,
+                       oxygen_saturation=98.0, recorded_at=now - timedelta(days=400))
+    ])
+    await db.commit()
+
+    rolling = RollingBaselines(window_readings=5, window_hours=1, half_life_hours=0.125)
+    applied = []
+    original_apply = rolling._apply
+
+    def counting_apply(state, reading_id, recorded_at, values):
+        applied.append(recorded_at)
+        original_apply(state, reading_id, recorded_at, values)
+
+    rolling._apply = counting_apply
+    states = await rolling._load_many(db, [1, 2])
+
+    # Last five readings (the hour's three and two days) for patient 1; the only one for patient 2
+    assert len(applied) == 6
+    assert states[1].last_n.means()[0] == pytest.approx((61 + 62 + 100 + 110 + 120) / 5)
+    assert states[1].last_hours.means()[0] == pytest.approx(110)
+    assert states[2].last_n.means()[0] == 70
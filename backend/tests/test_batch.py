@@ -0,0 +1,159 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Patient, PatientReading, Prediction
+from app.batch import stream_batch_predictions
+from app.baselines import RollingBaselines
+from app import baselines, batch, predictor
+
+def _reading(patient_id, hr, minutes_ago, spo2=98.0):
+    return PatientReading(
+        patient_id=patient_id,
+        blood_pressure="120/80",
+        heart_rate=hr,
+        temperature=98.6,
+        oxygen_saturation=spo2,
+        recorded_at=datetime(2024, 1, 1, 12, 0) - timedelta(minutes=minutes_ago)
+    )
+
+async def _seed(db):
+    db.add_all([
+        Patient(id=1, name="Stable", age=40, medical_record_number="B1"),
+        Patient(id=2, name="Unwell", age=70, medical_record_number="B2"),
+        Patient(id=3, name="No Data", age=30, medical_record_number="B3"),
+    ])
+    db.add_all([
+        _reading(1, 72, 10),
+        _reading(1, 74, 0),
+        _reading(2, 80, 10),
+        _reading(2, 130, 0, spo2=90.0),
+    ])
+    await db.commit()
+
+async def _collect(patient_ids, baseline="lifetime"):
+    return [json.loads(line) async for line in stream_batch_predictions(patient_ids, baseline)]
+
+@pytest.mark.asyncio
+async def test_batch_streams_one_line_per_patient_then_summary(db):
+    await _seed(db)
+
+    lines = await _collect([1, 2, 3, 99, 2])
+
+    *per_patient, summary = lines
+    # Duplicate ids are predicted once
+    assert sorted(line["patient_id"] for line in per_patient) == [1, 2, 3, 99]
+    by_id = {line["patient_id"]: line for line in per_patient}
+
+    assert by_id[1]["status"] == "ok"
+    assert by_id[1]["prediction"]["risk_level"] == "LOW"
+    assert by_id[2]["status"] == "ok"
+    assert by_id[2]["prediction"]["risk_level"] == "MEDIUM"
+    assert by_id[3] == {"patient_id": 3, "status": "error", "detail": "No vital signs data available for this patient"}
+    assert by_id[99] == {"patient_id": 99, "status": "error", "detail": "Patient not found"}
+
+    assert summary["status"] == "complete"
+    assert summary["saved"] == 2
+    stored = (await db.execute(select(Prediction.id, Prediction.patient_id, Prediction.risk_level))).all()
+    assert {str(row.patient_id): row.id for row in stored} == summary["prediction_ids"]
+    assert {row.patient_id: row.risk_level for row in stored} == {1: "LOW", 2: "MEDIUM"}
+
+@pytest.mark.asyncio
+async def test_batch_saves_every_prediction_in_one_commit(db, monkeypatch):
+    await _seed(db)
+    commits = []
+    original_commit = AsyncSession.commit
+
+    async def counting_commit(self):
+        commits.append(self)
+        await original_commit(self)
+
+    monkeypatch.setattr(AsyncSession, "commit", counting_commit)
+    lines = await _collect([1, 2])
+
+    assert lines[-1]["saved"] == 2
+    assert len(commits) == 1
+
+@pytest.mark.asyncio
+async def test_failed_save_stores_nothing_and_reports_error(db, monkeypatch):
+    await _seed(db)
+
+    async def failing_commit(self):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(AsyncSession, "commit", failing_commit)
+    lines = await _collect([1, 2])
+    monkeypatch.undo()
+
+    assert [line["status"] for line in lines[:2]] == ["ok", "ok"]
+    assert lines[-1] == {"status": "error", "detail": "Error saving predictions: disk full"}
+    assert (await db.execute(select(func.count(Prediction.id)))).scalar() == 0
+
+@pytest.mark.asyncio
+async def test_windowed_baselines_load_every_patient_in_one_query(db, monkeypatch):
+    await _seed(db)
+    rolling = RollingBaselines(window_readings=1, window_hours=1, half_life_hours=1)
+    loads = []
+    original_load = rolling._load_many
+
+    async def counting_load(session, patient_ids):
+        loads.append(sorted(patient_ids))
+        return await original_load(session, patient_ids)
+
+    monkeypatch.setattr(rolling, "_load_many", counting_load)
+    monkeypatch.setattr(baselines, "rolling_baselines", rolling)
+
+    lines = await _collect([1, 2, 3], baseline="last_n")
+
+    assert loads == [[1, 2]]
+    assert lines[-1]["saved"] == 2
+    # A one-reading window holds just the latest reading
+    assert rolling._patients[2].last_n.means()[0] == 130.0
+
+    # Windows are current, so the next batch doesn't query them again
+    await _collect([1, 2], baseline="last_n")
+    assert loads == [[1, 2]]
+
+@pytest.mark.asyncio
+async def test_offline_batch_scores_every_patient_in_one_call(db, monkeypatch):
+    await _seed(db)
+    calls = []
+    score_vitals_batch = predictor.score_vitals_batch
+
+    def counting_batch(*arrays):
+        calls.append(len(arrays[0]))
+        return score_vitals_batch(*arrays)
+
+    monkeypatch.setattr(predictor, "HF_API_KEY", None)
+    monkeypatch.setattr(predictor, "score_vitals_batch", counting_batch)
+
+    lines = await _collect([1, 2, 3])
+
+    assert calls == [2]
+    by_id = {line["patient_id"]: line for line in lines[:-1]}
+    assert by_id[1]["prediction"]["risk_level"] == "LOW"
+    assert by_id[2]["prediction"]["risk_level"] == "MEDIUM"
+    assert lines[-1]["saved"] == 2
+
+@pytest.mark.asyncio
+async def test_failing_patient_reports_error_and_the_stream_completes(db, monkeypatch):
+    await _seed(db)
+
+    async def flaky_risk(**vitals):
+        if vitals["heart_rate"] == 130:
+            raise ValueError("model returned garbage")
+        return predictor._calculate_risk_rule_based(**vitals)
+
+    # The online path, where each patient is its own inference call
+    monkeypatch.setattr(predictor, "HF_API_KEY", "test-key")
+    monkeypatch.setattr(batch, "calculate_risk", flaky_risk)
+
+    *per_patient, summary = await _collect([1, 2])
+
+    by_id = {line["patient_id"]: line for line in per_patient}
+    assert by_id[1]["status"] == "ok"
+    assert by_id[2] == {"patient_id": 2, "status": "error", "detail": "Error generating prediction: model returned garbage"}
+    assert summary["status"] == "complete" and summary["saved"] == 1
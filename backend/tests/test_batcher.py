@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+
+from app import predictor
+from app.batcher import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_micro_batcher_groups_concurrent_submissions():
+    seen = []
+
+    async def handler(items):
+        seen.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(handler, window=0.01, max_batch=3)
+    results = await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+    assert results == [0, 10, 20, 30, 40]
+    assert seen == [[0, 1, 2], [3, 4]]
+    assert batcher.stats()["batches"] == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_fails_every_caller():
+    started = asyncio.Event()
+
+    async def handler(items):
+        started.set()
+        await asyncio.Event().wait()
+
+    batcher = MicroBatcher(handler, window=0.01, max_batch=2)
+    callers = [asyncio.ensure_future(batcher.submit(i)) for i in range(2)]
+    await started.wait()
+    for task in list(batcher._running):
+        task.cancel()
+
+    results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=1)
+    assert [str(result) for result in results] == ["micro-batch cancelled"] * 2
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def _risk_request(heart_rate):
+    return {
+        "heart_rate": heart_rate,
+        "blood_pressure": "120/80",
+        "temperature": 98.6,
+        "oxygen_saturation": 97.0,
+        "historical_average": None
+    }
+
+@pytest.mark.asyncio
+async def test_packed_risk_answer_is_split_per_patient():
+    prompts = []
+
+    async def fake_generate(prompt, max_new_tokens, kind):
+        prompts.append(prompt)
+        return "```json\n" + json.dumps([
+            {"id": 2, "risk_score": 0.8, "risk_level": "high", "recommendation": "b", "baseline_analysis": "none"},
+            {"id": 1, "risk_score": 0.1, "risk_level": "low", "recommendation": "a", "baseline_analysis": "none"},
+        ]) + "\n```"
+
+    with patch.object(predictor, "_generate", fake_generate):
+        results = await predictor._request_risk_batch([_risk_request(70), _risk_request(130)])
+
+    assert len(prompts) == 1
+    assert "Patient 2:" in prompts[0]
+    assert [r["risk_level"] for r in results] == ["LOW", "HIGH"]
+
+@pytest.mark.asyncio
+async def test_unparseable_batch_falls_back_to_single_calls():
+    prompts = []
+
+    async def fake_generate(prompt, max_new_tokens, kind):
+        prompts.append(prompt)
+        if "Patient 1:" in prompt:
+            return "Sorry, I can only assess one patient at a time."
+        return json.dumps({"plausible": False, "reason": "HR too high"})
+
+    vitals = [_risk_request(70), _risk_request(200)]
+    with patch.object(predictor, "_generate", fake_generate):
+        results = await predictor._request_audit_batch(vitals)
+
+    assert len(prompts) == 3
+    assert results == [{"plausible": False, "reason": "HR too high"}] * 2
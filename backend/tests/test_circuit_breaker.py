@@ -0,0 +1,43 @@
+from app.circuit_breaker import CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_opens_after_consecutive_failures_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10.0, clock=clock)
+
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    # After the reset window a single probe is let through
+    clock.now = 10.0
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["total_rejected"] == 2
+
+def test_slow_calls_count_as_failures_and_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, slow_call_threshold=1.0, reset_timeout=5.0, clock=clock)
+
+    breaker.record_success(2.5)
+    breaker.record_success(3.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 5.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["times_opened"] == 2
@@ -0,0 +1,155 @@
+import pytest
+from typing import List
+
+from fastapi import Request
+from pydantic import BaseModel
+from sqlalchemy import event
+
+from app.conditional import ChangeTracker, ResponseCache, GLOBAL_SCOPE, bump_data_versions
+from app.database import AsyncSessionLocal, engine
+from app.models import Patient, DataVersion
+import app.conditional as conditional
+
+class Item(BaseModel):
+    id: int
+
+def _request(path: str, etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"limit=5", "headers": headers})
+
+@pytest.fixture
+def tracked(monkeypatch):
+    """A fresh tracker and cache in place of the app's; versions are read on every request"""
+    tracker, cache = ChangeTracker(ttl=0), ResponseCache(max_entries=10)
+    tracker.on_change(cache.invalidate)
+    monkeypatch.setattr(conditional, "changes", tracker)
+    monkeypatch.setattr(conditional, "response_cache", cache)
+    return tracker, cache
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+async def _bump(**kwargs):
+    # A separate session stands in for another worker or the importer
+    async with AsyncSessionLocal() as other:
+        await bump_data_versions(other, **kwargs)
+        await other.commit()
+
+@pytest.mark.asyncio
+async def test_bumps_change_only_the_affected_versions(db):
+    tracker = ChangeTracker(ttl=0)
+    patient, triage = await tracker.version(db, 1), await tracker.version(db, GLOBAL_SCOPE)
+
+    await _bump(patient_ids=[1], triage=False)
+    assert await tracker.version(db, 1) != patient
+    assert await tracker.version(db, GLOBAL_SCOPE) == triage
+
+    await _bump(patient_ids=[2])
+    assert await tracker.version(db, GLOBAL_SCOPE) != triage
+
+    before = await tracker.version(db, 3)
+    await _bump(generation=True)
+    assert await tracker.version(db, 3) != before
+
+    versions = dict((await db.execute(DataVersion.__table__.select())).all())
+    assert versions == {"patient:1": 1, "patient:2": 1, "global": 1, "generation": 1}
+
+@pytest.mark.asyncio
+async def test_conditional_response_serves_304_then_cache_then_rebuilds(db, tracked):
+    tracker, cache = tracked
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return [Item(id=len(builds))]
+
+    first = await conditional.conditional_response(_request("/p/7"), db, 7, List[Item], build)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.body == b'[{"id":1}]'
+
+    not_modified = await conditional.conditional_response(_request("/p/7", etag), db, 7, List[Item], build)
+    cached = await conditional.conditional_response(_request("/p/7"), db, 7, List[Item], build)
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert cached.body == b'[{"id":1}]' and len(builds) == 1
+
+    # A local write: the version row moves in its transaction, the cache drops after commit
+    await bump_data_versions(db, [7])
+    await db.commit()
+    tracker.bump(7)
+    assert cache.stats()["entries"] == 0
+    fresh = await conditional.conditional_response(_request("/p/7", etag), db, 7, List[Item], build)
+    assert fresh.status_code == 200 and fresh.body == b'[{"id":2}]'
+    assert fresh.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_writes_from_another_process_change_etags_and_bypass_the_cache(db, tracked):
+    db.add_all([
+        Patient(id=1, name="Watched", age=40, medical_record_number="C1"),
+        Patient(id=2, name="Other", age=50, medical_record_number="C2"),
+    ])
+    await db.commit()
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return [Item(id=len(builds))]
+
+    async def get(path, scope, etag=None):
+        return await conditional.conditional_response(_request(path, etag), db, scope, List[Item], build)
+
+    patient_etag = (await get("/p/1", 1)).headers["etag"]
+    other_etag = (await get("/p/2", 2)).headers["etag"]
+    triage_etag = (await get("/triage", GLOBAL_SCOPE)).headers["etag"]
+
+    # Another worker stores a reading for patient 1; this process never hears of it
+    await _bump(patient_ids=[1])
+
+    stale = await get("/p/1", 1, patient_etag)
+    assert stale.status_code == 200 and stale.body == b'[{"id":4}]'
+    assert (await get("/triage", GLOBAL_SCOPE, triage_etag)).status_code == 200
+    assert (await get("/p/2", 2, other_etag)).status_code == 304
+
+    # A bulk rewrite (migration) moves every scope on
+    await _bump(generation=True)
+    assert (await get("/p/2", 2, other_etag)).status_code == 200
+    assert len(builds) == 6
+
+@pytest.mark.asyncio
+async def test_versions_are_reused_within_the_ttl(db, statements, monkeypatch):
+    tracker, cache = ChangeTracker(ttl=60), ResponseCache(max_entries=10)
+    tracker.on_change(cache.invalidate)
+    monkeypatch.setattr(conditional, "changes", tracker)
+    monkeypatch.setattr(conditional, "response_cache", cache)
+
+    async def build():
+        return [Item(id=1)]
+
+    first = await conditional.conditional_response(_request("/triage"), db, GLOBAL_SCOPE, List[Item], build)
+    statements.clear()
+    for _ in range(3):
+        again = await conditional.conditional_response(_request("/triage", first.headers["etag"]), db, GLOBAL_SCOPE, List[Item], build)
+        assert again.status_code == 304
+    # 304s inside the ttl never reach the database
+    assert statements == []
+    assert tracker.stats()["reads"] == 1
+
+    # Writes elsewhere are picked up once the ttl runs out
+    await _bump(patient_ids=[1])
+    tracker.ttl = 0
+    changed = await conditional.conditional_response(_request("/triage", first.headers["etag"]), db, GLOBAL_SCOPE, List[Item], build)
+    assert changed.status_code == 200
+
+@pytest.mark.asyncio
+async def test_probing_unknown_ids_keeps_the_version_cache_bounded(db):
+    tracker = ChangeTracker(ttl=60, max_entries=10)
+    for patient_id in range(100):
+        await tracker.version(db, patient_id)
+    assert tracker.stats()["versions"] == 10
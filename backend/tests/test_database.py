@@ -0,0 +1,48 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from sqlalchemy.engine import make_url
+
+import app.database as database
+from app.models import Base
+
+def test_postgres_pool_is_budgeted_across_workers(monkeypatch):
+    monkeypatch.setattr(database, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(database, "DB_MAX_CONNECTIONS", 40)
+    url = make_url("postgresql+asyncpg://user:secret@db/patients")
+
+    profile = database._resolve_profile(url)
+    url, options, settings = database._engine_options(url, profile)
+
+    assert profile == "postgres"
+    assert (options["pool_size"], options["max_overflow"]) == (5, 5)
+    assert options["pool_pre_ping"] is True
+    assert url.query["prepared_statement_cache_size"] == str(database.DB_STATEMENT_CACHE_SIZE)
+    assert options["connect_args"]["statement_cache_size"] == database.DB_STATEMENT_CACHE_SIZE
+
+def test_profile_must_match_the_url(monkeypatch):
+    monkeypatch.setattr(database, "DB_PROFILE", "postgres")
+    with pytest.raises(ValueError):
+        database._resolve_profile(make_url("sqlite+aiosqlite:///./x.db"))
+    monkeypatch.setattr(database, "DB_PROFILE", "plain")
+    assert database._resolve_profile(make_url("sqlite+aiosqlite:///./x.db")) == "plain"
+
+@pytest.mark.asyncio
+async def test_sqlite_connections_run_in_wal_mode(db):
+    description = await database.describe_engine()
+    assert "profile=sqlite" in description
+    assert "journal_mode=wal" in description
+    assert f"busy_timeout_ms={database.SQLITE_BUSY_TIMEOUT_MS}" in description
+
+@pytest.mark.asyncio
+async def test_backends_without_upsert_are_rejected_at_startup(monkeypatch):
+    monkeypatch.setattr(database.engine.dialect, "name", "mysql")
+    with pytest.raises(RuntimeError, match="Unsupported database backend 'mysql'"):
+        await database.create_tables()
+
+def test_reference_schema_defines_every_model_table():
+    schema = (Path(__file__).resolve().parents[2] / "database" / "schema.sql").read_text()
+    defined = set(re.findall(r"CREATE TABLE IF NOT EXISTS (\w+)", schema))
+    assert defined == set(Base.metadata.tables)
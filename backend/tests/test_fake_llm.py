@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.predictor import (
+    _audit_prompt, _risk_prompt, _batch_audit_prompt, _batch_risk_prompt,
+    _parse_json, _normalize_risk, _normalize_audit
+)
+from benchmarks.fake_llm import FakeInferenceConfig, create_app, generated_text, parse_prompt, sample_latency
+
+VITALS = {"heart_rate": 128, "blood_pressure": "150/95", "temperature": 101.3, "oxygen_saturation": 91.0}
+IMPOSSIBLE = {"heart_rate": 260, "blood_pressure": "120/80", "temperature": 98.6, "oxygen_saturation": 97.0}
+
+def test_answers_the_predictors_single_and_batch_prompts_in_the_expected_shape():
+    risk = _normalize_risk(_parse_json(generated_text(_risk_prompt(**VITALS, historical_average={"avg_heart_rate": 80.0}))))
+    assert risk["risk_level"] == "HIGH"
+    assert "48.0 bpm" in risk["baseline_analysis"]
+
+    assert _normalize_audit(_parse_json(generated_text(_audit_prompt(IMPOSSIBLE))))["plausible"] is False
+
+    kind, patients = parse_prompt(_batch_risk_prompt([{**VITALS, "historical_average": None}, {**IMPOSSIBLE}]))
+    assert kind == "risk" and [number for number, _, _ in patients] == [1, 2]
+    assert patients[1][1]["heart_rate"] == 260
+
+    answers = _parse_json(generated_text(_batch_audit_prompt([VITALS, IMPOSSIBLE])))
+    assert [(entry["id"], entry["plausible"]) for entry in answers] == [(1, True), (2, False)]
+
+def test_injected_failures_and_latency():
+    payload = {"inputs": _risk_prompt(**VITALS), "parameters": {"max_new_tokens": 250}}
+
+    failing = TestClient(create_app(FakeInferenceConfig(latency="fixed", latency_ms=0, error_rate=1.0)))
+    assert failing.post("/models/fake", json=payload).status_code == 503
+
+    malformed = TestClient(create_app(FakeInferenceConfig(latency="fixed", latency_ms=0, malformed_rate=1.0, seed=1)))
+    for _ in range(4):
+        response = malformed.post("/models/fake", json=payload)
+        assert response.status_code == 200
+        with pytest.raises(json.JSONDecodeError):
+            _parse_json(response.json()[0]["generated_text"])
+    assert malformed.get("/stats").json()["malformed"] == 4
+
+    config = FakeInferenceConfig(latency="fixed", latency_ms=100, ms_per_token=2)
+    assert sample_latency(config, None, 250) == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        FakeInferenceConfig(error_rate=0.6, malformed_rate=0.6)
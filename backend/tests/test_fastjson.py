@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.fastjson import PATIENT_COLUMNS, READING_COLUMNS, PREDICTION_COLUMNS, as_dicts, dumps
+from app.models import Patient, PatientReading, Prediction
+from app import schemas
+
+@pytest.mark.asyncio
+async def test_column_rows_encode_to_the_same_json_as_the_schemas(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="F1", created_at=datetime(2024, 1, 1, 8, 0, 0, 250000)))
+    db.add(PatientReading(id=1, patient_id=1, blood_pressure="128/84", heart_rate=77,
+                          temperature=98.6, oxygen_saturation=96.5, recorded_at=datetime(2024, 1, 1, 9)))
+    db.add(Prediction(id=1, patient_id=1, risk_score=0.35, risk_level="MEDIUM",
+                      recommendation="Recheck in an hour", created_at=datetime(2024, 1, 1, 9, 5)))
+    await db.commit()
+
+    for model, schema, columns in (
+        (Patient, schemas.Patient, PATIENT_COLUMNS),
+        (PatientReading, schemas.PatientReading, READING_COLUMNS),
+        (Prediction, schemas.Prediction, PREDICTION_COLUMNS)
+    ):
+        entities = (await db.execute(select(model))).scalars().all()
+        rows = (await db.execute(select(*columns))).all()
+        adapter = TypeAdapter(List[schema])
+        expected = adapter.dump_json(adapter.validate_python(entities, from_attributes=True))
+        assert dumps(as_dicts(rows, columns)) == expected
+
+def test_dumps_encodes_constructed_models():
+    score = schemas.TriageScore.model_construct(
+        id=1, patient_id=1, name="A", urgency_score=0.7, reason="High current risk", current_risk="HIGH", trend="STABLE"
+    )
+    assert json.loads(dumps([score])) == [score.model_dump()]
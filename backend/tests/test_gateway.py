@@ -0,0 +1,92 @@
+import httpx
+import pytest
+
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.gateway import InferenceGateway, HF_CONNECT_TIMEOUT
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeEndpoint:
+    """Mocked inference endpoint: answers with `status` and records every request it sees"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(self.status, json=[{"generated_text": "ok"}])
+
+def _gateway(endpoint: FakeEndpoint, clock: FakeClock) -> InferenceGateway:
+    gateway = InferenceGateway()
+    gateway._build_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(endpoint))
+    gateway.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10.0, clock=clock)
+    return gateway
+
+@pytest.mark.asyncio
+async def test_calls_share_one_pooled_client_until_closed():
+    endpoint = FakeEndpoint()
+    gateway = _gateway(endpoint, FakeClock())
+    await gateway.start()
+    client = gateway.client
+
+    await gateway.post("http://model/generate", {"inputs": "a"})
+    await gateway.post("http://model/generate", {"inputs": "b"}, timeout=2.5)
+
+    assert gateway.client is client
+    assert len(endpoint.requests) == 2
+    # The per-call timeout replaces the read timeout for that request only
+    assert endpoint.requests[1].extensions["timeout"]["read"] == 2.5
+    assert endpoint.requests[1].extensions["timeout"]["connect"] == HF_CONNECT_TIMEOUT
+
+    await gateway.close()
+    assert client.is_closed
+    # Used outside the lifespan, a fresh client is built on demand
+    assert gateway.client is not client
+    await gateway.close()
+
+@pytest.mark.asyncio
+async def test_open_breaker_short_circuits_without_calling_the_endpoint():
+    endpoint = FakeEndpoint(status=503)
+    gateway = _gateway(endpoint, FakeClock())
+
+    for _ in range(2):
+        response = await gateway.post("http://model/generate", {"inputs": "x"})
+        assert response.status_code == 503
+
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        await gateway.post("http://model/generate", {"inputs": "x"})
+    assert len(endpoint.requests) == 2
+    assert gateway.breaker.snapshot()["total_rejected"] == 1
+    await gateway.close()
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_on_success_and_reopens_on_failure():
+    clock = FakeClock()
+    endpoint = FakeEndpoint(status=503)
+    gateway = _gateway(endpoint, clock)
+    for _ in range(2):
+        await gateway.post("http://model/generate", {"inputs": "x"})
+
+    # A failed probe after the reset window opens the circuit again
+    clock.now = 10.0
+    assert gateway.breaker.state == CircuitBreaker.HALF_OPEN
+    await gateway.post("http://model/generate", {"inputs": "probe"})
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    assert len(endpoint.requests) == 3
+
+    # A successful probe closes it and traffic flows normally
+    clock.now = 20.0
+    endpoint.status = 200
+    probe = await gateway.post("http://model/generate", {"inputs": "probe"})
+    assert probe.status_code == 200
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+    await gateway.post("http://model/generate", {"inputs": "y"})
+    assert len(endpoint.requests) == 5
+    await gateway.close()
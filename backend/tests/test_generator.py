@@ -0,0 +1,31 @@
+import random
+
+from benchmarks.generator import generate_patients, generate_readings, _episode, _severity
+
+def _rows(seed: int):
+    rng = random.Random(seed)
+    patients = generate_patients(rng, 30, seed)
+    return patients, [row for patient in patients for row in generate_readings(rng, patient["id"], 40)]
+
+def test_same_seed_same_data_and_vitals_stay_in_schema_ranges():
+    patients, readings = _rows(7)
+    assert (patients, readings) == _rows(7)
+    assert readings != _rows(8)[1]
+
+    assert len(readings) == 30 * 40
+    for row in readings:
+        assert 0 <= row["heart_rate"] <= 300
+        assert 0 < row["oxygen_saturation"] <= 100
+        assert row["systolic_bp"] > row["diastolic_bp"]
+        assert row["blood_pressure"] == f"{row['systolic_bp']}/{row['diastolic_bp']}"
+
+def test_episodes_ramp_up_to_the_peak_and_some_are_still_under_way():
+    episodes = [_episode(random.Random(seed), 100) for seed in range(400)]
+    started = [episode for episode in episodes if episode is not None]
+    assert 0.08 < len(started) / len(episodes) < 0.25
+    assert any(end > 100 for _, _, end in started)
+
+    start, peak, end = started[0]
+    ramp = [_severity(i, started[0]) for i in range(start, peak + 1)]
+    assert ramp == sorted(ramp) and ramp[-1] == 1.0
+    assert _severity(start - 1, started[0]) == 0.0
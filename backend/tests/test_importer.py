@@ -0,0 +1,142 @@
+import httpx
+import json
+import pytest
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import main, conditional
+from app.conditional import ResponseCache
+from app.importer import import_readings, Checkpoint
+from app.triage import rebuild_triage_index, sync_triage_index
+from app.models import Patient, PatientReading, PatientBaseline, ImportCheckpoint
+
+CSV = """mrn,recorded_at,blood_pressure,heart_rate,temperature,oxygen_saturation
+W1,2024-01-01T08:00:00,120/80,70,98.6,98
+W1,2024-01-01T09:00:00,125/82,80,98.9,97
+NOPE,2024-01-01T09:00:00,120/80,70,98.6,98
+W2,2024-01-01T09:00:00,bad,70,98.6,98
+W2,2024-01-01T10:00:00,130/85,90,99.1,96
+"""
+
+@pytest.mark.asyncio
+async def test_csv_import_skips_bad_rows_and_rebuilds_baselines(db, tmp_path):
+    db.add_all([
+        Patient(id=1, name="A", age=40, medical_record_number="W1"),
+        Patient(id=2, name="B", age=50, medical_record_number="W2")
+    ])
+    await db.commit()
+    path = tmp_path / "ward.csv"
+    path.write_text(CSV)
+
+    stats = await import_readings(db, str(path), chunk_size=2)
+
+    assert (stats["imported"], stats["invalid"], stats["unknown_patient"]) == (3, 1, 1)
+    assert (await db.execute(select(func.count()).select_from(ImportCheckpoint))).scalar() == 0
+    assert (await db.execute(select(func.count(PatientReading.id)))).scalar() == 3
+    baseline = await db.get(PatientBaseline, 1)
+    assert (baseline.reading_count, baseline.heart_rate_sum) == (2, 150)
+
+def _ndjson(path, count):
+    path.write_text("\n".join(
+        json.dumps({"medical_record_number": "W1", "recorded_at": f"2024-01-01T0{i}:00:00",
+                    "blood_pressure": "120/80", "heart_rate": 60 + i, "temperature": 98.6,
+                    "oxygen_saturation": 98})
+        for i in range(count)
+    ) + "\n")
+
+async def _heart_rates(db):
+    return (await db.execute(select(PatientReading.heart_rate).order_by(PatientReading.id))).scalars().all()
+
+@pytest.mark.asyncio
+async def test_resume_skips_committed_records(db, tmp_path):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="W1"))
+    await db.commit()
+    path = tmp_path / "ward.ndjson"
+    _ndjson(path, 5)
+
+    # Pretend an earlier run committed the first three records and then died
+    await Checkpoint(str(path)).save(db, 3, {"imported": 3, "invalid": 0, "unknown_patient": 0})
+    await db.commit()
+    with pytest.raises(ValueError):
+        await import_readings(db, str(path))
+
+    stats = await import_readings(db, str(path), resume=True)
+
+    assert (stats["imported"], stats["records"]) == (5, 5)
+    assert await _heart_rates(db) == [63, 64]
+
+@pytest.mark.asyncio
+async def test_crash_after_a_commit_never_imports_records_twice(db, tmp_path, monkeypatch):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="W1"))
+    await db.commit()
+    path = tmp_path / "ward.ndjson"
+    _ndjson(path, 5)
+    commits = []
+    original_commit = AsyncSession.commit
+
+    async def commit_then_crash(self):
+        await original_commit(self)
+        commits.append(self)
+        if len(commits) == 2:
+            raise RuntimeError("killed")
+
+    monkeypatch.setattr(AsyncSession, "commit", commit_then_crash)
+    with pytest.raises(RuntimeError):
+        await import_readings(db, str(path), chunk_size=2)
+    monkeypatch.undo()
+
+    # The second chunk committed together with its checkpoint
+    assert (await db.get(ImportCheckpoint, str(path))).records_done == 4
+    stats = await import_readings(db, str(path), chunk_size=2, resume=True)
+
+    assert (stats["imported"], stats["records"]) == (5, 5)
+    assert await _heart_rates(db) == [60, 61, 62, 63, 64]
+
+@pytest.mark.asyncio
+async def test_restart_discards_the_checkpoint(db, tmp_path):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="W1"))
+    await db.commit()
+    path = tmp_path / "ward.ndjson"
+    _ndjson(path, 3)
+    await Checkpoint(str(path)).save(db, 2, {"imported": 2, "invalid": 0, "unknown_patient": 0})
+    await db.commit()
+
+    stats = await import_readings(db, str(path), restart=True)
+
+    assert (stats["imported"], stats["records"]) == (3, 3)
+    assert await _heart_rates(db) == [60, 61, 62]
+
+@pytest.mark.asyncio
+async def test_running_api_serves_imported_readings_without_restart(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(conditional, "response_cache", ResponseCache(max_entries=10))
+    # The import runs in another process in practice; don't wait out the version ttl
+    monkeypatch.setattr(conditional.changes, "ttl", 0)
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="W1"))
+    await db.commit()
+    path = tmp_path / "ward.ndjson"
+    _ndjson(path, 2)
+    await import_readings(db, str(path))
+    await rebuild_triage_index(db)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        top = await client.get("/api/v1/triage/top")
+        detail = await client.get("/api/v1/patients/1")
+        assert top.json()[0]["current_risk"] == "LOW"
+
+        # A later file, imported by a separate process while the API keeps running
+        later = tmp_path / "later.ndjson"
+        later.write_text(json.dumps({"mrn": "W1", "recorded_at": "2024-01-01T09:00:00", "blood_pressure": "150/95",
+                                     "heart_rate": 130, "temperature": 101.5, "oxygen_saturation": 90}) + "\n")
+        await import_readings(db, str(later))
+        # What the API's background task does every TRIAGE_SYNC_INTERVAL_SECONDS
+        await sync_triage_index(db)
+
+        fresh_top = await client.get("/api/v1/triage/top", headers={"If-None-Match": top.headers["etag"]})
+        fresh_detail = await client.get("/api/v1/patients/1", headers={"If-None-Match": detail.headers["etag"]})
+
+    assert fresh_top.status_code == 200
+    assert fresh_top.json()[0]["current_risk"] == "HIGH"
+    assert fresh_detail.status_code == 200
+    assert len(fresh_detail.json()["readings"]) == 3
@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime
+
+from sqlalchemy import select, event
+
+from app.ingest import parse_bulk_body, ingest_readings, BulkPayloadError
+from app.models import Patient, PatientReading, PatientBaseline, ReadingAudit
+
+def _item(patient_id, heart_rate=72, **extra):
+    return {
+        "patient_id": patient_id,
+        "blood_pressure": "120/80",
+        "heart_rate": heart_rate,
+        "temperature": 98.6,
+        "oxygen_saturation": 98,
+        **extra
+    }
+
+def test_parse_accepts_array_and_ndjson():
+    assert parse_bulk_body(b'[{"a": 1}, {"a": 2}]', "application/json") == [{"a": 1}, {"a": 2}]
+    assert parse_bulk_body(b'{"a": 1}\n\n{"a": 2}\n', "application/x-ndjson") == [{"a": 1}, {"a": 2}]
+    with pytest.raises(BulkPayloadError):
+        parse_bulk_body(b'{"a": 1}', "application/json")
+    with pytest.raises(BulkPayloadError):
+        parse_bulk_body(b'{"a": 1}\nnot json', "application/x-ndjson")
+
+@pytest.mark.asyncio
+async def test_ingest_reports_per_row_status_and_commits_once(db):
+    db.add_all([
+        Patient(id=1, name="A", age=40, medical_record_number="I1"),
+        Patient(id=2, name="B", age=50, medical_record_number="I2")
+    ])
+    await db.commit()
+
+    items = [
+        _item(1),
+        _item(2, heart_rate=250),
+        _item(99),
+        {"patient_id": 1, "blood_pressure": "high"},
+        _item(1, heart_rate=80, recorded_at="2024-01-01T00:00:00")
+    ]
+    response = await ingest_readings(db, items)
+
+    assert (response.created, response.rejected) == (3, 2)
+    assert [row.status for row in response.results] == ["created", "created", "rejected", "rejected", "created"]
+    assert response.results[1].warning.startswith("Data flagged as suspicious")
+    assert response.results[2].error == "Patient not found"
+    assert response.results[3].error.startswith("blood_pressure")
+
+    # Returned ids line up with the input rows
+    first, last = response.results[0].reading_id, response.results[4].reading_id
+    readings = {r.id: r for r in (await db.execute(select(PatientReading))).scalars()}
+    assert readings[first].heart_rate == 72
+    assert readings[last].recorded_at == datetime(2024, 1, 1)
+
+    audits = {a.reading_id: a for a in (await db.execute(select(ReadingAudit))).scalars()}
+    assert audits[response.results[1].reading_id].status == "SUSPICIOUS"
+    assert audits[first].source == "RULES"
+
+    baseline = await db.get(PatientBaseline, 1)
+    assert baseline.reading_count == 2
+    assert baseline.heart_rate_sum == 152
+
+@pytest.mark.asyncio
+async def test_ward_sized_batch_merges_baselines_in_a_few_statements(db):
+    patients = 1000
+    db.add_all([Patient(id=i, name=f"P{i}", age=50, medical_record_number=f"W{i}") for i in range(1, patients + 1)])
+    await db.commit()
+    # Patient 1 already has a baseline; the rest get theirs from this batch
+    await ingest_readings(db, [_item(1, heart_rate=60)])
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split("(")[0].strip())
+
+    sync_engine = db.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        items = [_item(i, heart_rate=60 + i % 50) for i in range(1, patients + 1)]
+        items += [_item(7, heart_rate=130), _item(7, heart_rate=30)]
+        response = await ingest_readings(db, items)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+    assert response.created == patients + 2
+    # One seeding query and one multi-row upsert, not one per patient
+    assert statements.count("INSERT INTO patient_baselines") == 2
+    assert statements.count("INSERT INTO patient_readings") <= 2
+
+    # Ids line up with the input rows across the whole batch
+    readings = {r.id: r for r in (await db.execute(select(PatientReading))).scalars()}
+    for item, result in zip(items, response.results):
+        assert (readings[result.reading_id].patient_id, readings[result.reading_id].heart_rate) == (item["patient_id"], item["heart_rate"])
+
+    first = await db.get(PatientBaseline, 1)
+    assert (first.reading_count, first.heart_rate_sum) == (2, 121)
+    seventh = await db.get(PatientBaseline, 7)
+    assert (seventh.reading_count, seventh.heart_rate_sum) == (3, 67 + 130 + 30)
+    assert seventh.heart_rate_m2 == pytest.approx(sum((hr - 227 / 3) ** 2 for hr in (67, 130, 30)))
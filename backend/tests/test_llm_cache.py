@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+import aiosqlite
+
+from app.llm_cache import LLMResponseCache, cache_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+VITALS = {"heart_rate": 72, "blood_pressure": "120/80", "temperature": 98.6, "oxygen_saturation": 98.0}
+
+def test_cache_key_quantizes_near_identical_inputs():
+    nearby = {"heart_rate": 73, "blood_pressure": "121/80", "temperature": 98.62, "oxygen_saturation": 98.2}
+    assert cache_key("risk", VITALS) == cache_key("risk", nearby)
+    assert cache_key("risk", VITALS) != cache_key("audit", VITALS)
+    assert cache_key("risk", VITALS) != cache_key("risk", VITALS, {"avg_heart_rate": 60.0})
+    assert cache_key("risk", VITALS) != cache_key("risk", dict(VITALS, heart_rate=90))
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = LLMResponseCache(max_entries=2, ttl=60, clock=clock)
+
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+    assert await cache.get("a") == {"v": 1}  # "a" is now most recently used
+    await cache.set("c", {"v": 3})
+
+    assert await cache.get("b") is None
+    assert await cache.get("c") == {"v": 3}
+
+    clock.now += 61
+    assert await cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    cache = LLMResponseCache(path=path)
+    await cache.set("k", {"risk_level": "LOW"})
+    await cache.close()
+
+    restarted = LLMResponseCache(path=path)
+    assert await restarted.get("k") == {"risk_level": "LOW"}
+    assert restarted.stats()["disk_hits"] == 1
+    await restarted.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_open_one_disk_connection(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm_cache.db"))
+    opened = []
+    connect = aiosqlite.connect
+
+    def counting_connect(*args, **kwargs):
+        opened.append(args)
+        return connect(*args, **kwargs)
+
+    with patch("app.llm_cache.aiosqlite.connect", counting_connect):
+        await asyncio.gather(*[cache.set(f"k{i}", {"risk_level": "LOW"}) for i in range(5)])
+
+    assert len(opened) == 1
+    assert await cache.get("k4") == {"risk_level": "LOW"}
+    await cache.close()
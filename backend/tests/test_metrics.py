@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.metrics import Counter, Histogram, MetricsMiddleware, Registry, http_request_duration, db_queries_per_request
+from app.database import AsyncSessionLocal
+from app import metrics, predictor
+
+def test_registry_renders_counters_and_cumulative_histogram_buckets():
+    registry = Registry()
+    counter = registry.register(Counter("things_total", "Things", ["kind"]))
+    histogram = registry.register(Histogram("wait_seconds", "Waits", ["route"], buckets=(0.1, 1.0)))
+
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/p/{id}")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE things_total counter" in lines
+    assert 'things_total{kind="a\\"b"} 3' in lines
+    assert "# TYPE wait_seconds histogram" in lines
+    assert 'wait_seconds_bucket{route="/p/{id}",le="0.1"} 2' in lines
+    assert 'wait_seconds_bucket{route="/p/{id}",le="1.0"} 3' in lines
+    assert 'wait_seconds_bucket{route="/p/{id}",le="+Inf"} 4' in lines
+    assert 'wait_seconds_sum{route="/p/{id}"} 3.65' in lines
+    assert 'wait_seconds_count{route="/p/{id}"} 4' in lines
+
+def test_middleware_labels_by_route_template_and_counts_queries(db):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}")
+    async def get_thing(thing_id: int):
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+            await session.execute(text("SELECT 2"))
+        return {"id": thing_id}
+
+    before = http_request_duration.count(method="GET", route="/things/{thing_id}", status=200)
+    with TestClient(app) as client:
+        assert client.get("/things/1").status_code == 200
+        assert client.get("/things/2").status_code == 200
+        assert client.get("/nowhere").status_code == 404
+
+    assert http_request_duration.count(method="GET", route="/things/{thing_id}", status=200) == before + 2
+    assert http_request_duration.count(method="GET", route="unmatched", status=404) >= 1
+    series = db_queries_per_request._series[("/things/{thing_id}",)]
+    assert series[1] >= 4  # two statements per request
+
+@pytest.mark.asyncio
+async def test_parse_failures_and_rule_fallbacks_are_counted(monkeypatch):
+    async def generate(prompt, max_new_tokens, kind):
+        return "I'm sorry, I can't help with that."
+
+    monkeypatch.setattr(predictor, "_generate", generate)
+    monkeypatch.setattr(predictor, "HF_API_KEY", "test")
+    monkeypatch.setattr(predictor.risk_batcher, "window", 0)
+    parse_failures = metrics.llm_parse_failures.value(kind="risk")
+    errors = metrics.risk_rule_fallbacks.value(reason="error")
+
+    risk = await predictor.calculate_risk(131, "141/92", 101.3, 91.5)
+
+    assert risk["risk_level"] in ("LOW", "MEDIUM", "HIGH")
+    assert metrics.llm_parse_failures.value(kind="risk") == parse_failures + 1
+    assert metrics.risk_rule_fallbacks.value(reason="error") == errors + 1
+
+    monkeypatch.setattr(predictor, "HF_API_KEY", "")
+    no_key = metrics.risk_rule_fallbacks.value(reason="no_api_key")
+    offline = metrics.audit_verdicts.value(status="VALID", source="offline")
+    await predictor.calculate_risk(80, "120/80", 98.6, 98.0)
+    await predictor.audit_vitals({"heart_rate": 80, "blood_pressure": "120/80", "temperature": 98.6, "oxygen_saturation": 98.0})
+    assert metrics.risk_rule_fallbacks.value(reason="no_api_key") == no_key + 1
+    assert metrics.audit_verdicts.value(status="VALID", source="offline") == offline + 1
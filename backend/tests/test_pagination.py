@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.main import _list_patients_after
+from app.models import Patient, PatientReading
+from app.pagination import encode_cursor, decode_cursor, keyset_page, InvalidCursor, CachedCount
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 250)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    for bad in ["", "zzz", encode_cursor(created_at, 1)[:-3]]:
+        with pytest.raises(InvalidCursor):
+            decode_cursor(bad)
+
+@pytest.mark.asyncio
+async def test_cached_count_refreshes_after_ttl():
+    now = [0.0]
+    calls = []
+    async def count():
+        calls.append(1)
+        return 10
+    total = CachedCount(ttl=60, clock=lambda: now[0])
+
+    assert await total.get(count) == 10
+    total.add(1)
+    assert await total.get(count) == 11
+    now[0] = 61
+    assert await total.get(count) == 10
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_patient_once_despite_timestamp_ties(db):
+    # Batches of patients share a created_at, so the id tiebreaker matters
+    db.add_all([
+        Patient(id=i, name=f"P{i}", age=30, medical_record_number=f"K{i}", created_at=datetime(2024, 1, 1 + i // 4))
+        for i in range(1, 12)
+    ])
+    await db.commit()
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = await _list_patients_after(cursor, 3, False, db)
+        seen += [patient["id"] for patient in page["patients"]]
+        cursor = page["next_cursor"]
+
+    assert seen == [11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+@pytest.mark.asyncio
+async def test_reading_pages_walk_back_poll_forward_and_respect_time_range(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="K1"))
+    db.add_all([
+        PatientReading(id=i, patient_id=1, blood_pressure="120/80", heart_rate=60 + i,
+                       temperature=98.6, oxygen_saturation=98, recorded_at=datetime(2024, 1, 1, i))
+        for i in range(10)
+    ])
+    await db.commit()
+    query = select(PatientReading).where(PatientReading.patient_id == 1)
+    columns = (PatientReading.recorded_at, PatientReading.id)
+
+    first, next_cursor, newest = await keyset_page(db, query, *columns, 4)
+    older, _, _ = await keyset_page(db, query, *columns, 4, before=next_cursor)
+    assert [r.id for r in first + older] == [9, 8, 7, 6, 5, 4, 3, 2]
+
+    # Polling from an older page returns the rows newer than it, newest first
+    newer, _, _ = await keyset_page(db, query, *columns, 10, after=encode_cursor(older[0].recorded_at, older[0].id))
+    assert [r.id for r in newer] == [9, 8, 7, 6]
+    nothing, _, still_newest = await keyset_page(db, query, *columns, 10, after=newest)
+    assert nothing == [] and still_newest == newest
+
+    ranged, next_cursor, _ = await keyset_page(
+        db, query, *columns, 10, start=datetime(2024, 1, 1, 2), end=datetime(2024, 1, 1, 5)
+    )
+    assert [r.id for r in ranged] == [4, 3, 2] and next_cursor is None
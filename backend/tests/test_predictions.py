@@ -0,0 +1,43 @@
+import httpx
+import pytest
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import main
+from app.baselines import rolling_baselines
+from app.models import Patient, PatientReading
+
+@pytest.mark.asyncio
+async def test_prediction_breaks_recorded_at_ties_by_newest_id(db, monkeypatch):
+    recorded_at = datetime(2024, 1, 1, 12, 0)
+    db.add(Patient(id=1, name="Tied", age=40, medical_record_number="PR1"))
+    # Same timestamp, as bulk rows often have; the higher id is the latest reading
+    db.add_all([
+        PatientReading(patient_id=1, blood_pressure="120/80", heart_rate=72, temperature=98.6,
+                       oxygen_saturation=98.0, recorded_at=recorded_at),
+        PatientReading(patient_id=1, blood_pressure="160/100", heart_rate=130, temperature=101.5,
+                       oxygen_saturation=90.0, recorded_at=recorded_at)
+    ])
+    # Without the (patient_id, recorded_at) index, tied rows come back in scan order unless id breaks the tie
+    await db.execute(text("DROP INDEX ix_patient_readings_patient_recorded"))
+    await db.commit()
+
+    loads = []
+    original_load = rolling_baselines._load_many
+
+    async def counting_load(session, patient_ids):
+        loads.extend(patient_ids)
+        return await original_load(session, patient_ids)
+
+    monkeypatch.setattr(rolling_baselines, "_load_many", counting_load)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/api/v1/predictions", json={"patient_id": 1, "baseline": "last_n"})
+        second = await client.post("/api/v1/predictions", json={"patient_id": 1, "baseline": "last_n"})
+
+    assert first.status_code == 200
+    assert first.json()["risk_level"] == "HIGH"
+    assert second.json()["risk_level"] == "HIGH"
+    # The latest reading matches the rolling windows, so they're loaded once, not per request
+    assert loads == [1]
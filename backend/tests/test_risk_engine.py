@@ -0,0 +1,95 @@
+import numpy as np
+
+from app.predictor import score_vitals, score_vitals_batch, _calculate_risk_rule_based, calculate_risks_rule_based
+
+def _reference_risk(heart_rate, systolic_bp, temperature, oxygen_saturation, avg_hr=None):
+    """The original scalar rules, kept here so the batch engine is checked against them"""
+    risk_score = 0.0
+    if heart_rate > 100 or heart_rate < 60: risk_score += 0.3
+    if systolic_bp > 140 or systolic_bp < 90: risk_score += 0.3
+    if temperature > 100.4 or temperature < 96.0: risk_score += 0.2
+    if oxygen_saturation < 95: risk_score += 0.2
+    if avg_hr and abs(heart_rate - avg_hr) > 30:
+        risk_score += 0.2
+    risk_score = min(risk_score, 1.0)
+    if risk_score > 0.6:
+        risk_level = "HIGH"
+    elif risk_score > 0.3:
+        risk_level = "MEDIUM"
+    else:
+        risk_level = "LOW"
+    return round(risk_score, 2), risk_level
+
+def test_batch_scores_at_threshold_edges():
+    cases = [
+        # (heart_rate, systolic, temperature, spo2, baseline HR) -> (score, level)
+        ((60, 120, 98.6, 95.0, None), (0.0, "LOW")),     # every value exactly on a normal edge
+        ((100, 140, 100.4, 95.0, None), (0.0, "LOW")),
+        ((59, 120, 98.6, 98.0, None), (0.3, "LOW")),     # 0.3 is not above the MEDIUM cut
+        ((101, 120, 98.6, 98.0, None), (0.3, "LOW")),
+        ((72, 89, 98.6, 98.0, None), (0.3, "LOW")),
+        ((72, 141, 98.6, 98.0, None), (0.3, "LOW")),
+        ((72, 120, 95.9, 98.0, None), (0.2, "LOW")),
+        ((72, 120, 100.5, 98.0, None), (0.2, "LOW")),
+        ((72, 120, 98.6, 94.9, None), (0.2, "LOW")),
+        ((72, 120, 100.5, 94.9, None), (0.4, "MEDIUM")),
+        ((101, 120, 98.6, 94.9, None), (0.5, "MEDIUM")),
+        ((101, 141, 98.6, 98.0, None), (0.6, "MEDIUM")),  # 0.6 is not above the HIGH cut
+        ((101, 141, 100.5, 98.0, None), (0.8, "HIGH")),
+        ((101, 141, 100.5, 94.9, None), (1.0, "HIGH")),
+        ((101, 141, 100.5, 94.9, 50.0), (1.0, "HIGH")),   # capped at 1.0
+        ((100, 120, 98.6, 98.0, 70.0), (0.0, "LOW")),     # deviation of exactly 30
+        ((100, 120, 98.6, 98.0, 69.0), (0.2, "LOW")),
+        ((101, 120, 98.6, 98.0, 70.0), (0.5, "MEDIUM")),
+    ]
+    columns = list(zip(*[vitals for vitals, _ in cases]))
+    baseline = [np.nan if value is None else value for value in columns[4]]
+
+    scores, levels = score_vitals_batch(columns[0], columns[1], columns[2], columns[3], baseline)
+
+    for i, (vitals, (score, level)) in enumerate(cases):
+        assert (float(scores[i]), str(levels[i])) == (score, level), vitals
+
+def test_batch_scores_match_original_scalar_rules():
+    heart_rate, systolic, temperature, spo2, baseline = [], [], [], [], []
+    for hr in (40, 59, 60, 61, 99, 100, 101, 150):
+        for sbp in (85, 89, 90, 140, 141):
+            for temp in (95.9, 96.0, 100.4, 100.5):
+                for sat in (94.9, 95.0):
+                    for avg in (None, hr - 31, hr + 30):
+                        heart_rate.append(hr)
+                        systolic.append(sbp)
+                        temperature.append(temp)
+                        spo2.append(sat)
+                        baseline.append(avg)
+
+    scores, levels = score_vitals_batch(
+        heart_rate, systolic, temperature, spo2,
+        [np.nan if avg is None else avg for avg in baseline]
+    )
+
+    for i in range(len(heart_rate)):
+        expected = _reference_risk(heart_rate[i], systolic[i], temperature[i], spo2[i], baseline[i])
+        assert (float(scores[i]), str(levels[i])) == expected
+        assert score_vitals(heart_rate[i], systolic[i], temperature[i], spo2[i], baseline[i]) == expected
+
+def test_scalar_wrapper_parses_blood_pressure_and_baseline():
+    result = _calculate_risk_rule_based(150, "160/100", 102.0, 88.0, {"avg_heart_rate": 80.0})
+    assert result["risk_score"] == 1.0
+    assert result["risk_level"] == "HIGH"
+    assert result["baseline_analysis"].startswith("Offline mode: HR deviation of 70.0 bpm")
+
+def test_unparseable_blood_pressure_defaults_to_normal():
+    result = _calculate_risk_rule_based(72, "n/a", 98.6, 98.0)
+    assert result["risk_score"] == 0.0
+    assert result["risk_level"] == "LOW"
+
+def test_many_readings_match_the_single_reading_path():
+    requests = [
+        {"heart_rate": 150, "blood_pressure": "160/100", "temperature": 102.0, "oxygen_saturation": 88.0, "historical_average": {"avg_heart_rate": 80.0}},
+        {"heart_rate": 72, "blood_pressure": "n/a", "temperature": 98.6, "oxygen_saturation": 98.0},
+        {"heart_rate": 105, "blood_pressure": "120/80", "temperature": 98.6, "oxygen_saturation": 94.0, "historical_average": {"avg_heart_rate": None}, "systolic_bp": 150},
+    ]
+    results = calculate_risks_rule_based(requests)
+    assert results == [_calculate_risk_rule_based(**request) for request in requests]
+    assert calculate_risks_rule_based([]) == []
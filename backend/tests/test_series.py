@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+
+from app.models import Patient, PatientReading
+from app.series import lttb_indices, bucket_series, lttb_series
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50)
+    y[437] = 40.0
+
+    picked = lttb_indices(x, y, 60)
+
+    assert len(picked) == 60
+    assert picked[0] == 0 and picked[-1] == 999
+    assert 437 in picked
+    assert np.all(np.diff(picked) > 0)
+    assert lttb_indices(x[:10], y[:10], 60).tolist() == list(range(10))
+
+@pytest.mark.asyncio
+async def test_series_modes_stay_within_the_point_budget(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="S1"))
+    start = datetime(2024, 1, 1)
+    db.add_all([
+        PatientReading(patient_id=1, blood_pressure=f"{110 + i % 20}/80", heart_rate=60 + i % 30,
+                       temperature=98.6, oxygen_saturation=97, recorded_at=start + timedelta(minutes=i))
+        for i in range(600)
+    ])
+    await db.commit()
+
+    hourly = await bucket_series(db, 1, points=100, bucket_seconds=3600)
+    assert hourly["bucket_seconds"] == 3600
+    assert [bucket["count"] for bucket in hourly["buckets"]] == [60] * 10
+    first = hourly["buckets"][0]
+    assert first["recorded_at"] == start
+    assert (first["heart_rate_min"], first["heart_rate_max"]) == (60, 89)
+    assert (first["systolic_bp_min"], first["systolic_bp_max"]) == (110, 129)
+
+    # A resolution too fine for the budget is widened
+    widened = await bucket_series(db, 1, points=20, bucket_seconds=60)
+    assert widened["bucket_seconds"] == 1797
+    assert len(widened["buckets"]) <= 21
+    assert sum(bucket["count"] for bucket in widened["buckets"]) == 600
+
+    sampled = await lttb_series(db, 1, points=80)
+    assert sampled["source_points"] == 600
+    assert len(sampled["readings"]) <= 80
+    assert sampled["readings"][0]["recorded_at"] == start
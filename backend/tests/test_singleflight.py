@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+
+from app.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"prediction_id": calls}
+
+    results = await asyncio.gather(*[flights.do((1, 10), compute) for _ in range(5)])
+
+    assert calls == 1
+    assert all(result == {"prediction_id": 1} for result in results)
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+    # Once finished nothing is remembered: a new call runs again
+    assert await flights.do((1, 10), compute) == {"prediction_id": 2}
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("model unavailable")
+
+    results = await asyncio.gather(*[flights.do("k", fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_fails_followers_with_runtime_error():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    leader = asyncio.ensure_future(flights.do("k", slow))
+    await started.wait()
+    follower = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(RuntimeError, match="leader cancelled"):
+        await follower
+    assert leader.cancelled()
+    assert flights.in_flight() == 0
@@ -0,0 +1,226 @@
+import asyncio
+import httpx
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models import Patient, PatientReading
+from app import main, triage
+from app.conditional import bump_data_versions
+from app.database import AsyncSessionLocal, engine
+from app.triage import (
+    fetch_latest_reading_pairs, score_rows, TriageIndex, triage_index,
+    rebuild_triage_index, sync_triage_index, run_triage_sync
+)
+
+def _reading(patient_id, hr, temp, spo2, minutes_ago, reading_id=None):
+    return PatientReading(
+        id=reading_id,
+        patient_id=patient_id,
+        blood_pressure="120/80",
+        heart_rate=hr,
+        temperature=temp,
+        oxygen_saturation=spo2,
+        recorded_at=datetime(2024, 1, 1, 12, 0) - timedelta(minutes=minutes_ago)
+    )
+
+@pytest.mark.asyncio
+async def test_triage_uses_latest_two_readings(db):
+    db.add_all([
+        Patient(id=1, name="Stable", age=40, medical_record_number="T1"),
+        Patient(id=2, name="Crashing", age=70, medical_record_number="T2"),
+        Patient(id=3, name="No Data", age=30, medical_record_number="T3"),
+        Patient(id=4, name="Single", age=55, medical_record_number="T4"),
+    ])
+    db.add_all([
+        # Oldest reading must be ignored for the trend
+        _reading(1, 140, 103.0, 88, 120),
+        _reading(1, 72, 98.6, 98, 60),
+        _reading(1, 74, 98.7, 98, 0),
+        _reading(2, 80, 98.6, 98, 30),
+        _reading(2, 125, 101.2, 91, 0),
+        _reading(4, 72, 98.6, 98, 0),
+    ])
+    await db.commit()
+
+    rows = await fetch_latest_reading_pairs(db)
+    scores = score_rows(rows)
+
+    assert [s.patient_id for s in scores] == [2, 1, 4]
+    crashing = scores[0]
+    assert crashing.urgency_score == 1.8
+    assert crashing.current_risk == "HIGH"
+    assert crashing.trend == "DETERIORATING"
+    assert crashing.reason == "High current risk, Vitals deteriorating"
+    assert scores[1].trend == "STABLE"
+    assert scores[1].reason == "Stable condition"
+    assert scores[2].urgency_score == 0.0
+
+@pytest.mark.asyncio
+async def test_triage_index_matches_query_and_tracks_updates(db):
+    db.add_all([
+        Patient(id=1, name="A", age=40, medical_record_number="I1"),
+        Patient(id=2, name="B", age=50, medical_record_number="I2"),
+    ])
+    db.add_all([
+        _reading(1, 72, 98.6, 98, 10),
+        _reading(2, 110, 98.6, 98, 10),
+    ])
+    await db.commit()
+
+    index = TriageIndex()
+    rows = await fetch_latest_reading_pairs(db)
+    index.rebuild(rows)
+    assert index.top(10) == score_rows(rows)
+
+    # Patient 1 deteriorates and overtakes patient 2
+    index.update(1, "A", _reading(1, 130, 101.5, 90, 0, reading_id=3))
+    assert [s.patient_id for s in index.top(10)] == [1, 2]
+    assert index.top(1)[0].trend == "DETERIORATING"
+
+    # A back-dated reading older than both known readings changes nothing
+    before = index.top(10)
+    index.update(1, "A", _reading(1, 40, 95.0, 80, 600, reading_id=4))
+    assert index.top(10) == before
+
+def test_triage_index_keeps_order_through_many_updates():
+    index = TriageIndex()
+    index.rebuild([])
+    latest = {}
+    for step in range(400):
+        patient_id = step % 7 + 1
+        hr = 60 + (step * 37) % 80
+        index.update(patient_id, f"P{patient_id}", _reading(patient_id, hr, 98.6, 97, -step, reading_id=step + 1))
+        latest[patient_id] = index._scores[patient_id]
+
+    expected = sorted(latest.values(), key=lambda score: (-score.urgency_score, score.patient_id))
+    assert index.top(100) == expected
+    assert index.top(3) == expected[:3]
+    # Superseded entries are compacted away rather than piling up
+    assert len(index._heap) <= 2 * len(latest) + 64
+
+async def _store(*readings):
+    """Commit readings the way any writer does, data version bump included, from another session"""
+    async with AsyncSessionLocal() as other:
+        other.add_all(readings)
+        await bump_data_versions(other, {reading.patient_id for reading in readings})
+        await other.commit()
+
+@pytest.mark.asyncio
+async def test_sync_applies_readings_stored_by_other_processes(db, monkeypatch):
+    index = TriageIndex()
+    monkeypatch.setattr(triage, "triage_index", index)
+    db.add_all([
+        Patient(id=1, name="A", age=40, medical_record_number="S1"),
+        Patient(id=2, name="B", age=50, medical_record_number="S2"),
+    ])
+    await db.commit()
+    await _store(_reading(1, 72, 98.6, 98, 10), _reading(2, 80, 98.6, 98, 10))
+    await rebuild_triage_index(db)
+    assert index.synced_reading_id == 2
+
+    # This process stores and indexes a reading itself...
+    local = _reading(1, 74, 98.6, 98, 5)
+    await _store(local)
+    index.update(1, "A", local)
+    # ...while another worker stores one the index never hears about
+    await _store(_reading(2, 130, 101.5, 90, 0))
+    assert index.top(1)[0].patient_id == 1
+
+    await sync_triage_index(db)
+    assert [s.patient_id for s in index.top(10)] == [2, 1]
+    assert index.top(1)[0].trend == "DETERIORATING"
+    assert index.synced_reading_id == 4
+    # The local reading came back through the sync (and the lag window) but counts once
+    assert [snapshot.heart_rate for snapshot in index._recent[1]] == [74, 72]
+
+    # Nothing committed since: the sync reads the version row and stops
+    revision = index.revision
+    await sync_triage_index(db)
+    assert index.revision == revision
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_lower_ids_that_commit_late(db, monkeypatch):
+    index = TriageIndex()
+    monkeypatch.setattr(triage, "triage_index", index)
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="S1"))
+    await db.commit()
+    await _store(_reading(1, 72, 98.6, 98, 10, reading_id=1))
+    await rebuild_triage_index(db)
+
+    # Id 20 commits first, then id 15 that was allocated before it (as Postgres sequences allow)
+    await _store(_reading(1, 74, 98.6, 98, 5, reading_id=20))
+    await sync_triage_index(db)
+    assert index.synced_reading_id == 20
+    await _store(_reading(1, 130, 101.5, 90, 0, reading_id=15))
+    await sync_triage_index(db)
+
+    assert index.top(1)[0].current_risk == "HIGH"
+    assert [snapshot.id for snapshot in index._recent[1]] == [15, 20]
+
+@pytest.mark.asyncio
+async def test_sync_rebuilds_when_the_backlog_is_large(db, monkeypatch):
+    index = TriageIndex()
+    monkeypatch.setattr(triage, "triage_index", index)
+    monkeypatch.setattr(triage, "TRIAGE_SYNC_MAX_READINGS", 2)
+    monkeypatch.setattr(triage, "TRIAGE_SYNC_LAG_READINGS", 0)
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="S1"))
+    await db.commit()
+
+    # Not built yet: the first sync rebuilds
+    await sync_triage_index(db)
+    assert index.ready and len(index) == 0
+
+    await _store(*[_reading(1, 72 + minutes, 98.6, 98, minutes) for minutes in range(5)])
+    await sync_triage_index(db)
+    assert index.synced_reading_id == 5
+    assert index.top(1) == score_rows(await fetch_latest_reading_pairs(db))
+
+@pytest.mark.asyncio
+async def test_background_sync_feeds_the_index(db, monkeypatch):
+    index = TriageIndex()
+    monkeypatch.setattr(triage, "triage_index", index)
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="S1"))
+    await db.commit()
+    await rebuild_triage_index(db)
+
+    task = asyncio.create_task(run_triage_sync(interval=0.01))
+    try:
+        await _store(_reading(1, 130, 101.5, 90, 0))
+        for _ in range(100):
+            if len(index):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert index.top(1)[0].current_risk == "HIGH"
+
+@pytest.mark.asyncio
+async def test_triage_top_is_served_from_memory(db):
+    db.add(Patient(id=1, name="A", age=40, medical_record_number="S1"))
+    await db.commit()
+    await _store(_reading(1, 130, 101.5, 90, 0))
+    await rebuild_triage_index(db)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/api/v1/triage/top", params={"k": 5})
+            again = await client.get("/api/v1/triage/top", params={"k": 5}, headers={"If-None-Match": first.headers["etag"]})
+            triage_index.update(1, "A", _reading(1, 72, 98.6, 98, -5, reading_id=99))
+            changed = await client.get("/api/v1/triage/top", params={"k": 5}, headers={"If-None-Match": first.headers["etag"]})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert first.json()[0]["current_risk"] == "HIGH"
+    assert again.status_code == 304
+    assert changed.status_code == 200 and changed.json()[0]["current_risk"] == "LOW"
+    assert statements == []
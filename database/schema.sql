@@ -15,6 +15,8 @@ CREATE TABLE IF NOT EXISTS patient_readings (
     id SERIAL PRIMARY KEY,
     patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
     blood_pressure VARCHAR(20) NOT NULL,
+    systolic_bp INTEGER,
+    diastolic_bp INTEGER,
     heart_rate INTEGER NOT NULL CHECK (heart_rate >= 30 AND heart_rate <= 300),
     temperature DECIMAL(4,1) NOT NULL CHECK (temperature >= 90.0 AND temperature <= 110.0),
     oxygen_saturation DECIMAL(4,1) NOT NULL CHECK (oxygen_saturation >= 70.0 AND oxygen_saturation <= 100.0),
@@ -31,12 +33,54 @@ CREATE TABLE IF NOT EXISTS predictions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create reading_audits table (data quality verdict per reading)
+CREATE TABLE IF NOT EXISTS reading_audits (
+    reading_id INTEGER PRIMARY KEY REFERENCES patient_readings(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL CHECK (status IN ('VALID', 'SUSPICIOUS')),
+    reason TEXT NOT NULL,
+    source VARCHAR(20) NOT NULL CHECK (source IN ('RULES', 'AI')),
+    audited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create patient_baselines table (running count/sum/Welford M2 per patient)
+CREATE TABLE IF NOT EXISTS patient_baselines (
+    patient_id INTEGER PRIMARY KEY REFERENCES patients(id) ON DELETE CASCADE,
+    reading_count INTEGER NOT NULL DEFAULT 0,
+    heart_rate_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    heart_rate_m2 DOUBLE PRECISION NOT NULL DEFAULT 0,
+    temperature_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    temperature_m2 DOUBLE PRECISION NOT NULL DEFAULT 0,
+    oxygen_saturation_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    oxygen_saturation_m2 DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create import_checkpoints table (resume point of an interrupted importer run)
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source VARCHAR(1024) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    records_done INTEGER NOT NULL DEFAULT 0,
+    imported INTEGER NOT NULL DEFAULT 0,
+    invalid INTEGER NOT NULL DEFAULT 0,
+    unknown_patient INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create data_versions table (change counter per cached scope, for ETags)
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope VARCHAR(32) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_patients_mrn ON patients(medical_record_number);
 CREATE INDEX IF NOT EXISTS idx_patient_readings_patient_id ON patient_readings(patient_id);
 CREATE INDEX IF NOT EXISTS idx_patient_readings_recorded_at ON patient_readings(recorded_at);
 CREATE INDEX IF NOT EXISTS idx_predictions_patient_id ON predictions(patient_id);
 CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions(created_at);
+CREATE INDEX IF NOT EXISTS ix_patients_created_at_id ON patients(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_patient_readings_patient_recorded ON patient_readings(patient_id, recorded_at);
+CREATE INDEX IF NOT EXISTS ix_predictions_patient_created ON predictions(patient_id, created_at);
 
 -- Insert sample data for testing
 INSERT INTO patients (name, age, medical_record_number) VALUES
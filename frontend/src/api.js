@@ -54,6 +54,36 @@ export const patientAPI = {
     return response.data;
   },
 
+  // Get patient header data: counts plus latest reading and prediction, no history
+  getPatientSummary: async (patientId) => {
+    const response = await api.get(`/patients/${patientId}/summary`);
+    return response.data;
+  },
+
+  // Get a page of readings, newest first; pass the previous page's next_cursor as before
+  getPatientReadings: async (patientId, { limit = 50, before, after, from, to } = {}) => {
+    const response = await api.get(`/patients/${patientId}/readings`, {
+      params: { limit, before, after, from, to }
+    });
+    return response.data;
+  },
+
+  // Get a page of predictions, newest first
+  getPatientPredictions: async (patientId, { limit = 20, before, after, from, to } = {}) => {
+    const response = await api.get(`/patients/${patientId}/predictions`, {
+      params: { limit, before, after, from, to }
+    });
+    return response.data;
+  },
+
+  // Get a chart-sized vitals series: mode 'lttb' (downsampled readings) or 'bucket' (min/avg/max)
+  getVitalsSeries: async (patientId, { mode = 'lttb', points = 500, bucketSeconds, from, to } = {}) => {
+    const response = await api.get(`/patients/${patientId}/vitals/series`, {
+      params: { mode, points, bucket_seconds: bucketSeconds, from, to }
+    });
+    return response.data;
+  },
+
   // Log vital signs for a patient
   logMetrics: async (patientId, metrics) => {
     const response = await api.post(`/patients/${patientId}/metrics`, metrics);
@@ -17,8 +17,9 @@ function PatientDetail() {
     try {
       setLoading(true);
       setError(null);
-      const data = await patientAPI.getPatientDetails(id);
-      setPatient(data);
+      // Header data only; the chart fetches its own downsampled series
+      const summary = await patientAPI.getPatientSummary(id);
+      setPatient(summary);
     } catch (err) {
       setError('Failed to fetch patient details');
       console.error('Error fetching patient details:', err);
@@ -37,7 +38,7 @@ function PatientDetail() {
   };
 
   const handleGetPrediction = async () => {
-    if (!patient.readings || patient.readings.length === 0) {
+    if (!patient.reading_count) {
       alert('No vital signs data available. Please log some vitals first.');
       return;
     }
@@ -62,11 +63,6 @@ function PatientDetail() {
     }
   };
 
-  const getLatestVitals = () => {
-    if (!patient.readings || patient.readings.length === 0) return null;
-    return patient.readings[0]; // Readings are sorted by recorded_at desc
-  };
-
   if (loading) {
     return <div className="loading">Loading patient details...</div>;
   }
@@ -93,8 +89,8 @@ function PatientDetail() {
     );
   }
 
-  const latestVitals = getLatestVitals();
-  const latestPrediction = patient.predictions && patient.predictions.length > 0 ? patient.predictions[0] : null;
+  const latestVitals = patient.latest_reading;
+  const latestPrediction = patient.latest_prediction;
 
   return (
     <div>
@@ -133,7 +129,7 @@ function PatientDetail() {
             <strong>Patient Since:</strong> {new Date(patient.created_at).toLocaleDateString()}
           </div>
           <div>
-            <strong>Total Readings:</strong> {patient.readings?.length || 0}
+            <strong>Total Readings:</strong> {patient.reading_count}
           </div>
         </div>
       </div>
@@ -188,15 +184,15 @@ function PatientDetail() {
       )}
 
       {/* Vitals Chart */}
-      {patient.readings && patient.readings.length > 0 && (
+      {patient.reading_count > 0 && (
         <div className="card">
           <h3>Vital Signs Trends</h3>
-          <VitalsChart readings={patient.readings} />
+          <VitalsChart patientId={id} refreshKey={patient.reading_count} />
         </div>
       )}
 
       {/* No Data Message */}
-      {(!patient.readings || patient.readings.length === 0) && (
+      {patient.reading_count === 0 && (
         <div className="card" style={{ textAlign: 'center', padding: '40px' }}>
           <h3>No vital signs recorded</h3>
           <p>Click "Log Vitals" to start tracking this patient's health data.</p>
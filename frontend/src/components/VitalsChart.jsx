@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import {
   LineChart,
   Line,
@@ -9,30 +9,51 @@ import {
   Legend,
   ResponsiveContainer
 } from 'recharts';
+import { patientAPI } from '../api';
 
-function VitalsChart({ readings }) {
-  // Prepare data for the chart
-  const chartData = readings
-    .slice()
-    .reverse() // Show oldest to newest
-    .map((reading, index) => {
-      // Parse systolic blood pressure for charting
-      const systolic = parseInt(reading.blood_pressure.split('/')[0]);
-      
-      return {
-        index: index + 1,
-        date: new Date(reading.recorded_at).toLocaleDateString(),
-        time: new Date(reading.recorded_at).toLocaleTimeString([], { 
-          hour: '2-digit', 
-          minute: '2-digit' 
-        }),
-        heart_rate: reading.heart_rate,
-        temperature: reading.temperature,
-        oxygen_saturation: reading.oxygen_saturation,
-        systolic_bp: systolic,
-        fullDate: new Date(reading.recorded_at).toLocaleString()
-      };
-    });
+// Upper bound on plotted points, whatever the length of the history
+const CHART_POINTS = 400;
+
+function VitalsChart({ patientId, refreshKey }) {
+  const [mode, setMode] = useState('lttb');
+  const [series, setSeries] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    patientAPI.getVitalsSeries(patientId, { mode, points: CHART_POINTS })
+      .then((data) => {
+        if (!cancelled) {
+          setSeries(data);
+          setError(null);
+        }
+      })
+      .catch((err) => {
+        if (!cancelled) setError('Failed to load vitals chart');
+        console.error('Error fetching vitals series:', err);
+      });
+    return () => { cancelled = true; };
+  }, [patientId, mode, refreshKey]);
+
+  // Bucket mode plots the per-bucket averages; both modes arrive oldest to newest
+  const points = series ? (series.mode === 'bucket' ? series.buckets : series.readings) : [];
+  const suffix = series?.mode === 'bucket' ? '_avg' : '';
+  const chartData = points.map((point, index) => ({
+    index: index + 1,
+    date: new Date(point.recorded_at).toLocaleDateString(),
+    time: new Date(point.recorded_at).toLocaleTimeString([], { 
+      hour: '2-digit', 
+      minute: '2-digit' 
+    }),
+    heart_rate: point[`heart_rate${suffix}`],
+    temperature: point[`temperature${suffix}`],
+    oxygen_saturation: point[`oxygen_saturation${suffix}`],
+    systolic_bp: point[`systolic_bp${suffix}`],
+    count: point.count,
+    fullDate: new Date(point.recorded_at).toLocaleString()
+  }));
+  // Per-point dots are the slowest part to render on long series
+  const dot = chartData.length > 100 ? false : { r: 4 };
 
   // Custom tooltip to show all vital signs
   const CustomTooltip = ({ active, payload, label }) => {
@@ -48,6 +69,7 @@ function VitalsChart({ readings }) {
         }}>
           <p style={{ margin: '0 0 10px 0', fontWeight: 'bold' }}>
             {data.fullDate}
+            {data.count !== undefined && ` (average of ${data.count})`}
           </p>
           <p style={{ margin: '5px 0', color: '#8884d8' }}>
             Heart Rate: {data.heart_rate} bpm
@@ -67,7 +89,15 @@ function VitalsChart({ readings }) {
     return null;
   };
 
-  if (!readings || readings.length === 0) {
+  if (error) {
+    return <div className="error">{error}</div>;
+  }
+
+  if (!series) {
+    return <div className="loading">Loading chart...</div>;
+  }
+
+  if (chartData.length === 0) {
     return (
       <div style={{ textAlign: 'center', padding: '40px', color: '#666' }}>
         No vital signs data to display
@@ -77,6 +107,12 @@ function VitalsChart({ readings }) {
 
   return (
     <div className="chart-container">
+      <div style={{ textAlign: 'right', marginBottom: '10px' }}>
+        <select value={mode} onChange={(e) => setMode(e.target.value)}>
+          <option value="lttb">Detailed</option>
+          <option value="bucket">Averaged over time</option>
+        </select>
+      </div>
       <ResponsiveContainer width="100%" height={400}>
         <LineChart
           data={chartData}
@@ -114,7 +150,7 @@ function VitalsChart({ readings }) {
             dataKey="heart_rate"
             stroke="#8884d8"
             strokeWidth={2}
-            dot={{ r: 4 }}
+            dot={dot}
             name="Heart Rate (bpm)"
           />
           
@@ -124,7 +160,7 @@ function VitalsChart({ readings }) {
             dataKey="temperature"
             stroke="#82ca9d"
             strokeWidth={2}
-            dot={{ r: 4 }}
+            dot={dot}
             name="Temperature (°F)"
           />
           
@@ -134,7 +170,7 @@ function VitalsChart({ readings }) {
             dataKey="oxygen_saturation"
             stroke="#ffc658"
             strokeWidth={2}
-            dot={{ r: 4 }}
+            dot={dot}
             name="O2 Saturation (%)"
           />
           
@@ -144,7 +180,7 @@ function VitalsChart({ readings }) {
             dataKey="systolic_bp"
             stroke="#ff7300"
             strokeWidth={2}
-            dot={{ r: 4 }}
+            dot={dot}
             name="Systolic BP (mmHg)"
           />
         </LineChart>
@@ -156,7 +192,9 @@ function VitalsChart({ readings }) {
         color: '#666',
         textAlign: 'center'
       }}>
-        Showing {readings.length} readings over time
+        {series.mode === 'bucket'
+          ? `Showing ${chartData.length} averages of ${series.source_points} readings`
+          : `Showing ${chartData.length} of ${series.source_points} readings over time`}
       </div>
     </div>
   );